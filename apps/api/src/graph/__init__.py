@@ -1,5 +1,12 @@
 """Finite state machine (FSM) and LangGraph stubs."""
 
-from .fsm import ConversationGraph, ConversationState
+from .fsm import ConversationGraph, ConversationState, InvalidTransition
+from .sessions import SessionStore, get_session_store
 
-__all__ = ["ConversationGraph", "ConversationState"]
+__all__ = [
+    "ConversationGraph",
+    "ConversationState",
+    "InvalidTransition",
+    "SessionStore",
+    "get_session_store",
+]
@@ -1,10 +1,10 @@
-"""LangGraph/FSM style conversation state stub."""
+"""LangGraph/FSM style conversation state machine."""
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from array import array
 from enum import Enum
-from typing import List
+from typing import Iterable, List
 
 
 class ConversationState(str, Enum):
@@ -16,28 +16,81 @@ class ConversationState(str, Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+_STATES: tuple[ConversationState, ...] = tuple(ConversationState)
+_CODES = {state: code for code, state in enumerate(_STATES)}
+
+# Every state may fall back to IDLE (e.g. an aborted stream); the others
+# follow one turn: IDLE/COMPLETED -> PLANNING -> RESPONDING -> COMPLETED.
+ALLOWED_TRANSITIONS: dict[ConversationState, frozenset[ConversationState]] = {
+    ConversationState.IDLE: frozenset({ConversationState.IDLE, ConversationState.PLANNING}),
+    ConversationState.PLANNING: frozenset({ConversationState.IDLE, ConversationState.RESPONDING}),
+    ConversationState.RESPONDING: frozenset({ConversationState.IDLE, ConversationState.COMPLETED}),
+    ConversationState.COMPLETED: frozenset({ConversationState.IDLE, ConversationState.PLANNING}),
+}
+
+DEFAULT_MAX_HISTORY = 32
+
+
+class InvalidTransition(ValueError):
+    """Raised when a transition is not allowed from the current state."""
+
+
 class ConversationGraph:
-    """Placeholder for a LangGraph or FSM style conversation manager.
+    """Compact conversation state machine.
 
-    The implementation will be replaced when the actual planning/execution graph
-    is introduced. For now it stores the history of visited states so tests and
-    downstream code have a predictable contract to rely on.
+    Visited states are stored as one byte each in an ``array`` capped at
+    ``max_history`` entries (oldest dropped first), and the instance uses
+    ``__slots__``, so thousands of live sessions cost a few hundred bytes
+    each.
     """
 
-    history: List[ConversationState] = field(default_factory=lambda: [ConversationState.IDLE])
+    __slots__ = ("_history", "max_history", "turns")
+
+    def __init__(
+        self,
+        history: Iterable[ConversationState] | None = None,
+        *,
+        max_history: int = DEFAULT_MAX_HISTORY,
+    ) -> None:
+        self.max_history = max(max_history, 1)
+        self._history = array("B", (_CODES[state] for state in history or (ConversationState.IDLE,)))
+        self.turns = 0
+        self._trim()
+
+    def _trim(self) -> None:
+        overflow = len(self._history) - self.max_history
+        if overflow > 0:
+            del self._history[:overflow]
+
+    @property
+    def history(self) -> List[ConversationState]:
+        """Visited states, oldest first (at most ``max_history`` of them)."""
+
+        return [_STATES[code] for code in self._history]
+
+    def can_transition(self, next_state: ConversationState) -> bool:
+        return next_state in ALLOWED_TRANSITIONS[self.current_state]
 
     def transition(self, next_state: ConversationState) -> None:
         """Record a state transition.
 
         Args:
             next_state: The state to transition into.
+
+        Raises:
+            InvalidTransition: If *next_state* is not reachable from the
+                current state.
         """
 
-        self.history.append(next_state)
+        if not self.can_transition(next_state):
+            raise InvalidTransition(f"cannot move from {self.current_state.value} to {next_state.value}")
+        if next_state is ConversationState.PLANNING:
+            self.turns += 1
+        self._history.append(_CODES[next_state])
+        self._trim()
 
     @property
     def current_state(self) -> ConversationState:
         """Return the most recent state."""
 
-        return self.history[-1]
+        return _STATES[self._history[-1]]
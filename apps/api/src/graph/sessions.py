@@ -0,0 +1,97 @@
+"""Bounded in-memory store of per-session conversation graphs."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from ..settings import env_int
+from .fsm import ConversationGraph
+
+CHAT_SESSION_MAX = env_int("CHAT_SESSION_MAX", 10_000)
+CHAT_SESSION_TTL_S = env_int("CHAT_SESSION_TTL_S", 1800)
+
+
+@dataclass
+class SessionStoreStats:
+    created: int = 0
+    hits: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+
+class SessionStore:
+    """LRU map of session id to :class:`ConversationGraph` with idle TTL.
+
+    Entries are kept in least-recently-used order together with the time they
+    were last touched, so both expired sessions and the LRU victim sit at the
+    front and every operation is amortised O(1). The store is only used from
+    the event loop and therefore needs no lock.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = CHAT_SESSION_MAX,
+        ttl_seconds: float = CHAT_SESSION_TTL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = max(max_sessions, 1)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[ConversationGraph, float]] = OrderedDict()
+        self.stats = SessionStoreStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._entries
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = now - self.ttl_seconds
+        while self._entries:
+            session_id, (_, touched_at) = next(iter(self._entries.items()))
+            if touched_at > cutoff:
+                break
+            del self._entries[session_id]
+            self.stats.expired += 1
+
+    def get(self, session_id: str) -> ConversationGraph | None:
+        """Return the live graph for *session_id* and mark it recently used."""
+
+        now = self._clock()
+        self._expire(now)
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        self._entries[session_id] = (entry[0], now)
+        self._entries.move_to_end(session_id)
+        self.stats.hits += 1
+        return entry[0]
+
+    def get_or_create(self, session_id: str) -> ConversationGraph:
+        graph = self.get(session_id)
+        if graph is not None:
+            return graph
+        graph = ConversationGraph()
+        self._entries[session_id] = (graph, self._clock())
+        self.stats.created += 1
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self.stats.evicted += 1
+        return graph
+
+    def discard(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+
+_STORE = SessionStore()
+
+
+def get_session_store() -> SessionStore:
+    return _STORE
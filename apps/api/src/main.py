@@ -1,8 +1,25 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .middleware.metrics import RequestMetricsMiddleware
+from .providers import close_provider
 from .routes import analysis_router, chat_router, metrics_router, tools_router
+from .services.graph_watcher import ANALYSIS_WATCH, start_watcher, stop_watcher
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """ANALYSIS_WATCH が有効ならバックグラウンドで解析グラフを更新し続け、終了時にプロバイダを閉じる。"""
+    if ANALYSIS_WATCH:
+        start_watcher()
+    try:
+        yield
+    finally:
+        await stop_watcher()
+        await close_provider()
 
 
 def create_app() -> FastAPI:
@@ -10,7 +27,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="AI Chat Assistant API",
         version="0.1.0",
-        description="PR-01: モノレポ基盤用の FastAPI スタブ"
+        description="PR-01: モノレポ基盤用の FastAPI スタブ",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
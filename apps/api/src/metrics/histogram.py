@@ -0,0 +1,166 @@
+"""Fixed-memory sliding-window latency histograms."""
+
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from typing import Callable, Iterable, Sequence
+
+# Log-spaced buckets: bucket i covers [MIN_MS * GROWTH**i, MIN_MS * GROWTH**(i+1)),
+# so quantiles carry at most ~4% relative error from 0.1ms up to 10 minutes.
+MIN_MS = 0.1
+MAX_MS = 600_000.0
+GROWTH = 1.08
+_INV_LOG_GROWTH = 1 / math.log(GROWTH)
+BUCKETS = int(math.log(MAX_MS / MIN_MS) * _INV_LOG_GROWTH) + 2
+
+
+def bucket_index(value_ms: float) -> int:
+    if value_ms <= MIN_MS:
+        return 0
+    return min(int(math.log(value_ms / MIN_MS) * _INV_LOG_GROWTH) + 1, BUCKETS - 1)
+
+
+def bucket_value(index: int) -> float:
+    """Representative (geometric mid-point) value of a bucket in milliseconds."""
+
+    if index == 0:
+        return MIN_MS
+    return MIN_MS * GROWTH ** (index - 0.5)
+
+
+def quantiles(counts: Iterable[int], qs: Sequence[float]) -> list[float]:
+    """Return the value at each quantile in *qs* (ascending) from bucket *counts*."""
+
+    counts = list(counts)
+    total = sum(counts)
+    result: list[float] = []
+    if total == 0:
+        return [0.0 for _ in qs]
+    targets = [max(1, math.ceil(q * total)) for q in qs]
+    seen = 0
+    position = 0
+    for index, count in enumerate(counts):
+        seen += count
+        while position < len(targets) and seen >= targets[position]:
+            result.append(bucket_value(index))
+            position += 1
+        if position == len(targets):
+            break
+    return result
+
+
+class WindowedHistogram:
+    """Request latency histograms over a sliding window of time slices.
+
+    The window is split into ``slices`` slots of ``slice_seconds`` each. A
+    slot is zeroed in place when the clock enters it again, so memory is
+    fixed at construction and :meth:`record` only increments preallocated
+    counters. Reads merge the slots that still fall inside the requested
+    window.
+
+    The counters live in ``array`` buffers, or in *buffer* (for example a
+    slice of a shared memory mapping) when one is given. A zeroed buffer is
+    an empty histogram: slice epochs are stored plus one.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_seconds: int,
+        slice_seconds: int,
+        clock: Callable[[], float] = time.monotonic,
+        buffer: memoryview | None = None,
+    ) -> None:
+        self.slice_seconds = max(slice_seconds, 1)
+        self.slices = max(window_seconds // self.slice_seconds, 1)
+        self._clock = clock
+        self._zeros = array("I", [0]) * BUCKETS
+        if buffer is None:
+            self._epochs = array("q", [0]) * self.slices
+            self._requests = array("Q", [0]) * self.slices
+            self._cache_hits = array("Q", [0]) * self.slices
+            self._tokens = array("Q", [0]) * self.slices
+            self._durations = array("I", [0]) * (self.slices * BUCKETS)
+            self._ttfb = array("I", [0]) * (self.slices * BUCKETS)
+            return
+        if len(buffer) < self.buffer_size(window_seconds=window_seconds, slice_seconds=slice_seconds):
+            raise ValueError("buffer is too small for this window")
+        wide = self.slices * 8
+        narrow = self.slices * BUCKETS * 4
+        self._epochs = buffer[0:wide].cast("q")
+        self._requests = buffer[wide : 2 * wide].cast("Q")
+        self._cache_hits = buffer[2 * wide : 3 * wide].cast("Q")
+        self._tokens = buffer[3 * wide : 4 * wide].cast("Q")
+        self._durations = buffer[4 * wide : 4 * wide + narrow].cast("I")
+        self._ttfb = buffer[4 * wide + narrow : 4 * wide + 2 * narrow].cast("I")
+
+    @staticmethod
+    def buffer_size(*, window_seconds: int, slice_seconds: int) -> int:
+        """Bytes a *buffer* needs for this window geometry."""
+
+        slices = max(window_seconds // max(slice_seconds, 1), 1)
+        return slices * (4 * 8 + 2 * BUCKETS * 4)
+
+    @property
+    def window_seconds(self) -> int:
+        return self.slices * self.slice_seconds
+
+    def _slot(self, now: float) -> int:
+        epoch = int(now // self.slice_seconds)
+        slot = epoch % self.slices
+        if self._epochs[slot] != epoch + 1:
+            base = slot * BUCKETS
+            self._durations[base : base + BUCKETS] = self._zeros
+            self._ttfb[base : base + BUCKETS] = self._zeros
+            self._requests[slot] = 0
+            self._cache_hits[slot] = 0
+            self._tokens[slot] = 0
+            self._epochs[slot] = epoch + 1
+        return slot
+
+    def record(self, duration_ms: float, ttfb_ms: float, tokens: int, cache_hit: bool) -> None:
+        slot = self._slot(self._clock())
+        base = slot * BUCKETS
+        self._durations[base + bucket_index(duration_ms)] += 1
+        self._ttfb[base + bucket_index(ttfb_ms)] += 1
+        self._requests[slot] += 1
+        self._tokens[slot] += tokens
+        if cache_hit:
+            self._cache_hits[slot] += 1
+
+    def summary(self, window_seconds: int | None = None) -> dict[str, object]:
+        """Percentiles, throughput and cache-hit ratio over the last *window_seconds*."""
+
+        now_epoch = int(self._clock() // self.slice_seconds)
+        slices = self.slices
+        if window_seconds is not None:
+            slices = min(max(math.ceil(window_seconds / self.slice_seconds), 1), self.slices)
+        oldest = now_epoch - slices + 1
+        durations = [0] * BUCKETS
+        ttfb = [0] * BUCKETS
+        requests = cache_hits = tokens = 0
+        for slot in range(self.slices):
+            epoch = self._epochs[slot] - 1
+            if epoch < oldest or epoch > now_epoch:
+                continue
+            base = slot * BUCKETS
+            for index in range(BUCKETS):
+                durations[index] += self._durations[base + index]
+                ttfb[index] += self._ttfb[base + index]
+            requests += self._requests[slot]
+            cache_hits += self._cache_hits[slot]
+            tokens += self._tokens[slot]
+        span = slices * self.slice_seconds
+        p50, p90, p99 = quantiles(durations, (0.5, 0.9, 0.99))
+        t50, t90, t99 = quantiles(ttfb, (0.5, 0.9, 0.99))
+        return {
+            "windowSeconds": span,
+            "count": requests,
+            "throughputRps": round(requests / span, 4),
+            "cacheHitRatio": round(cache_hits / requests, 4) if requests else 0.0,
+            "tokens": tokens,
+            "durationMs": {"p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2)},
+            "ttfbMs": {"p50": round(t50, 2), "p90": round(t90, 2), "p99": round(t99, 2)},
+        }
@@ -0,0 +1,224 @@
+"""Pre-aggregated Prometheus metrics and text exposition (format 0.0.4)."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Iterable, Sequence, TypeVar
+
+if TYPE_CHECKING:
+    from .shared import SeriesTable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+JOB_BUCKETS_S = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+Labels = tuple[str, ...]
+
+
+class LocalCells:
+    """Values of every label set of one metric, kept in this process.
+
+    A label set owns a fixed number of cells: one for counters and gauges,
+    bucket counts plus the sum for histograms. :class:`~.shared.SharedCells`
+    keeps them in a memory mapping all server workers share instead.
+    """
+
+    def __init__(self) -> None:
+        self._series: dict[Labels, list[float]] = {}
+
+    def add(self, labels: Labels, size: int, updates: Iterable[tuple[int, float]]) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * size
+        for index, amount in updates:
+            series[index] += amount
+
+    def set(self, labels: Labels, size: int, index: int, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * size
+        series[index] = value
+
+    def read(self, labels: Labels, size: int) -> list[float] | None:
+        series = self._series.get(labels)
+        return None if series is None else list(series[:size])
+
+    def samples(self, size: int) -> list[tuple[Labels, list[float]]]:
+        return [(labels, list(series[:size])) for labels, series in sorted(self._series.items())]
+
+
+class _Metric:
+    kind = "untyped"
+    size = 1
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.cells = LocalCells()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> Iterable[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.cells.add(labels, 1, ((0, amount),))
+
+    def value(self, *labels: str) -> float:
+        series = self.cells.read(labels, 1)
+        return 0 if series is None else series[0]
+
+    def samples(self) -> list[tuple[Labels, float]]:
+        return [(labels, series[0]) for labels, series in self.cells.samples(1)]
+
+    def render(self) -> Iterable[str]:
+        yield from self._header()
+        for labels, value in self.samples():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self.cells.set(labels, 1, 0, value)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; counts are kept per bucket and summed at render time."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = LATENCY_BUCKETS_S,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf count, sum]
+        self.size = len(self.buckets) + 2
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        self.cells.add(labels, self.size, ((index, 1), (self.size - 1, value)))
+
+    def count(self, *labels: str) -> int:
+        series = self.cells.read(labels, self.size)
+        return 0 if series is None else int(sum(series[:-1]))
+
+    def render(self) -> Iterable[str]:
+        yield from self._header()
+        bounds = [*self.buckets, float("inf")]
+        for labels, series in self.cells.samples(self.size):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {_number(cumulative)}"
+            suffix = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {_number(series[-1])}"
+            yield f"{self.name}_count{suffix} {_number(cumulative)}"
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """Metrics rendered by ``GET /metrics``.
+
+    Like the other in-process stores, metrics are only updated from the event
+    loop and need no locking. After :meth:`share`, values live in a segment
+    every server worker maps, so any worker's scrape covers all of them.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def share(self, table: SeriesTable) -> None:
+        """Keep the values of every registered metric in *table* from now on."""
+
+        from .shared import SharedCells
+
+        for metric in self._metrics:
+            metric.cells = SharedCells(table, metric.name, metric.cells)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+)
+HTTP_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time until the last response body chunk was sent.",
+        ("method", "route"),
+    )
+)
+HTTP_TTFB = REGISTRY.register(
+    Histogram("http_request_ttfb_seconds", "Time until the response started.", ("method", "route"))
+)
+CHAT_TOKENS = REGISTRY.register(Counter("chat_tokens_total", "Tokens streamed to clients.", ("route",)))
+CACHE_HITS = REGISTRY.register(
+    Counter("chat_cache_hits_total", "Responses served from the completion cache.", ("route",))
+)
+SSE_ACTIVE = REGISTRY.register(Gauge("sse_active_streams", "Open Server-Sent Events responses.", ("route",)))
+STREAM_CANCELLATIONS = REGISTRY.register(
+    Counter(
+        "sse_stream_cancellations_total",
+        "Streams whose client disconnected or whose work was abandoned.",
+        ("route", "reason"),
+    )
+)
+PYTEST_DURATION = REGISTRY.register(
+    Histogram(
+        "pytest_job_duration_seconds",
+        "Wall time of pytest runs started by the tools endpoint.",
+        ("stage", "outcome"),
+        buckets=JOB_BUCKETS_S,
+    )
+)
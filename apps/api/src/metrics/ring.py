@@ -0,0 +1,154 @@
+"""Preallocated columnar ring buffer of per-request metrics."""
+
+from __future__ import annotations
+
+import time
+from array import array
+from datetime import datetime, timezone
+
+_CACHE_HIT = 0x01
+_MAX_METHODS = 256
+
+# Routes beyond the interning limit share this id, so unknown routes cannot
+# grow the string table; their records and raw paths stay in the global ring.
+OTHER_PATH = "<other>"
+OTHER_METHOD = "OTHER"
+
+# method, path, duration_ms, ttfb_ms, tokens, cache_hit, ISO timestamp
+MetricRow = tuple[str, str, float, float, int, bool, str]
+
+
+class MetricRing:
+    """Request metrics stored column by column in ``array`` buffers.
+
+    Every record takes ~42 bytes (two doubles, token count, flag and method
+    bytes, interned route id, monotonic-ns timestamp, raw-path slot) and
+    nothing is allocated per request. Records are interned by route template
+    (``/graph/symbols/{symbol_id}/source``), which keeps the string table to
+    the app's routes; the raw request path is kept in its own column only
+    when it differs from the template. Besides the global ring, every
+    interned route keeps a ring of the global sequence numbers of its own
+    records, so ``latest(path=<route>)`` touches at most ``limit`` entries no
+    matter how busy other routes are. Any other path is matched by scanning
+    the global ring.
+    """
+
+    def __init__(self, *, capacity: int, per_path: int, max_paths: int) -> None:
+        self.capacity = max(capacity, 1)
+        self.per_path = max(min(per_path, self.capacity), 1)
+        self.max_paths = max(max_paths, 1)
+        self.total = 0
+        self._duration = array("d", [0.0]) * self.capacity
+        self._ttfb = array("d", [0.0]) * self.capacity
+        self._tokens = array("I", [0]) * self.capacity
+        self._flags = array("B", [0]) * self.capacity
+        self._method = array("B", [0]) * self.capacity
+        self._path = array("I", [0]) * self.capacity
+        self._raw_path: list[str | None] = [None] * self.capacity
+        self._mono_ns = array("q", [0]) * self.capacity
+        self._wall_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._methods: list[str] = []
+        self._method_ids: dict[str, int] = {}
+        self._paths: list[str] = []
+        self._path_ids: dict[str, int] = {}
+        self._path_seqs: list[array[int]] = []
+        self._path_counts: list[int] = []
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _method_id(self, method: str) -> int:
+        method_id = self._method_ids.get(method)
+        if method_id is None:
+            # one byte per record; servers only ever see a handful of methods
+            if len(self._methods) >= _MAX_METHODS - 1 and method != OTHER_METHOD:
+                return self._method_id(OTHER_METHOD)
+            method_id = self._method_ids[method] = len(self._methods)
+            self._methods.append(method)
+        return method_id
+
+    def _path_id(self, path: str) -> int:
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            if len(self._paths) >= self.max_paths and path != OTHER_PATH:
+                return self._path_id(OTHER_PATH)
+            path_id = self._path_ids[path] = len(self._paths)
+            self._paths.append(path)
+            self._path_seqs.append(array("q", [0]) * self.per_path)
+            self._path_counts.append(0)
+        return path_id
+
+    def append(
+        self,
+        method: str,
+        path: str,
+        duration_ms: float,
+        ttfb_ms: float,
+        tokens: int,
+        cache_hit: bool,
+        route: str | None = None,
+    ) -> None:
+        seq = self.total
+        slot = seq % self.capacity
+        path_id = self._path_id(path if route is None else route)
+        self._raw_path[slot] = None if self._paths[path_id] == path else path
+        self._duration[slot] = duration_ms
+        self._ttfb[slot] = ttfb_ms
+        self._tokens[slot] = min(max(tokens, 0), 0xFFFFFFFF)
+        self._flags[slot] = _CACHE_HIT if cache_hit else 0
+        self._method[slot] = self._method_id(method)
+        self._path[slot] = path_id
+        self._mono_ns[slot] = time.monotonic_ns()
+        count = self._path_counts[path_id]
+        self._path_seqs[path_id][count % self.per_path] = seq
+        self._path_counts[path_id] = count + 1
+        self.total = seq + 1
+
+    def _path_of(self, slot: int) -> str:
+        raw = self._raw_path[slot]
+        return self._paths[self._path[slot]] if raw is None else raw
+
+    def _latest_seqs(self, limit: int, path: str | None) -> list[int]:
+        oldest = self.total - self.capacity
+        newest_first = range(self.total - 1, max(oldest, 0) - 1, -1)
+        if path is None:
+            return list(newest_first[:limit])
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            # a concrete path such as /graph/symbols/<id>/source
+            result: list[int] = []
+            for seq in newest_first:
+                if self._raw_path[seq % self.capacity] == path:
+                    result.append(seq)
+                    if len(result) >= limit:
+                        break
+            return result
+        seqs = self._path_seqs[path_id]
+        count = self._path_counts[path_id]
+        result: list[int] = []
+        for index in range(count - 1, max(count - self.per_path, 0) - 1, -1):
+            seq = seqs[index % self.per_path]
+            if seq < oldest or len(result) >= limit:
+                break
+            result.append(seq)
+        return result
+
+    def latest(self, limit: int, path: str | None = None) -> list[MetricRow]:
+        """Newest first; only the *limit* returned rows are materialised."""
+
+        rows: list[MetricRow] = []
+        for seq in self._latest_seqs(limit, path):
+            slot = seq % self.capacity
+            wall_ns = self._mono_ns[slot] + self._wall_offset_ns
+            rows.append(
+                (
+                    self._methods[self._method[slot]],
+                    self._path_of(slot),
+                    self._duration[slot],
+                    self._ttfb[slot],
+                    self._tokens[slot],
+                    bool(self._flags[slot] & _CACHE_HIT),
+                    datetime.fromtimestamp(wall_ns / 1e9, tz=timezone.utc).isoformat(),
+                )
+            )
+        return rows
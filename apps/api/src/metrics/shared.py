@@ -0,0 +1,371 @@
+"""Request metrics, counters and histograms in a memory-mapped file shared by all server workers."""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from .prometheus import Labels, LocalCells
+from .ring import MetricRow
+
+try:  # optional dependency, POSIX only
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AICMETR2"
+# magic, layout version, capacity, record size, series slots, window slots,
+# window bytes, write counter
+_HEADER = struct.Struct("<8sIIIIIIq")
+_COUNTER = struct.Struct("<q")
+_SEQ = _COUNTER
+_COUNTER_OFFSET = _HEADER.size - _COUNTER.size
+HEADER_SIZE = 64
+LAYOUT_VERSION = 2
+
+METHOD_BYTES = 8
+PATH_BYTES = 96
+# seq + 1 (0 = empty), wall-clock ns, duration ms, ttfb ms, tokens, flags,
+# method, raw path, route template (empty when equal to the path)
+_RECORD = struct.Struct(f"<qqddIB{METHOD_BYTES}s{PATH_BYTES}s{PATH_BYTES}s3x")
+
+_CACHE_HIT = 0x01
+
+# series slot: key length (0 = free), key bytes, then the cells
+_KEY_LENGTH = struct.Struct("<I")
+KEY_BYTES = 188
+_SLOT_HEADER = _KEY_LENGTH.size + KEY_BYTES
+# float64 cells per Prometheus series: enough for a histogram with 30 buckets
+SERIES_CELLS = 32
+_LABEL_SEPARATOR = "\0"
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def segment_file(path: str, capacity: int, series_slots: int, window_slots: int, window_bytes: int) -> str:
+    """File name for one segment layout.
+
+    The layout is part of the name, so workers started with another
+    configuration (during a rolling deploy, say) map a file of their own
+    instead of resizing one that older workers still have mapped.
+    """
+
+    return f"{path}.v{LAYOUT_VERSION}-{capacity}-{series_slots}-{window_slots}x{window_bytes}"
+
+
+class SeriesTable:
+    """Keyed slots of ``cell_bytes`` each inside a :class:`SharedMetricSegment`.
+
+    A slot is claimed for a key the first time any worker uses it and is
+    never freed, so claimed slots are contiguous from the start. Claims run
+    under the segment lock and every worker caches the slots it looked up.
+    Keys longer than ``KEY_BYTES`` bytes, or keys arriving after all slots
+    are taken, get no slot; callers keep those per process.
+    """
+
+    def __init__(self, segment: SharedMetricSegment, offset: int, slots: int, cell_bytes: int) -> None:
+        self.segment = segment
+        self.offset = offset
+        self.slots = slots
+        self.cell_bytes = cell_bytes
+        self.slot_size = _SLOT_HEADER + _aligned(cell_bytes)
+        self._claimed: dict[bytes, memoryview | None] = {}
+
+    @property
+    def size(self) -> int:
+        return self.slots * self.slot_size
+
+    def _key_at(self, start: int, length: int) -> memoryview:
+        return self.segment.view[start + _KEY_LENGTH.size : start + _KEY_LENGTH.size + length]
+
+    def _cells_at(self, start: int) -> memoryview:
+        return self.segment.view[start + _SLOT_HEADER : start + _SLOT_HEADER + self.cell_bytes]
+
+    def cells(self, key: str) -> memoryview | None:
+        """Return the cell bytes of *key*, claiming a free slot on first use."""
+
+        encoded = key.encode("utf-8")
+        if encoded in self._claimed:
+            return self._claimed[encoded]
+        view: memoryview | None = None
+        if len(encoded) <= KEY_BYTES:
+            with self.segment.locked():
+                for slot in range(self.slots):
+                    start = self.offset + slot * self.slot_size
+                    length = _KEY_LENGTH.unpack_from(self.segment.view, start)[0]
+                    if length == 0:
+                        # key first, length last: a claimed slot always has its whole key
+                        self._key_at(start, len(encoded))[:] = encoded
+                        _KEY_LENGTH.pack_into(self.segment.view, start, len(encoded))
+                    elif self._key_at(start, length) != encoded:
+                        continue
+                    view = self._cells_at(start)
+                    break
+        # a key that found no slot never will: slots are never freed
+        self._claimed[encoded] = view
+        return view
+
+    def items(self, prefix: str = "") -> Iterator[tuple[str, memoryview]]:
+        """Claimed ``(key, cells)`` pairs whose key starts with *prefix*."""
+
+        wanted = prefix.encode("utf-8")
+        for slot in range(self.slots):
+            start = self.offset + slot * self.slot_size
+            length = _KEY_LENGTH.unpack_from(self.segment.view, start)[0]
+            if length == 0:
+                return
+            key = bytes(self._key_at(start, length))
+            if key.startswith(wanted):
+                yield key.decode("utf-8"), self._cells_at(start)
+
+
+class SharedCells(LocalCells):
+    """Prometheus metric values kept in a :class:`SeriesTable`.
+
+    Label sets that get no slot, and values recorded before the metric was
+    shared, stay in this process as with :class:`LocalCells`.
+    """
+
+    def __init__(self, table: SeriesTable, name: str, local: LocalCells) -> None:
+        super().__init__()
+        self._series.update(local._series)
+        self._table = table
+        self._prefix = name + _LABEL_SEPARATOR
+        self._views: dict[Labels, memoryview | None] = {}
+
+    def _cells(self, labels: Labels, size: int) -> memoryview | None:
+        if labels in self._views:
+            return self._views[labels]
+        view = None
+        if size * 8 <= self._table.cell_bytes and not any(_LABEL_SEPARATOR in label for label in labels):
+            raw = self._table.cells(self._prefix + _LABEL_SEPARATOR.join(labels))
+            if raw is not None:
+                view = raw[: size * 8].cast("d")
+        self._views[labels] = view
+        return view
+
+    def add(self, labels: Labels, size: int, updates: Iterable[tuple[int, float]]) -> None:
+        with self._table.segment.locked():
+            cells = self._cells(labels, size)
+            if cells is None:
+                super().add(labels, size, updates)
+                return
+            for index, amount in updates:
+                cells[index] += amount
+
+    def set(self, labels: Labels, size: int, index: int, value: float) -> None:
+        with self._table.segment.locked():
+            cells = self._cells(labels, size)
+            if cells is None:
+                super().set(labels, size, index, value)
+                return
+            cells[index] = value
+
+    def read(self, labels: Labels, size: int) -> list[float] | None:
+        with self._table.segment.locked():
+            cells = self._cells(labels, size)
+            if cells is None:
+                return super().read(labels, size)
+            return cells.tolist()
+
+    def samples(self, size: int) -> list[tuple[Labels, list[float]]]:
+        merged = dict(super().samples(size))
+        with self._table.segment.locked():
+            for key, raw in self._table.items(self._prefix):
+                suffix = key[len(self._prefix) :]
+                labels = tuple(suffix.split(_LABEL_SEPARATOR)) if suffix else ()
+                merged[labels] = raw[: size * 8].cast("d").tolist()
+        return sorted(merged.items())
+
+
+class SharedMetricSegment:
+    """Request records and metric series in a ``MAP_SHARED`` file mapping.
+
+    Every worker process maps the same file. Appends take a short exclusive
+    ``lockf`` lock to claim the next slot and bump the write counter; reads
+    take no lock at all. The sequence number leads each record and is the
+    first thing a writer overwrites, so a record is accepted only if that
+    field still holds the expected value after the record was copied.
+    Paths longer than ``PATH_BYTES`` bytes are truncated.
+
+    Two :class:`SeriesTable` regions follow the records: ``series`` for the
+    Prometheus counters and histograms, ``windows`` for the sliding-window
+    SLO histograms. Their read-modify-write updates hold the same lock.
+
+    The file name encodes the layout (see :func:`segment_file`); an existing
+    file with another layout is refused rather than reinitialised, since
+    other workers may still have it mapped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int,
+        *,
+        series_slots: int = 256,
+        window_slots: int = 0,
+        window_bytes: int = 0,
+    ) -> None:
+        if fcntl is None:  # pragma: no cover - depends on the platform
+            raise RuntimeError("shared metrics need fcntl (POSIX)")
+        self.capacity = max(capacity, 1)
+        series_slots = max(series_slots, 0)
+        window_slots = max(window_slots, 0) if window_bytes > 0 else 0
+        self.path = segment_file(path, self.capacity, series_slots, window_slots, window_bytes)
+        self._depth = 0
+        records_end = HEADER_SIZE + self.capacity * _RECORD.size
+        self.series = SeriesTable(self, _aligned(records_end), series_slots, SERIES_CELLS * 8)
+        self.windows = SeriesTable(self, self.series.offset + self.series.size, window_slots, window_bytes)
+        size = self.windows.offset + self.windows.size
+        header = _HEADER.pack(
+            MAGIC, LAYOUT_VERSION, self.capacity, _RECORD.size, series_slots, window_slots, window_bytes, 0
+        )
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self.locked():
+                self._prepare(header, size)
+                self._map = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self.view = memoryview(self._map)
+
+    def _prepare(self, header: bytes, size: int) -> None:
+        """Initialise a new file or check that an existing one has this layout."""
+
+        existing_size = os.fstat(self._fd).st_size
+        if existing_size == 0:
+            os.ftruncate(self._fd, size)
+            os.pwrite(self._fd, header, 0)
+            return
+        existing = os.pread(self._fd, _COUNTER_OFFSET, 0)
+        if existing_size != size or existing != header[:_COUNTER_OFFSET]:
+            raise RuntimeError(f"{self.path} holds a different metrics layout")
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the exclusive segment lock; nested use takes it only once."""
+
+        if self._depth == 0:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def total(self) -> int:
+        return _COUNTER.unpack_from(self._map, _COUNTER_OFFSET)[0]
+
+    def _offset(self, seq: int) -> int:
+        return HEADER_SIZE + (seq % self.capacity) * _RECORD.size
+
+    def append(
+        self,
+        method: str,
+        path: str,
+        duration_ms: float,
+        ttfb_ms: float,
+        tokens: int,
+        cache_hit: bool,
+        route: str | None = None,
+    ) -> None:
+        method_bytes = method.encode("ascii", "replace")
+        path_bytes = path.encode("utf-8")
+        route_bytes = b"" if route is None or route == path else route.encode("utf-8")
+        flags = _CACHE_HIT if cache_hit else 0
+        now_ns = time.time_ns()
+        tokens = min(max(tokens, 0), 0xFFFFFFFF)
+        with self.locked():
+            seq = self.total
+            _RECORD.pack_into(
+                self._map,
+                self._offset(seq),
+                seq + 1,
+                now_ns,
+                duration_ms,
+                ttfb_ms,
+                tokens,
+                flags,
+                method_bytes,
+                path_bytes,
+                route_bytes,
+            )
+            _COUNTER.pack_into(self._map, _COUNTER_OFFSET, seq + 1)
+
+    def latest(self, limit: int, path: str | None = None) -> list[MetricRow]:
+        """Newest first across every worker; scans back until *limit* rows match.
+
+        *path* matches either the raw request path or the route template.
+        """
+
+        wanted = None if path is None else path.encode("utf-8")[:PATH_BYTES]
+        total = self.total
+        rows: list[MetricRow] = []
+        for seq in range(total - 1, max(total - self.capacity, 0) - 1, -1):
+            offset = self._offset(seq)
+            record = _RECORD.unpack_from(self._map, offset)
+            if record[0] != seq + 1 or _SEQ.unpack_from(self._map, offset)[0] != seq + 1:
+                break  # overwritten by a writer that lapped the reader
+            path_bytes = record[7].rstrip(b"\0")
+            if wanted is not None and path_bytes != wanted and record[8].rstrip(b"\0") != wanted:
+                continue
+            rows.append(
+                (
+                    record[6].rstrip(b"\0").decode("ascii", "replace"),
+                    path_bytes.decode("utf-8", "replace"),
+                    record[2],
+                    record[3],
+                    record[4],
+                    bool(record[5] & _CACHE_HIT),
+                    datetime.fromtimestamp(record[1] / 1e9, tz=timezone.utc).isoformat(),
+                )
+            )
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def close(self) -> None:
+        self.view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # series views still in use keep the mapping alive until collected
+        os.close(self._fd)
+
+
+def open_shared_segment(
+    path: str,
+    capacity: int,
+    *,
+    series_slots: int = 256,
+    window_slots: int = 0,
+    window_bytes: int = 0,
+) -> SharedMetricSegment | None:
+    try:
+        return SharedMetricSegment(
+            path,
+            capacity,
+            series_slots=series_slots,
+            window_slots=window_slots,
+            window_bytes=window_bytes,
+        )
+    except (OSError, RuntimeError) as exc:
+        logger.warning("shared metrics segment %s unavailable (%s); using per-process metrics", path, exc)
+        return None
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from collections import deque
-from dataclasses import asdict, dataclass
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Iterable
 
+from ..settings import env_int, env_str
+from .histogram import WindowedHistogram
+from .prometheus import REGISTRY, STREAM_CANCELLATIONS
+from .ring import MetricRing
+from .shared import SharedMetricSegment, open_shared_segment
 
-@dataclass
+
+@dataclass(slots=True)
 class MetricRecord:
     method: str
     path: str
@@ -14,29 +19,164 @@ class MetricRecord:
     tokens: int
     cache_hit: bool
     timestamp: str
+    ttfb_ms: float = 0.0
 
     def as_dict(self) -> dict[str, str | float | int | bool]:
-        return asdict(self)
+        return {
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": self.duration_ms,
+            "tokens": self.tokens,
+            "cache_hit": self.cache_hit,
+            "timestamp": self.timestamp,
+            "ttfb_ms": self.ttfb_ms,
+        }
+
+
+# ~42 bytes per request: the default keeps 200k requests in under 9 MB, plus
+# the raw paths of requests to parameterised or unmatched routes
+METRICS_HISTORY = env_int("METRICS_HISTORY", 200_000)
+METRICS_HISTORY_PER_PATH = env_int("METRICS_HISTORY_PER_PATH", 1024)
+# records are indexed by route template, so this only needs to cover the app's routes
+METRICS_MAX_PATHS = env_int("METRICS_MAX_PATHS", 1024)
+# With several workers (uvicorn --workers, gunicorn) point this at a file
+# such as /dev/shm/ai-chat-metrics; the request history, the SLO summary,
+# cancellation counts and GET /metrics then cover every worker. The file name
+# gets a layout suffix, so differently configured workers never share one.
+METRICS_SHARED_PATH = env_str("METRICS_SHARED_PATH", "")
+METRICS_SHARED_CAPACITY = env_int("METRICS_SHARED_CAPACITY", 65_536)
+# Prometheus label sets kept in the shared file; later ones stay per worker
+METRICS_SHARED_SERIES = env_int("METRICS_SHARED_SERIES", 1024)
 
+METRICS_WINDOW_S = env_int("METRICS_WINDOW_S", 300)
+METRICS_SLICE_S = env_int("METRICS_SLICE_S", 10)
+# series are keyed by route template and 404s share one, so this is only a backstop
+METRICS_MAX_SERIES = env_int("METRICS_MAX_SERIES", 256)
+UNMATCHED_ROUTE = "<unmatched>"
+_SERIES: dict[tuple[str, str], WindowedHistogram] = {}
+
+
+def _open_shared() -> SharedMetricSegment | None:
+    if not METRICS_SHARED_PATH:
+        return None
+    shared = open_shared_segment(
+        METRICS_SHARED_PATH,
+        METRICS_SHARED_CAPACITY,
+        series_slots=METRICS_SHARED_SERIES,
+        window_slots=METRICS_MAX_SERIES,
+        window_bytes=WindowedHistogram.buffer_size(window_seconds=METRICS_WINDOW_S, slice_seconds=METRICS_SLICE_S),
+    )
+    if shared is not None:
+        REGISTRY.share(shared.series)
+    return shared
 
-_MAX_RECORDS = 50
-_STORE: deque[MetricRecord] = deque(maxlen=_MAX_RECORDS)
+
+_SHARED = _open_shared()
+_STORE: MetricRing | SharedMetricSegment = _SHARED or MetricRing(
+    capacity=METRICS_HISTORY,
+    per_path=METRICS_HISTORY_PER_PATH,
+    max_paths=METRICS_MAX_PATHS,
+)
+
+
+def locked() -> AbstractContextManager[None]:
+    """Hold the shared segment lock, so one request's updates take it only once."""
+
+    return nullcontext() if _SHARED is None else _SHARED.locked()
+
+
+def record_request(
+    *,
+    method: str,
+    path: str,
+    duration_ms: float,
+    ttfb_ms: float,
+    tokens: int,
+    cache_hit: bool,
+    route: str | None = None,
+) -> None:
+    """Append one request to the history ring without building a record.
+
+    *route* is the matched route template the ring indexes the record under;
+    it defaults to *path*.
+    """
+
+    _STORE.append(method, path, duration_ms, ttfb_ms, tokens, cache_hit, route)
 
 
 def add_metric(record: MetricRecord) -> None:
-    _STORE.append(record)
+    _STORE.append(record.method, record.path, record.duration_ms, record.ttfb_ms, record.tokens, record.cache_hit)
+
+
+def observe(
+    *,
+    method: str,
+    route: str,
+    duration_ms: float,
+    ttfb_ms: float,
+    tokens: int,
+    cache_hit: bool,
+) -> None:
+    """Add one request to the sliding-window histogram of its route template."""
+
+    with locked():
+        series = _series((method, route))
+        if series is None:
+            series = _series((method, UNMATCHED_ROUTE), overflow=True)
+        series.record(duration_ms, ttfb_ms, tokens, cache_hit)
+
+
+def _series(key: tuple[str, str], *, overflow: bool = False) -> WindowedHistogram | None:
+    """Histogram of *key*; ``None`` once the series cap is reached, unless *overflow*."""
+
+    series = _SERIES.get(key)
+    if series is not None or (len(_SERIES) >= METRICS_MAX_SERIES and not overflow):
+        return series
+    buffer = None if _SHARED is None else _SHARED.windows.cells(_window_key(*key))
+    if buffer is None and _SHARED is not None and not overflow:
+        return None  # every shared slot is taken
+    series = _SERIES[key] = WindowedHistogram(
+        window_seconds=METRICS_WINDOW_S, slice_seconds=METRICS_SLICE_S, buffer=buffer
+    )
+    return series
+
+
+def _window_key(method: str, route: str) -> str:
+    return f"{method} {route}"
+
+
+def summary(window_seconds: int | None = None, path: str | None = None) -> list[dict[str, object]]:
+    with locked():
+        if _SHARED is not None:
+            # pick up series that only other workers have recorded so far
+            for key, _ in _SHARED.windows.items():
+                method, _, route = key.partition(" ")
+                _series((method, route), overflow=True)
+        return [
+            {"method": method, "path": route, **series.summary(window_seconds)}
+            for (method, route), series in sorted(_SERIES.items())
+            if path is None or route == path
+        ]
+
+
+def record_cancellation(path: str, reason: str) -> None:
+    """Count a stream that stopped early: ``disconnected`` or ``abandoned``."""
+
+    STREAM_CANCELLATIONS.inc(path, reason)
+
+
+def cancellations() -> list[dict[str, str | int]]:
+    return [
+        {"path": path, "reason": reason, "count": int(count)}
+        for (path, reason), count in STREAM_CANCELLATIONS.samples()
+    ]
 
 
 def latest(limit: int = 10, path: str | None = None) -> list[MetricRecord]:
-    records: Iterable[MetricRecord] = reversed(_STORE)
-    if path:
-        records = (record for record in records if record.path == path)
-    result: list[MetricRecord] = []
-    for record in records:
-        result.append(record)
-        if len(result) >= limit:
-            break
-    return result
+    return [
+        MetricRecord(method, row_path, duration_ms, tokens, cache_hit, timestamp, ttfb_ms)
+        for method, row_path, duration_ms, ttfb_ms, tokens, cache_hit, timestamp in _STORE.latest(limit, path or None)
+    ]
 
 
 def create_record(
@@ -46,6 +186,7 @@ def create_record(
     duration_ms: float,
     tokens: int,
     cache_hit: bool,
+    ttfb_ms: float | None = None,
 ) -> MetricRecord:
     return MetricRecord(
         method=method,
@@ -54,4 +195,5 @@ def create_record(
         tokens=tokens,
         cache_hit=cache_hit,
         timestamp=datetime.now(timezone.utc).isoformat(),
+        ttfb_ms=duration_ms if ttfb_ms is None else ttfb_ms,
     )
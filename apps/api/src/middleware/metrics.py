@@ -2,37 +2,108 @@ from __future__ import annotations
 
 from time import perf_counter
 
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from ..metrics.store import add_metric, create_record
+from ..metrics.prometheus import (
+    CACHE_HITS,
+    CHAT_TOKENS,
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    HTTP_TTFB,
+    SSE_ACTIVE,
+)
+from ..metrics.store import UNMATCHED_ROUTE, locked, observe, record_request
 
 
-class RequestMetricsMiddleware(BaseHTTPMiddleware):
-    """各リクエストの SLO 指標を集計するミドルウェア。"""
+class RequestMetricsMiddleware:
+    """各リクエストの SLO 指標を集計する純粋な ASGI ミドルウェア。
+
+    送信メッセージを横取りするだけなので、リクエストごとの追加タスクや
+    キューは発生しない。TTFB はレスポンス開始まで、duration は最後の
+    body チャンク送信までを計測し、トークン数とキャッシュヒットは
+    ストリーミング完了時点の ``request.state`` から読む。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next) -> Response:
         start_time = perf_counter()
-        response = await call_next(request)
-        duration_ms = (perf_counter() - start_time) * 1000
-
-        tokens = int(getattr(request.state, "slo_tokens", 0) or 0)
-        cache_hit = bool(getattr(request.state, "slo_cache_hit", False))
-
-        record = create_record(
-            method=request.method,
-            path=request.url.path,
-            duration_ms=duration_ms,
-            tokens=tokens,
-            cache_hit=cache_hit,
-        )
-        add_metric(record)
-
-        response.headers["X-SLO-Duration-Ms"] = f"{duration_ms:.2f}"
-        response.headers["X-SLO-Tokens"] = str(tokens)
-        response.headers["X-SLO-Cache-Hit"] = "1" if cache_hit else "0"
-        return response
+        # Request.state is backed by this dict, so handlers write into it
+        state: dict[str, object] = scope.setdefault("state", {})
+        ttfb_ms: float | None = None
+        finished_at: float | None = None
+        status = 500
+        sse_route: str | None = None
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal ttfb_ms, finished_at, status, sse_route
+            if message["type"] == "http.response.start":
+                ttfb_ms = (perf_counter() - start_time) * 1000
+                status = message["status"]
+                tokens, cache_hit = _slo_state(state)
+                headers = MutableHeaders(scope=message)
+                headers.append("X-SLO-Duration-Ms", f"{ttfb_ms:.2f}")
+                headers.append("X-SLO-Tokens", str(tokens))
+                headers.append("X-SLO-Cache-Hit", "1" if cache_hit else "0")
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    sse_route = _route_template(scope)
+                    SSE_ACTIVE.inc(sse_route)
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished_at = perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            duration_ms = ((finished_at or perf_counter()) - start_time) * 1000
+            if ttfb_ms is None:
+                ttfb_ms = duration_ms
+            tokens, cache_hit = _slo_state(state)
+            route = _route_template(scope)
+            # one lock round trip for all updates when metrics are shared across workers
+            with locked():
+                record_request(
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=route,
+                    duration_ms=duration_ms,
+                    ttfb_ms=ttfb_ms,
+                    tokens=tokens,
+                    cache_hit=cache_hit,
+                )
+                if sse_route is not None:
+                    SSE_ACTIVE.dec(sse_route)
+                HTTP_REQUESTS.inc(scope["method"], route, str(status))
+                HTTP_DURATION.observe(duration_ms / 1000, scope["method"], route)
+                HTTP_TTFB.observe(ttfb_ms / 1000, scope["method"], route)
+                if tokens:
+                    CHAT_TOKENS.inc(route, amount=tokens)
+                if cache_hit:
+                    CACHE_HITS.inc(route)
+                observe(
+                    method=scope["method"],
+                    route=route,
+                    duration_ms=duration_ms,
+                    ttfb_ms=ttfb_ms,
+                    tokens=tokens,
+                    cache_hit=cache_hit,
+                )
+
+
+def _route_template(scope: Scope) -> str:
+    # FastAPI stores the matched route, so series are keyed by template
+    return getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+
+
+def _slo_state(state: dict[str, object]) -> tuple[int, bool]:
+    return int(state.get("slo_tokens", 0) or 0), bool(state.get("slo_cache_hit", False))
 
 
 def mark_tokens(request: Request, tokens: int) -> None:
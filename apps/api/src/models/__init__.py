@@ -1,8 +1,42 @@
-from .analysis import AnalysisResponseModel, DependencyEdgeModel, SymbolKind, SymbolModel
+from .analysis import (
+    AnalysisResponseModel,
+    ComponentsResponseModel,
+    DependencyEdgeModel,
+    EdgePageModel,
+    GraphChangesModel,
+    GraphDiffModel,
+    GraphStatusModel,
+    NeighborhoodResponseModel,
+    NeighborModel,
+    ScanStatsModel,
+    SymbolKind,
+    SymbolModel,
+    SymbolPageModel,
+    SymbolPathResponseModel,
+    SymbolSearchHitModel,
+    SymbolSearchResponseModel,
+    SymbolSourceModel,
+)
+from .chat import ChatStreamRequest, ConversationTurn
 
 __all__ = [
     "AnalysisResponseModel",
+    "ChatStreamRequest",
+    "ComponentsResponseModel",
+    "ConversationTurn",
     "DependencyEdgeModel",
+    "EdgePageModel",
+    "GraphChangesModel",
+    "GraphDiffModel",
+    "GraphStatusModel",
+    "NeighborhoodResponseModel",
+    "NeighborModel",
+    "ScanStatsModel",
     "SymbolKind",
     "SymbolModel",
+    "SymbolPageModel",
+    "SymbolPathResponseModel",
+    "SymbolSearchHitModel",
+    "SymbolSearchResponseModel",
+    "SymbolSourceModel",
 ]
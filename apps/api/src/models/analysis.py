@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
@@ -10,6 +10,7 @@ class SymbolKind(str, Enum):
     FUNCTION = "function"
     CLASS = "class"
     MODULE = "module"
+    VARIABLE = "variable"
     UNKNOWN = "unknown"
 
 
@@ -20,10 +21,17 @@ class SymbolModel(BaseModel):
     kind: SymbolKind
     line: int
     column: int
-    source: str
+    source: Optional[str] = None
     sourceStartLine: int = 1
 
 
+class SymbolSourceModel(BaseModel):
+    id: str
+    filePath: str
+    source: str
+    sourceStartLine: int
+
+
 class DependencyEdgeModel(BaseModel):
     source: str
     target: str
@@ -33,3 +41,92 @@ class DependencyEdgeModel(BaseModel):
 class AnalysisResponseModel(BaseModel):
     symbols: list[SymbolModel]
     edges: list[DependencyEdgeModel]
+
+
+class SymbolPageModel(BaseModel):
+    items: list[SymbolModel]
+    nextCursor: Optional[str] = None
+    version: int
+    total: int
+
+
+class EdgePageModel(BaseModel):
+    items: list[DependencyEdgeModel]
+    nextCursor: Optional[str] = None
+    version: int
+    total: int
+
+
+class SymbolSearchHitModel(BaseModel):
+    symbol: SymbolModel
+    score: float
+    match: Literal["exact", "prefix", "fuzzy"]
+
+
+class SymbolSearchResponseModel(BaseModel):
+    query: str
+    items: list[SymbolSearchHitModel]
+    version: int
+
+
+class NeighborModel(BaseModel):
+    symbol: SymbolModel
+    distance: int
+
+
+class NeighborhoodResponseModel(BaseModel):
+    center: str
+    direction: Literal["callers", "callees", "both"]
+    depth: int
+    nodes: list[NeighborModel]
+    edges: list[DependencyEdgeModel]
+    version: int
+
+
+class SymbolPathResponseModel(BaseModel):
+    source: str
+    target: str
+    found: bool
+    symbols: list[SymbolModel]
+    version: int
+
+
+class ComponentsResponseModel(BaseModel):
+    components: list[list[str]]
+    version: int
+
+
+class GraphDiffModel(BaseModel):
+    version: int
+    previousVersion: int
+    addedSymbols: list[SymbolModel]
+    removedSymbols: list[str]
+    addedEdges: list[DependencyEdgeModel]
+    removedEdges: list[DependencyEdgeModel]
+
+
+class GraphChangesModel(BaseModel):
+    version: int
+    resync: bool = False
+    diffs: list[GraphDiffModel]
+
+
+class ScanStatsModel(BaseModel):
+    files: int
+    directories: int
+    pruned: int
+    ignored: int
+    skipped: int
+    oversized: int
+    truncated: bool
+
+
+class GraphStatusModel(BaseModel):
+    version: int
+    watching: bool
+    backend: Optional[Literal["watchfiles", "poll"]] = None
+    refreshes: int = 0
+    lastRefreshAt: Optional[float] = None
+    symbols: int
+    edges: int
+    scan: ScanStatsModel
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+MAX_CONVERSATION_TURNS = 200
+MAX_TURN_CHARS = 32_000
+
+
+class ConversationTurn(BaseModel):
+    role: Literal["user", "assistant", "system"] = Field(..., description="発話者の役割")
+    content: str = Field(..., max_length=MAX_TURN_CHARS, description="メッセージ本文")
+
+
+class ChatStreamRequest(BaseModel):
+    sessionId: Optional[str] = Field(
+        default=None, max_length=128, description="継続する会話セッション ID (省略時は新規発行)"
+    )
+    conversation: list[ConversationTurn] = Field(
+        default_factory=list, max_length=MAX_CONVERSATION_TURNS, description="会話履歴"
+    )
+    model: Optional[str] = Field(default=None, max_length=128)
+    temperature: float = Field(default=0.0, ge=0.0, le=2.0)
+    maxTokens: int = Field(default=512, ge=1, le=8192)
@@ -0,0 +1,17 @@
+"""Chat completion providers."""
+
+from .base import ChatMessage, ChatProvider, CompletionRequest, ProviderError
+from .mock import MockProvider
+from .registry import close_provider, create_provider, get_provider, set_provider
+
+__all__ = [
+    "ChatMessage",
+    "ChatProvider",
+    "CompletionRequest",
+    "MockProvider",
+    "ProviderError",
+    "close_provider",
+    "create_provider",
+    "get_provider",
+    "set_provider",
+]
@@ -0,0 +1,51 @@
+"""Provider interface for streaming chat completions."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+
+@dataclass(frozen=True)
+class ChatMessage:
+    role: str
+    content: str
+
+
+@dataclass(frozen=True)
+class CompletionRequest:
+    """Provider-independent description of one completion."""
+
+    messages: tuple[ChatMessage, ...] = ()
+    model: str = ""
+    temperature: float = 0.0
+    max_tokens: int = 512
+
+
+class ProviderError(RuntimeError):
+    """Raised when a provider cannot produce (the rest of) a completion."""
+
+    def __init__(self, message: str, *, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ChatProvider(ABC):
+    """Streams completion tokens for a conversation.
+
+    Implementations return an async iterator that is consumed at the pace of
+    the slowest client connection (at most ``SSE_REPLAY_BUFFER`` frames ahead
+    of it, and as many tokens ahead in a coalesced generation), so a slow
+    reader naturally applies backpressure to the upstream stream instead of
+    tokens piling up in memory.
+    """
+
+    name: str = "provider"
+
+    @abstractmethod
+    def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        """Yield completion tokens in order."""
+
+    async def aclose(self) -> None:
+        """Release pooled resources such as HTTP connections."""
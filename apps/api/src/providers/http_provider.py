@@ -0,0 +1,125 @@
+"""OpenAI-compatible streaming provider over a pooled HTTP client."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from typing import AsyncIterator
+
+import httpx
+
+from .base import ChatProvider, CompletionRequest, ProviderError
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_DONE = object()
+
+
+def parse_stream_line(line: str) -> str | object | None:
+    """Return the content delta of one ``data:`` line, ``_DONE`` or ``None``."""
+
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return _DONE
+    try:
+        chunk = json.loads(data)
+        return chunk["choices"][0]["delta"].get("content") or None
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+class HttpChatProvider(ChatProvider):
+    """Stream ``POST {base_url}/chat/completions`` with ``stream: true``.
+
+    One ``httpx.AsyncClient`` is shared by all requests so connections are
+    kept alive and reused. Connection errors, timeouts and retryable status
+    codes are retried with jittered exponential backoff, but only until the
+    first token has been forwarded; after that a failure is surfaced to the
+    caller because replaying would duplicate output.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        api_key: str = "",
+        model: str = "",
+        timeout_s: float = 60.0,
+        connect_timeout_s: float = 5.0,
+        max_retries: int = 2,
+        backoff_s: float = 0.25,
+        max_connections: int = 100,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_retries = max(max_retries, 0)
+        self.backoff_s = backoff_s
+        self._headers = {"Accept": "text/event-stream"}
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        self._url = f"{self.base_url}/chat/completions"
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout_s, connect=connect_timeout_s),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    def _payload(self, request: CompletionRequest) -> dict[str, object]:
+        return {
+            "model": request.model or self.model,
+            "messages": [
+                {"role": message.role, "content": message.content}
+                for message in request.messages
+            ],
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+            "stream": True,
+        }
+
+    async def _backoff(self, attempt: int) -> None:
+        delay = self.backoff_s * (2 ** attempt)
+        await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        payload = self._payload(request)
+        attempt = 0
+        while True:
+            emitted = False
+            try:
+                async with self._client.stream(
+                    "POST", self._url, json=payload, headers=self._headers
+                ) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        raise ProviderError(
+                            f"provider returned HTTP {response.status_code}",
+                            retryable=response.status_code in RETRYABLE_STATUS,
+                        )
+                    async for line in response.aiter_lines():
+                        token = parse_stream_line(line)
+                        if token is _DONE:
+                            return
+                        if token:
+                            emitted = True
+                            yield token
+                    return
+            except (httpx.TransportError, ProviderError) as exc:
+                retryable = isinstance(exc, httpx.TransportError) or (
+                    isinstance(exc, ProviderError) and exc.retryable
+                )
+                if emitted or not retryable or attempt >= self.max_retries:
+                    if isinstance(exc, ProviderError):
+                        raise
+                    raise ProviderError(f"provider request failed: {exc!r}") from exc
+                await self._backoff(attempt)
+                attempt += 1
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,71 @@
+"""Deterministic in-process provider for local development and load tests."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+from .base import ChatProvider, CompletionRequest
+
+WELCOME_TOKENS = (
+    "AI",
+    " chat",
+    " assistant",
+    " へ",
+    " ようこそ",
+    "！",
+    "\n",
+    "ダミー",
+    " トークン",
+    " を",
+    " ストリーム",
+    " 中",
+    "...",
+)
+
+
+def mock_completion_tokens(request: CompletionRequest) -> list[str]:
+    """Return the tokens the mock replies with; identical input, identical output.
+
+    Without a user message the historical welcome sequence is returned,
+    otherwise the last user message is echoed word by word after a short
+    preamble, truncated to ``max_tokens``.
+    """
+
+    prompt = next(
+        (message.content for message in reversed(request.messages) if message.role == "user"),
+        None,
+    )
+    if prompt is None:
+        tokens = list(WELCOME_TOKENS)
+    else:
+        tokens = ["Mock", " reply", ":"]
+        tokens.extend(f" {word}" for word in prompt.split())
+    return tokens[: max(request.max_tokens, 0)]
+
+
+class MockProvider(ChatProvider):
+    """Emit :func:`mock_completion_tokens` at a configurable pace.
+
+    ``ttft_ms`` delays the first token and ``tokens_per_second`` spaces the
+    following ones. Tokens are scheduled against the loop clock rather than
+    with a fixed sleep per token, so slow consumers do not accumulate drift;
+    ``tokens_per_second <= 0`` disables pacing entirely.
+    """
+
+    name = "mock"
+
+    def __init__(self, *, tokens_per_second: float = 4.0, ttft_ms: float = 0.0) -> None:
+        self.tokens_per_second = tokens_per_second
+        self.ttft_ms = ttft_ms
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        deadline = loop.time() + max(self.ttft_ms, 0.0) / 1000
+        for token in mock_completion_tokens(request):
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield token
+            deadline += interval
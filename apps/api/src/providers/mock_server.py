@@ -0,0 +1,74 @@
+"""Standalone OpenAI-compatible mock completion server.
+
+Run it next to the API to exercise the real HTTP streaming path (connection
+pooling, timeouts, backpressure) without network access::
+
+    uvicorn src.providers.mock_server:app --port 9000
+    CHAT_PROVIDER=http CHAT_PROVIDER_BASE_URL=http://127.0.0.1:9000/v1 uvicorn src.main:app
+"""
+
+from __future__ import annotations
+
+import json
+from typing import AsyncIterator
+from uuid import uuid4
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from .base import ChatMessage, CompletionRequest
+from .mock import MockProvider
+from .registry import CHAT_MOCK_TOKENS_PER_SECOND, CHAT_MOCK_TTFT_MS
+
+
+def _completion_request(body: dict[str, object]) -> CompletionRequest:
+    messages = body.get("messages")
+    return CompletionRequest(
+        messages=tuple(
+            ChatMessage(role=str(item.get("role", "user")), content=str(item.get("content", "")))
+            for item in messages
+            if isinstance(item, dict)
+        )
+        if isinstance(messages, list)
+        else (),
+        model=str(body.get("model") or "mock"),
+        max_tokens=int(body.get("max_tokens") or 512),
+    )
+
+
+def create_mock_server(
+    *,
+    tokens_per_second: float = CHAT_MOCK_TOKENS_PER_SECOND,
+    ttft_ms: float = CHAT_MOCK_TTFT_MS,
+) -> Starlette:
+    provider = MockProvider(tokens_per_second=tokens_per_second, ttft_ms=ttft_ms)
+
+    async def chat_completions(request: Request) -> StreamingResponse | JSONResponse:
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": {"message": "invalid JSON body"}}, status_code=400)
+        if not isinstance(body, dict):
+            return JSONResponse({"error": {"message": "expected a JSON object"}}, status_code=400)
+        completion = _completion_request(body)
+        completion_id = f"chatcmpl-{uuid4().hex}"
+
+        async def events() -> AsyncIterator[str]:
+            async for token in provider.stream(completion):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": completion.model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+
+
+app = create_mock_server()
@@ -0,0 +1,60 @@
+"""Environment driven selection of the shared chat provider."""
+
+from __future__ import annotations
+
+from ..settings import env_float, env_int, env_str
+from .base import ChatProvider
+
+CHAT_PROVIDER = env_str("CHAT_PROVIDER", "mock").lower()
+CHAT_MOCK_TOKENS_PER_SECOND = env_float("CHAT_MOCK_TOKENS_PER_SECOND", 4.0)
+CHAT_MOCK_TTFT_MS = env_float("CHAT_MOCK_TTFT_MS", 0.0)
+CHAT_PROVIDER_BASE_URL = env_str("CHAT_PROVIDER_BASE_URL", "http://127.0.0.1:9000/v1")
+CHAT_PROVIDER_API_KEY = env_str("CHAT_PROVIDER_API_KEY", "")
+CHAT_PROVIDER_MODEL = env_str("CHAT_PROVIDER_MODEL", "mock")
+CHAT_PROVIDER_TIMEOUT_S = env_float("CHAT_PROVIDER_TIMEOUT_S", 60.0)
+CHAT_PROVIDER_MAX_RETRIES = env_int("CHAT_PROVIDER_MAX_RETRIES", 2)
+CHAT_PROVIDER_MAX_CONNECTIONS = env_int("CHAT_PROVIDER_MAX_CONNECTIONS", 100)
+
+_PROVIDER: ChatProvider | None = None
+
+
+def create_provider(kind: str = CHAT_PROVIDER) -> ChatProvider:
+    """Build the provider named by ``CHAT_PROVIDER`` (``mock`` or ``http``)."""
+
+    if kind == "mock":
+        from .mock import MockProvider
+
+        return MockProvider(tokens_per_second=CHAT_MOCK_TOKENS_PER_SECOND, ttft_ms=CHAT_MOCK_TTFT_MS)
+    if kind == "http":
+        from .http_provider import HttpChatProvider
+
+        return HttpChatProvider(
+            base_url=CHAT_PROVIDER_BASE_URL,
+            api_key=CHAT_PROVIDER_API_KEY,
+            model=CHAT_PROVIDER_MODEL,
+            timeout_s=CHAT_PROVIDER_TIMEOUT_S,
+            max_retries=CHAT_PROVIDER_MAX_RETRIES,
+            max_connections=CHAT_PROVIDER_MAX_CONNECTIONS,
+        )
+    raise ValueError(f"unknown CHAT_PROVIDER: {kind!r}")
+
+
+def get_provider() -> ChatProvider:
+    """Return the process-wide provider, creating it on first use."""
+
+    global _PROVIDER
+    if _PROVIDER is None:
+        _PROVIDER = create_provider()
+    return _PROVIDER
+
+
+def set_provider(provider: ChatProvider | None) -> None:
+    global _PROVIDER
+    _PROVIDER = provider
+
+
+async def close_provider() -> None:
+    global _PROVIDER
+    provider, _PROVIDER = _PROVIDER, None
+    if provider is not None:
+        await provider.aclose()
@@ -2,19 +2,421 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Request
+import asyncio
+import json
+from dataclasses import asdict
+from typing import AsyncIterator, Iterator
 
-from ..models import AnalysisResponseModel
-from ..services.analysis import analyse_repository, was_cache_hit
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+
+from ..models import (
+    AnalysisResponseModel,
+    ComponentsResponseModel,
+    DependencyEdgeModel,
+    EdgePageModel,
+    GraphChangesModel,
+    GraphDiffModel,
+    GraphStatusModel,
+    NeighborhoodResponseModel,
+    NeighborModel,
+    ScanStatsModel,
+    SymbolPageModel,
+    SymbolPathResponseModel,
+    SymbolSearchHitModel,
+    SymbolSearchResponseModel,
+    SymbolSourceModel,
+)
+from ..services.analysis import (
+    MAX_SYMBOLS_EMITTED,
+    AnalysisSnapshot,
+    get_feed,
+    get_index,
+    is_watched,
+    latest_snapshot,
+    read_symbol_source,
+    refresh_snapshot_async,
+    search_snapshot,
+    symbol_model,
+)
+from ..services.graph_feed import GraphDiff
+from ..services.graph_index import Direction
+from ..services.graph_watcher import get_watcher
+from ..services.http_payload import EncodedPayload
 
 router = APIRouter(prefix="/graph", tags=["analysis"])
 
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+NDJSON_BATCH_LINES = 128
+MAX_LONG_POLL_SECONDS = 60
+EVENTS_WAIT_SECONDS = 15
+
+
+def _encode_cursor(version: int, offset: int) -> str:
+    return f"{version}.{offset}"
+
+
+def _decode_cursor(cursor: str | None, version: int) -> int:
+    """Return the offset encoded in *cursor* for the given graph version."""
+
+    if not cursor:
+        return 0
+    try:
+        cursor_version, offset = (int(part) for part in cursor.split(".", 1))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="invalid cursor") from exc
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if cursor_version != version:
+        raise HTTPException(
+            status_code=409,
+            detail="graph changed since the cursor was issued; restart pagination",
+        )
+    return offset
+
+
+def _next_cursor(version: int, offset: int, limit: int, total: int) -> str | None:
+    end = offset + limit
+    return _encode_cursor(version, end) if end < total else None
+
+
+async def _conditional_response(request: Request, payload: EncodedPayload) -> Response:
+    """Serve *payload* compressed as negotiated, or 304 when the ETag matches."""
+
+    encoding = payload.negotiate(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": payload.etag(encoding),
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+    }
+    if payload.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if payload.is_encoded(encoding):
+        body = payload.encoded(encoding)
+    else:
+        body = await asyncio.to_thread(payload.encoded, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=payload.media_type, headers=headers)
+
 
 @router.get("/analyze", response_model=AnalysisResponseModel)
-async def analyze_repository(request: Request) -> AnalysisResponseModel:
-    """Analyze the repository and return AST-based dependency graph."""
+async def analyze_repository(
+    request: Request,
+    include_source: bool = Query(default=False),
+) -> Response:
+    """Analyze the repository and return AST-based dependency graph.
+
+    The body is serialized (and compressed) once per graph version and carries
+    a strong ETag, so unchanged polls are answered with ``304 Not Modified``.
+    """
+
+    snapshot, cache_hit = await refresh_snapshot_async()
+    if include_source:
+        # snippets read files from disk, keep that off the event loop as well
+        payload = await asyncio.to_thread(snapshot.encoded_response, include_source=True)
+    else:
+        payload = snapshot.encoded_response()
+    response = await _conditional_response(request, payload)
+    request.state.slo_tokens = min(len(snapshot.symbols), MAX_SYMBOLS_EMITTED)
+    request.state.slo_cache_hit = cache_hit or response.status_code == 304
+    return response
+
+
+@router.get("/symbols", response_model=SymbolPageModel)
+async def list_symbols(
+    request: Request,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_source: bool = Query(default=False),
+) -> SymbolPageModel:
+    """Return one page of symbols from the current graph version."""
+
+    snapshot, cache_hit = await refresh_snapshot_async()
+    offset = _decode_cursor(cursor, snapshot.version)
+    drafts = snapshot.symbols[offset : offset + limit]
+    request.state.slo_tokens = len(drafts)
+    request.state.slo_cache_hit = cache_hit
+    if include_source:
+        items = await asyncio.to_thread(
+            lambda: [symbol_model(draft, include_source=True) for draft in drafts]
+        )
+    else:
+        items = [symbol_model(draft) for draft in drafts]
+    return SymbolPageModel(
+        items=items,
+        nextCursor=_next_cursor(snapshot.version, offset, limit, len(snapshot.symbols)),
+        version=snapshot.version,
+        total=len(snapshot.symbols),
+    )
+
+
+@router.get("/symbols/{symbol_id:path}/source", response_model=SymbolSourceModel)
+async def get_symbol_source(symbol_id: str) -> SymbolSourceModel:
+    """Return the source snippet around a single symbol."""
+
+    snapshot, _ = await refresh_snapshot_async()
+    draft = snapshot.get_symbol(symbol_id)
+    if draft is None:
+        raise HTTPException(status_code=404, detail="symbol not found")
+    source, start_line = await asyncio.to_thread(read_symbol_source, draft)
+    return SymbolSourceModel(
+        id=draft.id,
+        filePath=draft.file_path,
+        source=source,
+        sourceStartLine=start_line,
+    )
+
+
+@router.get("/search", response_model=SymbolSearchResponseModel)
+async def search_symbols(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+) -> SymbolSearchResponseModel:
+    """Rank symbols whose names match *q* exactly, by prefix or fuzzily."""
+
+    await refresh_snapshot_async()
+    snapshot, hits = await asyncio.to_thread(search_snapshot, q, limit=limit)
+    return SymbolSearchResponseModel(
+        query=q,
+        items=[
+            SymbolSearchHitModel(symbol=symbol_model(hit.draft), score=hit.score, match=hit.match)
+            for hit in hits
+        ],
+        version=snapshot.version,
+    )
+
+
+@router.get("/edges", response_model=EdgePageModel)
+async def list_edges(
+    request: Request,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> EdgePageModel:
+    """Return one page of dependency edges from the current graph version."""
+
+    snapshot, cache_hit = await refresh_snapshot_async()
+    offset = _decode_cursor(cursor, snapshot.version)
+    edges = snapshot.edges[offset : offset + limit]
+    request.state.slo_tokens = len(edges)
+    request.state.slo_cache_hit = cache_hit
+    return EdgePageModel(
+        items=[DependencyEdgeModel(source=source, target=target) for source, target in edges],
+        nextCursor=_next_cursor(snapshot.version, offset, limit, len(snapshot.edges)),
+        version=snapshot.version,
+        total=len(snapshot.edges),
+    )
+
+
+def _require_position(snapshot: AnalysisSnapshot, symbol_id: str) -> int:
+    position = snapshot.adjacency().positions.get(symbol_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"symbol not found: {symbol_id}")
+    return position
+
+
+@router.get("/neighbors", response_model=NeighborhoodResponseModel)
+async def get_neighbors(
+    symbol: str = Query(...),
+    direction: Direction = Query("both"),
+    depth: int = Query(1, ge=1, le=6),
+    limit: int = Query(200, ge=1, le=MAX_PAGE_SIZE),
+) -> NeighborhoodResponseModel:
+    """Return the k-hop callers and/or callees of one symbol."""
+
+    snapshot, _ = await refresh_snapshot_async()
+    adjacency = snapshot.adjacency()
+    center = _require_position(snapshot, symbol)
+    distances = adjacency.neighborhood(center, direction=direction, depth=depth, limit=limit)
+    ordered = sorted(distances, key=lambda node: (distances[node], node))
+    return NeighborhoodResponseModel(
+        center=symbol,
+        direction=direction,
+        depth=depth,
+        nodes=[
+            NeighborModel(symbol=symbol_model(snapshot.symbols[node]), distance=distances[node])
+            for node in ordered
+        ],
+        edges=[
+            DependencyEdgeModel(
+                source=adjacency.symbol_ids[source], target=adjacency.symbol_ids[target]
+            )
+            for source, target in adjacency.induced_edges(distances)
+        ],
+        version=snapshot.version,
+    )
+
+
+@router.get("/path", response_model=SymbolPathResponseModel)
+async def get_shortest_path(
+    source: str = Query(...),
+    target: str = Query(...),
+) -> SymbolPathResponseModel:
+    """Return the shortest call chain from *source* to *target*, if any."""
+
+    snapshot, _ = await refresh_snapshot_async()
+    path = snapshot.adjacency().shortest_path(
+        _require_position(snapshot, source),
+        _require_position(snapshot, target),
+    )
+    return SymbolPathResponseModel(
+        source=source,
+        target=target,
+        found=path is not None,
+        symbols=[symbol_model(snapshot.symbols[node]) for node in path or ()],
+        version=snapshot.version,
+    )
+
+
+@router.get("/components", response_model=ComponentsResponseModel)
+async def get_components(
+    min_size: int = Query(2, ge=1),
+) -> ComponentsResponseModel:
+    """Return strongly connected components (mutually recursive symbol groups)."""
+
+    snapshot, _ = await refresh_snapshot_async()
+    adjacency = snapshot.adjacency()
+    components = adjacency.strongly_connected_components(min_size=min_size)
+    return ComponentsResponseModel(
+        components=[[adjacency.symbol_ids[node] for node in component] for component in components],
+        version=snapshot.version,
+    )
+
+
+def _ndjson_records(
+    snapshot: AnalysisSnapshot, include_source: bool
+) -> Iterator[dict[str, object]]:
+    for draft in snapshot.symbols:
+        symbol = symbol_model(draft, include_source=include_source)
+        yield {"type": "symbol", "symbol": symbol.model_dump(mode="json")}
+    for source, target in snapshot.edges:
+        yield {"type": "edge", "edge": {"source": source, "target": target}}
+    yield {
+        "type": "completed",
+        "version": snapshot.version,
+        "symbols": len(snapshot.symbols),
+        "edges": len(snapshot.edges),
+    }
+
+
+def _ndjson_chunks(
+    snapshot: AnalysisSnapshot, include_source: bool
+) -> Iterator[bytes]:
+    """Encode records lazily, batching lines so each write carries many of them.
+
+    A plain generator on purpose: Starlette iterates it in the threadpool, so
+    the source file reads of ``include_source`` stay off the event loop.
+    """
+
+    lines: list[str] = []
+    for record in _ndjson_records(snapshot, include_source):
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= NDJSON_BATCH_LINES:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@router.get("/stream")
+async def stream_graph(
+    request: Request,
+    include_source: bool = Query(default=False),
+) -> StreamingResponse:
+    """Stream the whole graph as NDJSON: symbols first, then edges."""
+
+    snapshot, cache_hit = await refresh_snapshot_async()
+    request.state.slo_tokens = len(snapshot.symbols)
+    request.state.slo_cache_hit = cache_hit
+    return StreamingResponse(
+        _ndjson_chunks(snapshot, include_source),
+        media_type="application/x-ndjson",
+    )
+
+
+def _diff_model(diff: GraphDiff) -> GraphDiffModel:
+    return GraphDiffModel(
+        version=diff.version,
+        previousVersion=diff.previous_version,
+        addedSymbols=[symbol_model(draft) for draft in diff.added_symbols],
+        removedSymbols=diff.removed_symbols,
+        addedEdges=[DependencyEdgeModel(source=source, target=target) for source, target in diff.added_edges],
+        removedEdges=[DependencyEdgeModel(source=source, target=target) for source, target in diff.removed_edges],
+    )
+
+
+@router.get("/status", response_model=GraphStatusModel)
+async def get_graph_status() -> GraphStatusModel:
+    """Report the published graph version and the background watcher state."""
+
+    snapshot = latest_snapshot()
+    watcher = get_watcher()
+    return GraphStatusModel(
+        version=get_feed().version,
+        watching=is_watched(),
+        backend=watcher.backend if watcher is not None else None,
+        refreshes=watcher.refreshes if watcher is not None else 0,
+        lastRefreshAt=watcher.last_refresh_at if watcher is not None else None,
+        symbols=len(snapshot.symbols) if snapshot is not None else 0,
+        edges=len(snapshot.edges) if snapshot is not None else 0,
+        scan=ScanStatsModel(**asdict(get_index().scan_stats)),
+    )
+
+
+@router.get("/changes", response_model=GraphChangesModel)
+async def get_graph_changes(
+    since: int = Query(0, ge=0),
+    timeout: float = Query(0, ge=0, le=MAX_LONG_POLL_SECONDS),
+) -> GraphChangesModel:
+    """Return the diffs after version *since*, long-polling up to *timeout* seconds.
+
+    ``resync`` is set when the feed history no longer reaches back to *since*;
+    the client should then reload the graph through the paginated endpoints.
+    """
+
+    feed = get_feed()
+    if not is_watched():
+        # nothing refreshes the index in the background, so check once here
+        await refresh_snapshot_async()
+    if timeout and feed.version <= since:
+        await feed.wait(since, timeout)
+    diffs = feed.since(since)
+    return GraphChangesModel(
+        version=feed.version,
+        resync=diffs is None,
+        diffs=[_diff_model(diff) for diff in diffs or ()],
+    )
+
+
+@router.get("/events")
+async def stream_graph_events(
+    request: Request,
+    since: int | None = Query(default=None, ge=0),
+) -> EventSourceResponse:
+    """Push graph diffs over Server-Sent Events as new versions are published."""
+
+    feed = get_feed()
+
+    async def event_publisher() -> AsyncIterator[dict[str, str]]:
+        version = feed.version if since is None else since
+        yield {"event": "version", "data": json.dumps({"version": feed.version})}
+        while not await request.is_disconnected():
+            await feed.wait(version, EVENTS_WAIT_SECONDS)
+            if feed.version <= version:
+                continue
+            diffs = feed.since(version)
+            if diffs is None:
+                version = feed.version
+                yield {"event": "resync", "id": str(version), "data": json.dumps({"version": version})}
+                continue
+            for diff in diffs:
+                yield {
+                    "event": "diff",
+                    "id": str(diff.version),
+                    "data": _diff_model(diff).model_dump_json(),
+                }
+                version = diff.version
 
-    result = analyse_repository()
-    request.state.slo_tokens = len(result.symbols)
-    request.state.slo_cache_hit = was_cache_hit()
-    return result
+    return EventSourceResponse(event_publisher(), headers={"Cache-Control": "no-cache"})
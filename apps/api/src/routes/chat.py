@@ -2,88 +2,172 @@
 
 from __future__ import annotations
 
-import asyncio
-import json
-from datetime import datetime, timezone
-from typing import AsyncGenerator
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator
 from uuid import uuid4
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 from sse_starlette.sse import EventSourceResponse
 
+from ..graph import ConversationGraph, ConversationState, get_session_store
+from ..models import ChatStreamRequest
+from ..providers import ChatMessage, ChatProvider, CompletionRequest, ProviderError, get_provider
+from ..services.completion_cache import completion_key, get_completion_cache, replay
+from ..services.generation_broadcast import get_coalescer
+from ..services.sse_encoder import ChatEventEncoder, FrameBuffer
+from ..services.stream_replay import ReplayStream, ResumeError, format_event_id, get_stream_registry
+
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
-async def _token_emitter() -> AsyncGenerator[str, None]:
-    """Yield a finite sequence of token events as JSON strings."""
-
-    tokens = [
-        "AI",
-        " chat",
-        " assistant",
-        " へ",
-        " ようこそ",
-        "！",
-        "\n",
-        "ダミー",
-        " トークン",
-        " を",
-        " ストリーム",
-        " 中",
-        "...",
-    ]
-    total_tokens = 0
-    cost_per_token = 0.000002
-
-    for index, token in enumerate(tokens):
-        total_tokens += 1
-        payload = {
-            "type": "token",
-            "payload": {
-                "id": str(uuid4()),
-                "token": token,
-                "index": index,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-            },
-            "usage": {
-                "totalTokens": total_tokens,
-                "totalCostUsd": round(total_tokens * cost_per_token, 6),
-            },
-        }
-        yield json.dumps(payload, ensure_ascii=False)
-        await asyncio.sleep(0.25)
-
-    final_event = {
-        "type": "completed",
-        "usage": {
-            "totalTokens": total_tokens,
-            "totalCostUsd": round(total_tokens * cost_per_token, 6),
-        },
-    }
-    yield json.dumps(final_event, ensure_ascii=False)
+def _advance(graph: ConversationGraph, event_type: object) -> None:
+    """Move *graph* along PLANNING -> RESPONDING -> COMPLETED as events stream out."""
 
+    if event_type == "token" and graph.current_state is ConversationState.PLANNING:
+        graph.transition(ConversationState.RESPONDING)
+    elif event_type == "completed":
+        if graph.current_state is ConversationState.PLANNING:
+            graph.transition(ConversationState.RESPONDING)
+        graph.transition(ConversationState.COMPLETED)
 
-@router.get("/stream")
-async def stream_chat(request: Request) -> EventSourceResponse:
-    """Stream dummy token events over Server-Sent Events."""
 
-    async def event_publisher() -> AsyncGenerator[dict[str, str], None]:
-        tokens_used = 0
-        async for payload in _token_emitter():
+def _token_source(
+    provider: ChatProvider, completion: CompletionRequest
+) -> tuple[AsyncIterator[str], bool]:
+    """Return the tokens to stream and whether they come from the completion cache.
+
+    Cache misses go through the coalescer, so identical requests that arrive
+    while a generation is running share its upstream stream.
+    """
+
+    cache = get_completion_cache()
+    key = completion_key(provider.name, completion)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return replay(cached), True
+
+    def start() -> AsyncIterator[str]:
+        upstream = provider.stream(completion)
+        return upstream if cache is None else cache.record(key, upstream)
+
+    tokens, _ = get_coalescer().attach(key, start)
+    return tokens, False
+
+
+def _resume(request: Request) -> tuple[ReplayStream[bytes], int] | None:
+    """Look up the stream named by the request's ``Last-Event-ID`` header."""
+
+    try:
+        return get_stream_registry().resume(request.headers.get("last-event-id"), label=request.url.path)
+    except ResumeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+def _event_stream(
+    request: Request,
+    completion: CompletionRequest,
+    *,
+    graph: ConversationGraph | None = None,
+    session_id: str | None = None,
+) -> EventSourceResponse:
+    tokens, cache_hit = _token_source(get_provider(), completion)
+
+    async def produce(stream: ReplayStream[bytes]) -> None:
+        # runs detached from the connection, so a client that reconnects
+        # within the grace period resumes the same generation
+        encoder = ChatEventEncoder(session_id=session_id)
+        frames = FrameBuffer(stream.publish)
+        stream.meta.update(tokens=0, cache_hit=cache_hit)
+
+        async def emit(event: bytes) -> None:
+            # pulls from the provider only as fast as the slowest reader drains
+            await stream.writable()
+            frames.append(event)
+
+        try:
             try:
-                data = json.loads(payload)
-                usage = data.get("usage")
-                if isinstance(usage, dict) and "totalTokens" in usage:
-                    tokens_used = max(tokens_used, int(usage["totalTokens"]))
-            except Exception:  # pragma: no cover - best effort parsing
-                pass
-            yield {"data": payload}
-        request.state.slo_tokens = tokens_used
-        request.state.slo_cache_hit = False
+                async for token in tokens:
+                    if graph is not None:
+                        _advance(graph, "token")
+                    await emit(encoder.token(token))
+                    stream.meta["tokens"] = encoder.total_tokens
+            except ProviderError as exc:
+                await emit(encoder.error(str(exc)))
+                return
+            if graph is not None:
+                _advance(graph, "completed")
+            await emit(encoder.completed())
+        finally:
+            frames.flush()
+            # errors and abandoned streams abort the turn
+            if graph is not None and graph.current_state is not ConversationState.COMPLETED:
+                graph.transition(ConversationState.IDLE)
+
+    stream: ReplayStream[bytes] = get_stream_registry().create(produce, label=request.url.path)
+    return _stream_response(request, stream, 0, session_id=session_id)
+
+
+def _stream_response(
+    request: Request,
+    stream: ReplayStream[bytes],
+    after: int,
+    *,
+    session_id: str | None = None,
+) -> EventSourceResponse:
+    async def event_publisher() -> AsyncGenerator[bytes, None]:
+        try:
+            async with aclosing(stream.subscribe(after)) as events:
+                async for seq, frame in events:
+                    # a frame holds one or more events; the id goes on the last
+                    event_id = format_event_id(stream.stream_id, seq).encode("ascii")
+                    yield b"%sid: %s\n\n" % (frame[:-1], event_id)
+        finally:
+            request.state.slo_tokens = stream.meta.get("tokens", 0)
+            request.state.slo_cache_hit = stream.meta.get("cache_hit", False)
 
     headers = {
         "Cache-Control": "no-cache",
         "Connection": "keep-alive",
     }
+    if session_id is not None:
+        headers["X-Session-Id"] = session_id
     return EventSourceResponse(event_publisher(), headers=headers)
+
+
+@router.get("/stream")
+async def stream_chat(request: Request) -> EventSourceResponse:
+    """Stream the configured provider's tokens over Server-Sent Events.
+
+    Reconnects carrying ``Last-Event-ID`` resume the original stream.
+    """
+
+    resumed = _resume(request)
+    if resumed is not None:
+        return _stream_response(request, *resumed)
+    return _event_stream(request, CompletionRequest())
+
+
+@router.post("/stream")
+async def stream_chat_conversation(request: Request, body: ChatStreamRequest) -> EventSourceResponse:
+    """会話履歴を受け取り、セッションの FSM を進めながら応答を SSE で返す。
+
+    ``Last-Event-ID`` 付きの再接続は、生成中のストリームを続きから再開する。
+    """
+
+    resumed = _resume(request)
+    if resumed is not None:
+        return _stream_response(request, *resumed, session_id=body.sessionId)
+    session_id = body.sessionId or uuid4().hex
+    graph = get_session_store().get_or_create(session_id)
+    if not graph.can_transition(ConversationState.PLANNING):
+        raise HTTPException(status_code=409, detail="session already has a response in progress")
+    graph.transition(ConversationState.PLANNING)
+    completion = CompletionRequest(
+        messages=tuple(ChatMessage(role=turn.role, content=turn.content) for turn in body.conversation),
+        model=body.model or "",
+        temperature=body.temperature,
+        max_tokens=body.maxTokens,
+    )
+    return _event_stream(request, completion, graph=graph, session_id=session_id)
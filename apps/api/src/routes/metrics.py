@@ -3,18 +3,63 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
 
-from ..metrics.store import latest
+from ..metrics.prometheus import CONTENT_TYPE, REGISTRY
+from ..metrics.store import METRICS_WINDOW_S, cancellations, latest, summary
+from ..services.completion_cache import get_completion_cache
+from ..services.generation_broadcast import get_coalescer
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
+@router.get("", response_class=PlainTextResponse)
+async def get_prometheus_metrics() -> PlainTextResponse:
+	"""Expose counters, gauges and histograms in the Prometheus text format."""
+
+	return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @router.get("/slo/latest")
 async def get_latest_slo_metrics(
-	limit: int = Query(5, ge=1, le=50),
+	limit: int = Query(5, ge=1, le=1000),
 	path: str | None = Query(default=None),
 ) -> dict[str, list[dict[str, object]]]:
 	"""Return the latest SLO metrics records."""
 
 	records = [record.as_dict() for record in latest(limit=limit, path=path)]
 	return {"records": records}
+
+
+@router.get("/slo/summary")
+async def get_slo_summary(
+	window: int = Query(60, ge=1, le=86_400, description="Window in seconds, capped at METRICS_WINDOW_S"),
+	path: str | None = Query(default=None, description="Route template, e.g. /chat/stream"),
+) -> dict[str, object]:
+	"""Return p50/p90/p99 latency, throughput and cache-hit ratio per route and method."""
+
+	return {"windowSeconds": min(window, METRICS_WINDOW_S), "routes": summary(window, path)}
+
+
+@router.get("/slo/cancellations")
+async def get_cancellations() -> dict[str, list[dict[str, object]]]:
+	"""Return how many streams lost their client or were cancelled after the grace period."""
+
+	return {"cancellations": cancellations()}
+
+
+@router.get("/cache/completions")
+async def get_completion_cache_stats() -> dict[str, object]:
+	"""Return hit/miss/eviction counters of the chat completion cache."""
+
+	cache = get_completion_cache()
+	if cache is None:
+		return {"enabled": False}
+	return {"enabled": True, "maxBytes": cache.max_bytes, **cache.stats.as_dict()}
+
+
+@router.get("/chat/coalescing")
+async def get_coalescing_stats() -> dict[str, int]:
+	"""Return how many chat generations were started versus joined in flight."""
+
+	return get_coalescer().stats.as_dict()
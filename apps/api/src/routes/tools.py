@@ -4,16 +4,25 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
+import signal
 import sys
+from contextlib import aclosing
 from datetime import datetime, timezone
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from time import perf_counter
 from typing import Awaitable, Callable, Literal
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from ..metrics.prometheus import PYTEST_DURATION
+from ..models import ConversationTurn
+from ..settings import env_int
+from ..services.stream_replay import ReplayStream, ResumeError, format_event_id, get_stream_registry
+
 
 ToolStage = Literal[
     "test_generation",
@@ -25,11 +34,6 @@ ToolStage = Literal[
 ToolStatus = Literal["pending", "in_progress", "failed", "succeeded"]
 
 
-class ConversationTurn(BaseModel):
-    role: Literal["user", "assistant", "system"] = Field(..., description="発話者の役割")
-    content: str = Field(..., description="メッセージ本文")
-
-
 class TestGenerationRequest(BaseModel):
     conversation: list[ConversationTurn] = Field(
         default_factory=list, description="Failing Test 生成用の会話履歴"
@@ -38,6 +42,10 @@ class TestGenerationRequest(BaseModel):
 
 router = APIRouter(prefix="/tools", tags=["tools"])
 
+# pytest runs are expensive, so abandoned tool streams get a shorter
+# resume window than chat streams before their work is cancelled
+TOOL_STREAM_GRACE_S = env_int("TOOL_STREAM_GRACE_S", 5)
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -86,8 +94,14 @@ async def _run_pytest(
     workdir: Path,
     emit: Callable[[str], Awaitable[None]],
 ) -> int:
-    """Run pytest in *workdir* and emit streaming log events."""
+    """Run pytest in *workdir* and emit streaming log events.
 
+    pytest runs in its own process group; if the caller is cancelled (the
+    client went away), the whole group is killed and reaped before the
+    cancellation propagates, so the temporary directory can be removed.
+    """
+
+    started = perf_counter()
     process = await asyncio.create_subprocess_exec(
         sys.executable,
         "-m",
@@ -96,18 +110,27 @@ async def _run_pytest(
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.STDOUT,
         cwd=str(workdir),
+        start_new_session=True,
     )
     assert process.stdout is not None
 
-    while True:
-        line = await process.stdout.readline()
-        if not line:
-            break
-        text = line.decode("utf-8", errors="replace").rstrip()
-        if text:
-            await emit(_sse("token", _token_payload(stage, text)))
-
-    await process.wait()
+    try:
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if text:
+                await emit(_sse("token", _token_payload(stage, text)))
+
+        await process.wait()
+    finally:
+        outcome = "passed" if process.returncode == 0 else "failed"
+        if process.returncode is None:
+            outcome = "cancelled"
+            _kill_process_group(process)
+            await process.wait()
+        PYTEST_DURATION.observe(perf_counter() - started, stage, outcome)
     status: ToolStatus = "succeeded" if process.returncode == 0 else "failed"
     await emit(
         _sse(
@@ -122,16 +145,41 @@ async def _run_pytest(
     return process.returncode
 
 
-@router.post("/tests/generate")
-async def generate_failing_tests(request: TestGenerationRequest) -> StreamingResponse:
-    """Failing Test を生成し pytest 実行ログを SSE で返す。"""
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:  # pragma: no cover - Windows
+            process.kill()
+    except ProcessLookupError:
+        pass
 
-    queue: asyncio.Queue[str | None] = asyncio.Queue()
 
-    async def emit(event: str) -> None:
-        await queue.put(event)
+@router.post("/tests/generate")
+async def generate_failing_tests(
+    http_request: Request,
+    request: TestGenerationRequest,
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """Failing Test を生成し pytest 実行ログを SSE で返す。
+
+    ``Last-Event-ID`` 付きの再接続は、実行中のストリームを続きから再開する。
+    クライアントが切断したまま猶予時間が過ぎると、pytest を停止し一時ディレクトリを削除する。
+    """
+
+    registry = get_stream_registry()
+    try:
+        resumed = registry.resume(last_event_id, label=http_request.url.path)
+    except ResumeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    if resumed is not None:
+        return _stream_response(*resumed)
+
+    async def worker(stream: ReplayStream[str]) -> None:
+        async def emit(event: str) -> None:
+            await stream.writable()
+            stream.publish(event)
 
-    async def worker() -> None:
         conversation_summary = " / ".join(
             turn.content for turn in request.conversation[-3:]
         )
@@ -308,17 +356,16 @@ def test_divide_zero_raises():
                 )
         except Exception as exc:  # pragma: no cover - 予防的
             await emit(_sse("error", _error_payload(f"ツール処理中にエラーが発生しました: {exc}")))
-        finally:
-            await queue.put(None)
 
-    asyncio.create_task(worker())
+    stream = registry.create(worker, label=http_request.url.path, grace_seconds=TOOL_STREAM_GRACE_S)
+    return _stream_response(stream, 0)
 
+
+def _stream_response(stream: ReplayStream[str], after: int) -> StreamingResponse:
     async def event_publisher():
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
-            yield item.encode("utf-8")
+        async with aclosing(stream.subscribe(after)) as events:
+            async for seq, frame in events:
+                yield f"id: {format_event_id(stream.stream_id, seq)}\n{frame}".encode("utf-8")
 
     headers = {
         "Cache-Control": "no-cache",
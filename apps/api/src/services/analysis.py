@@ -1,12 +1,31 @@
 from __future__ import annotations
 
+import asyncio
 import ast
-import re
+import atexit
+import hashlib
+import multiprocessing
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 from ..models import AnalysisResponseModel, DependencyEdgeModel, SymbolKind, SymbolModel
+from ..settings import env_int, env_str
+from .graph_feed import GraphChangeFeed
+from .gitignore import GitIgnore, is_ignored
+from .graph_index import AdjacencyIndex
+from .http_payload import EncodedPayload
+from .symbol_search import SearchHit, SymbolSearchIndex
+from .typescript import extract_typescript
+
+if TYPE_CHECKING:
+    from .analysis_cache import AnalysisDiskCache
 
 PROJECT_ROOT = Path(__file__).resolve().parents[4]
 CODE_DIRECTORIES = [PROJECT_ROOT / "apps", PROJECT_ROOT / "packages"]
@@ -21,17 +40,20 @@ IGNORED_DIR_NAMES = {
     "build",
     "coverage",
 }
+CODE_SUFFIXES = {".py", ".ts", ".tsx"}
 SNIPPET_CONTEXT_LINES = 8
 MAX_CODE_FILE_BYTES = 128_000
-MAX_FILES_SCANNED = 150
-MAX_SYMBOLS_EMITTED = 400
-MAX_EDGES_EMITTED = 800
-TS_FUNCTION_PATTERN = re.compile(r"(?:export\s+)?function\s+(?P<name>[A-Za-z0-9_]+)\s*\(")
-TS_CLASS_PATTERN = re.compile(r"(?:export\s+)?class\s+(?P<name>[A-Za-z0-9_]+)")
-TS_CALL_PATTERN = re.compile(r"(?P<name>[A-Za-z0-9_]+)\s*\(")
-
-_ANALYSIS_CACHE: AnalysisResponseModel | None = None
-_LAST_CACHE_HIT: bool = False
+MAX_FILES_SCANNED = env_int("ANALYSIS_MAX_FILES", 150)
+# Caps for the single-body /graph/analyze response; the paginated and
+# streamed endpoints serve the whole snapshot.
+MAX_SYMBOLS_EMITTED = env_int("ANALYSIS_MAX_SYMBOLS", 400)
+MAX_EDGES_EMITTED = env_int("ANALYSIS_MAX_EDGES", 800)
+# 0 or 1 keeps parsing in-process; larger values fan changed files out to a
+# process pool once there is more than one chunk of work.
+ANALYSIS_WORKERS = env_int("ANALYSIS_WORKERS", 0)
+ANALYSIS_CHUNK_SIZE = env_int("ANALYSIS_CHUNK_SIZE", 32)
+# Directory for the persistent per-file index shared by workers and restarts.
+ANALYSIS_CACHE_DIR = env_str("ANALYSIS_CACHE_DIR", "")
 
 
 @dataclass
@@ -42,21 +64,80 @@ class SymbolDraft:
     kind: SymbolKind
     line: int
     column: int
-    source: str
-    source_start_line: int = 1
     references: set[str] = field(default_factory=set)
+    module: str = ""
+    qualname: str = ""
+    owner: str | None = None
+
+    @property
+    def source_start_line(self) -> int:
+        return max(1, self.line - SNIPPET_CONTEXT_LINES)
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Identity of a file's contents as seen by the index."""
+
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+@dataclass
+class FileAnalysis:
+    """Parsed symbols of a single file together with its fingerprint."""
+
+    path: str
+    fingerprint: FileFingerprint
+    symbols: list[SymbolDraft]
+    module: str = ""
+    imports: dict[str, str] = field(default_factory=dict)
+
+
+def module_name_for(file_path: Path) -> str:
+    """Dotted module name of *file_path* relative to the project root."""
+
+    parts = list(file_path.relative_to(PROJECT_ROOT).with_suffix("").parts)
+    if len(parts) > 1 and parts[-1] in {"__init__", "index"}:
+        parts.pop()
+    return ".".join(parts)
+
+
+def _dotted_name(node: ast.expr) -> str | None:
+    """Return ``a.b.c`` for a Name/Attribute chain, ``None`` otherwise."""
+
+    attributes: list[str] = []
+    while isinstance(node, ast.Attribute):
+        attributes.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    attributes.append(node.id)
+    return ".".join(reversed(attributes))
 
 
 class PythonSymbolVisitor(ast.NodeVisitor):
-    def __init__(self, file_path: Path, source: str) -> None:
+    """Collect definitions, imports and call references of one module.
+
+    Calls are recorded as written (``name``, ``self.method`` or
+    ``alias.attr``) together with the qualified name and enclosing class of
+    the calling symbol, so the index can resolve them through the module's
+    own symbol table and imports without walking the AST again.
+    """
+
+    def __init__(self, file_path: Path, source: str, module: str | None = None) -> None:
         self.file_path = file_path
         self.source = source
+        self.module = module if module is not None else module_name_for(file_path)
+        self.is_package = file_path.name == "__init__.py"
         self.symbols: list[SymbolDraft] = []
+        self.imports: dict[str, str] = {}
         self._current: SymbolDraft | None = None
+        self._scope: list[str] = []
+        self._classes: list[str] = []
 
     def _push_symbol(self, name: str, kind: SymbolKind, node: ast.AST) -> None:
         identifier = f"{self.file_path}:{name}:{node.lineno}:{getattr(node, 'col_offset', 0)}"
-        snippet, start_line = extract_snippet(self.source, node.lineno)
         symbol = SymbolDraft(
             id=identifier,
             name=name,
@@ -64,188 +145,987 @@ class PythonSymbolVisitor(ast.NodeVisitor):
             kind=kind,
             line=node.lineno,
             column=getattr(node, "col_offset", 0),
-            source=snippet,
-            source_start_line=start_line,
+            module=self.module,
+            qualname=".".join([*self._scope, name]),
+            owner=self._classes[-1] if self._classes else None,
         )
         self.symbols.append(symbol)
         self._current = symbol
 
-    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:  # type: ignore[override]
+    def _visit_definition(self, node: ast.AST, name: str, kind: SymbolKind) -> None:
         previous = self._current
-        self._push_symbol(node.name, SymbolKind.FUNCTION, node)
+        self._push_symbol(name, kind, node)
+        self._scope.append(name)
+        if kind is SymbolKind.CLASS:
+            self._classes.append(".".join(self._scope))
         self.generic_visit(node)
+        if kind is SymbolKind.CLASS:
+            self._classes.pop()
+        self._scope.pop()
         self._current = previous
 
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:  # type: ignore[override]
+        self._visit_definition(node, node.name, SymbolKind.FUNCTION)
+
     def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:  # type: ignore[override]
-        previous = self._current
-        self._push_symbol(node.name, SymbolKind.FUNCTION, node)
-        self.generic_visit(node)
-        self._current = previous
+        self._visit_definition(node, node.name, SymbolKind.FUNCTION)
 
     def visit_ClassDef(self, node: ast.ClassDef) -> None:  # type: ignore[override]
-        previous = self._current
-        self._push_symbol(node.name, SymbolKind.CLASS, node)
-        self.generic_visit(node)
-        self._current = previous
+        self._visit_definition(node, node.name, SymbolKind.CLASS)
+
+    def visit_Import(self, node: ast.Import) -> None:  # type: ignore[override]
+        for alias in node.names:
+            if alias.asname:
+                self.imports[alias.asname] = alias.name
+            else:
+                head = alias.name.split(".", 1)[0]
+                self.imports[head] = head
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:  # type: ignore[override]
+        base = node.module or ""
+        if node.level:
+            package = self.module.split(".")
+            if not self.is_package:
+                package = package[:-1]
+            package = package[: len(package) - (node.level - 1)] if node.level > 1 else package
+            base = ".".join(part for part in [*package, base] if part)
+        for alias in node.names:
+            if alias.name == "*":
+                self.imports[f"*{base}"] = base
+                continue
+            target = f"{base}.{alias.name}" if base else alias.name
+            self.imports[alias.asname or alias.name] = target
 
     def visit_Call(self, node: ast.Call) -> None:  # type: ignore[override]
-        if self._current is not None and isinstance(node.func, ast.Name):
-            self._current.references.add(node.func.id)
+        if self._current is not None:
+            reference = _dotted_name(node.func)
+            if reference is not None:
+                self._current.references.add(reference)
         self.generic_visit(node)
 
 
-def analyze_python_file(file_path: Path) -> Iterable[SymbolDraft]:
-    source = file_path.read_text(encoding="utf-8")
+def _analyze_python_source(file_path: Path, source: str) -> tuple[list[SymbolDraft], dict[str, str]]:
     try:
         tree = ast.parse(source)
     except SyntaxError:
-        return []
+        return [], {}
     visitor = PythonSymbolVisitor(file_path, source)
     visitor.visit(tree)
-    return visitor.symbols
+    return visitor.symbols, visitor.imports
+
+
+def analyze_python_file(file_path: Path, source: str | None = None) -> Iterable[SymbolDraft]:
+    if source is None:
+        source = file_path.read_text(encoding="utf-8")
+    return _analyze_python_source(file_path, source)[0]
+
+
+class LineIndex:
+    """Start offsets of every line of a text so line ranges slice in O(1)."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        starts = array("Q", [0])
+        find = text.find
+        position = find("\n")
+        while position != -1:
+            starts.append(position + 1)
+            position = find("\n", position + 1)
+        if len(starts) > 1 and starts[-1] == len(text):
+            starts.pop()
+        self.starts = starts
+
+    def position(self, offset: int) -> tuple[int, int]:
+        """Return the 1-based line and 0-based column of a character offset."""
+
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
+
+    def snippet(self, center_line: int) -> tuple[str, int]:
+        if not self.text:
+            return self.text, 1
+        line_count = len(self.starts)
+        start_index = min(max(0, center_line - 1 - SNIPPET_CONTEXT_LINES), line_count)
+        end_index = min(line_count, center_line - 1 + SNIPPET_CONTEXT_LINES + 1)
+        begin = self.starts[start_index] if start_index < line_count else len(self.text)
+        end = self.starts[end_index] if end_index < line_count else len(self.text)
+        return "\n".join(self.text[begin:end].splitlines()), start_index + 1
 
 
 def extract_snippet(source: str, center_line: int) -> tuple[str, int]:
-    lines = source.splitlines()
-    if not lines:
-        return source, 1
-    start_index = max(0, center_line - 1 - SNIPPET_CONTEXT_LINES)
-    end_index = min(len(lines), center_line - 1 + SNIPPET_CONTEXT_LINES + 1)
-    snippet = "\n".join(lines[start_index:end_index])
-    return snippet, start_index + 1
-
-
-def _build_ts_symbol(
-    *, file_path: Path, source: str, match: re.Match[str], kind: SymbolKind
-) -> SymbolDraft:
-    name = match.group("name")
-    line = source.count("\n", 0, match.start()) + 1
-    column = match.start() - source.rfind("\n", 0, match.start()) - 1
-    identifier = f"{file_path}:{name}:{line}:{column}"
-    snippet, start_line = extract_snippet(source, line)
-    return SymbolDraft(
-        id=identifier,
-        name=name,
-        file_path=str(file_path.relative_to(PROJECT_ROOT)),
-        kind=kind,
-        line=line,
-        column=column,
-        source=snippet,
-        source_start_line=start_line,
-    )
+    return LineIndex(source).snippet(center_line)
+
+
+_LINE_INDEX_CACHE: OrderedDict[str, tuple[int, int, LineIndex]] = OrderedDict()
+_LINE_INDEX_CACHE_SIZE = 64
+_LINE_INDEX_LOCK = threading.Lock()
+
+
+def _line_index_for(file_path: Path) -> LineIndex:
+    """Return the line index of *file_path*, reusing it while the file is unchanged."""
+
+    key = str(file_path)
+    stat = file_path.stat()
+    with _LINE_INDEX_LOCK:
+        cached = _LINE_INDEX_CACHE.get(key)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            _LINE_INDEX_CACHE.move_to_end(key)
+            return cached[2]
+    index = LineIndex(file_path.read_text(encoding="utf-8", errors="replace"))
+    with _LINE_INDEX_LOCK:
+        _LINE_INDEX_CACHE[key] = (stat.st_mtime_ns, stat.st_size, index)
+        _LINE_INDEX_CACHE.move_to_end(key)
+        while len(_LINE_INDEX_CACHE) > _LINE_INDEX_CACHE_SIZE:
+            _LINE_INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def read_symbol_source(draft: SymbolDraft) -> tuple[str, int]:
+    """Return the snippet around *draft* and the line number it starts at."""
+
+    try:
+        index = _line_index_for(PROJECT_ROOT / draft.file_path)
+    except OSError:
+        return "", draft.source_start_line
+    return index.snippet(draft.line)
+
+
+_TS_SYMBOL_KINDS = {
+    "function": SymbolKind.FUNCTION,
+    "class": SymbolKind.CLASS,
+    "variable": SymbolKind.VARIABLE,
+}
 
 
-def analyze_typescript_file(file_path: Path) -> Iterable[SymbolDraft]:
-    source = file_path.read_text(encoding="utf-8")
+def _typescript_import_target(file_path: Path, specifier: str, imported: str | None) -> str:
+    """Dotted target of a TS import, comparable with :func:`module_name_for`."""
+
+    if specifier.startswith("."):
+        target = Path(os.path.normpath(file_path.parent / specifier))
+        try:
+            parts = list(target.relative_to(PROJECT_ROOT).parts)
+        except ValueError:
+            parts = [target.name]
+        if parts and Path(parts[-1]).suffix in {".ts", ".tsx", ".js", ".jsx"}:
+            parts[-1] = Path(parts[-1]).stem
+        if len(parts) > 1 and parts[-1] == "index":
+            parts.pop()
+    else:
+        parts = [part for part in specifier.lstrip("@").split("/") if part]
+    if imported is not None:
+        parts.append(imported)
+    return ".".join(parts)
+
+
+def _analyze_typescript_source(file_path: Path, source: str) -> tuple[list[SymbolDraft], dict[str, str]]:
+    extracted = extract_typescript(source, jsx=file_path.suffix != ".ts")
+    lines = LineIndex(source)
+    module = module_name_for(file_path)
+    relative_path = str(file_path.relative_to(PROJECT_ROOT))
     symbols: list[SymbolDraft] = []
-    for match in TS_FUNCTION_PATTERN.finditer(source):
+    for definition in extracted.definitions:
+        line, column = lines.position(definition.offset)
         symbols.append(
-            _build_ts_symbol(
-                file_path=file_path,
-                source=source,
-                match=match,
-                kind=SymbolKind.FUNCTION,
+            SymbolDraft(
+                id=f"{file_path}:{definition.name}:{line}:{column}",
+                name=definition.name,
+                file_path=relative_path,
+                kind=_TS_SYMBOL_KINDS[definition.kind],
+                line=line,
+                column=column,
+                references=definition.references,
+                module=module,
+                qualname=definition.qualname,
+                owner=definition.owner,
             )
         )
+    imports = {
+        alias: _typescript_import_target(file_path, specifier, imported)
+        for alias, (specifier, imported) in extracted.imports.items()
+    }
+    return symbols, imports
 
-    for match in TS_CLASS_PATTERN.finditer(source):
-        symbols.append(
-            _build_ts_symbol(
-                file_path=file_path,
-                source=source,
-                match=match,
-                kind=SymbolKind.CLASS,
-            )
-        )
 
-    if not symbols:
-        return symbols
+def analyze_typescript_file(file_path: Path, source: str | None = None) -> Iterable[SymbolDraft]:
+    if source is None:
+        source = file_path.read_text(encoding="utf-8")
+    return _analyze_typescript_source(file_path, source)[0]
 
-    return symbols
 
+@dataclass
+class ScanStats:
+    """Counters collected by one walk over ``CODE_DIRECTORIES``."""
 
-def iter_code_files() -> Iterable[Path]:
-    count = 0
+    files: int = 0
+    directories: int = 0
+    # directories not descended into (IGNORED_DIR_NAMES or .gitignore)
+    pruned: int = 0
+    # files excluded by .gitignore
+    ignored: int = 0
+    # files without a code suffix
+    skipped: int = 0
+    # code files larger than MAX_CODE_FILE_BYTES
+    oversized: int = 0
+    # the walk stopped at MAX_FILES_SCANNED
+    truncated: bool = False
+
+
+def _ancestor_ignores(base: Path) -> list[GitIgnore]:
+    """Load the ``.gitignore`` files from ``PROJECT_ROOT`` down to *base*'s parent."""
+
+    try:
+        relative = base.relative_to(PROJECT_ROOT)
+    except ValueError:
+        return []
+    directory = PROJECT_ROOT
+    directories = [directory]
+    for part in relative.parts[:-1]:
+        directory = directory / part
+        directories.append(directory)
+    return [gitignore for gitignore in map(GitIgnore.load, directories) if gitignore is not None]
+
+
+def scan_code_files(stats: ScanStats | None = None) -> Iterator[tuple[Path, os.stat_result]]:
+    """Yield every analysable code file once, together with its stat result.
+
+    Directories are walked with :func:`os.scandir` in name order. Ignored
+    directories are pruned before descending, ``.gitignore`` files are honoured
+    on the way down, and the ``DirEntry`` stat is reused so each file costs a
+    single ``stat`` call.
+    """
+
+    stats = stats if stats is not None else ScanStats()
+    visited: set[str] = set()
     for base in CODE_DIRECTORIES:
-        if not base.exists():
+        if not base.is_dir():
             continue
-        for path in base.rglob("*"):
-            if path.is_file() and path.suffix in {".py", ".ts", ".tsx"}:
-                if any(name in IGNORED_DIR_NAMES for name in path.parts):
+        pending: list[tuple[str, list[GitIgnore]]] = [(str(base), _ancestor_ignores(base))]
+        while pending:
+            directory, ignores = pending.pop()
+            if directory in visited:
+                continue
+            visited.add(directory)
+            stats.directories += 1
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            if any(entry.name == ".gitignore" for entry in entries):
+                local = GitIgnore.load(Path(directory))
+                if local is not None:
+                    ignores = [*ignores, local]
+
+            subdirectories: list[str] = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in IGNORED_DIR_NAMES or (
+                        ignores and is_ignored(ignores, entry.path, entry.name, True)
+                    ):
+                        stats.pruned += 1
+                    else:
+                        subdirectories.append(entry.path)
                     continue
-                if path.stat().st_size > MAX_CODE_FILE_BYTES:
+                if os.path.splitext(entry.name)[1] not in CODE_SUFFIXES or not entry.is_file():
+                    stats.skipped += 1
                     continue
-                yield path
-                count += 1
-                if count >= MAX_FILES_SCANNED:
+                if ignores and is_ignored(ignores, entry.path, entry.name, False):
+                    stats.ignored += 1
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if stat.st_size > MAX_CODE_FILE_BYTES:
+                    stats.oversized += 1
+                    continue
+                if stats.files >= MAX_FILES_SCANNED:
+                    stats.truncated = True
                     return
-                yield path
+                stats.files += 1
+                yield Path(entry.path), stat
+            pending.extend((path, ignores) for path in reversed(subdirectories))
 
 
-def was_cache_hit() -> bool:
-    return _LAST_CACHE_HIT
+def iter_code_files() -> Iterable[Path]:
+    for file_path, _ in scan_code_files():
+        yield file_path
 
 
-def analyse_repository() -> AnalysisResponseModel:
-    global _ANALYSIS_CACHE
-    global _LAST_CACHE_HIT
-    if _ANALYSIS_CACHE is not None:
-        _LAST_CACHE_HIT = True
-        return _ANALYSIS_CACHE
-
-    drafts: list[SymbolDraft] = []
-    for file_path in iter_code_files():
-        if file_path.suffix == ".py":
-            drafts.extend(analyze_python_file(file_path))
-        else:
-            drafts.extend(analyze_typescript_file(file_path))
-
-    symbol_lookup: dict[str, list[SymbolDraft]] = {}
-    for draft in drafts:
-        symbol_lookup.setdefault(draft.name, []).append(draft)
-
-    edges: list[tuple[str, str]] = []
-    for draft in drafts:
-        for reference in draft.references:
-            candidates = symbol_lookup.get(reference)
-            if not candidates:
-                continue
-            target = candidates[0]
-            if draft.id == target.id:
+def fingerprint_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def analyze_file(file_path: Path, fingerprint: FileFingerprint, source: str) -> FileAnalysis:
+    if file_path.suffix == ".py":
+        symbols, imports = _analyze_python_source(file_path, source)
+    else:
+        symbols, imports = _analyze_typescript_source(file_path, source)
+    return FileAnalysis(
+        path=str(file_path),
+        fingerprint=fingerprint,
+        symbols=symbols,
+        module=module_name_for(file_path),
+        imports=imports,
+    )
+
+
+PendingFile = tuple[Path, FileFingerprint, str]
+SELF_NAMES = {"self", "cls", "this"}
+MAX_REEXPORT_DEPTH = 3
+
+
+@dataclass
+class ModuleTable:
+    """Symbols by qualified name and import aliases of one module."""
+
+    path: str
+    symbols: dict[str, SymbolDraft]
+    imports: dict[str, str]
+
+
+def _terminal_name(reference: str) -> str:
+    return reference.rpartition(".")[2]
+
+
+def _import_lookup_names(imports: dict[str, str]) -> set[str]:
+    """Every dotted prefix of the import targets; the module names a lookup may try."""
+
+    names: set[str] = set()
+    for target in imports.values():
+        parts = target.split(".")
+        names.update(".".join(parts[:end]) for end in range(1, len(parts) + 1))
+    return names
+
+
+def _stat_matches(fingerprint: FileFingerprint, stat: os.stat_result) -> bool:
+    return fingerprint.mtime_ns == stat.st_mtime_ns and fingerprint.size == stat.st_size
+
+
+def _analyze_chunk(chunk: list[PendingFile]) -> list[FileAnalysis]:
+    """Process pool entry point: parse one chunk of files in order."""
+
+    return [analyze_file(file_path, fingerprint, source) for file_path, fingerprint, source in chunk]
+
+
+class AnalysisIndex:
+    """Per-file symbol index that only re-parses files whose contents changed.
+
+    Files are keyed by path and validated against ``(mtime, size)`` first and
+    the content hash second, so touching a file without editing it does not
+    trigger a re-parse. Edges are kept per source symbol and only recomputed for
+    symbols that live in a changed file, reference a name whose definitions
+    changed, or live in a module whose imports (directly or through up to
+    ``MAX_REEXPORT_DEPTH`` re-exports) name a changed module.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = ANALYSIS_WORKERS,
+        chunk_size: int = ANALYSIS_CHUNK_SIZE,
+        disk_cache: AnalysisDiskCache | None = None,
+    ) -> None:
+        self.version = 0
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._disk_cache = disk_cache
+        self._executor: Executor | None = None
+        self._files: dict[str, FileAnalysis] = {}
+        self._order: list[str] = []
+        self._rank: dict[str, int] = {}
+        self._drafts: dict[str, SymbolDraft] = {}
+        self._lookup: dict[str, list[SymbolDraft]] = {}
+        self._modules: dict[str, ModuleTable] = {}
+        self._module_suffixes: dict[str, set[str]] = {}
+        # dotted names an import may look up -> modules holding that import
+        self._importers: dict[str, set[str]] = {}
+        self._referrers: dict[str, set[str]] = {}
+        self._edges: dict[str, list[str]] = {}
+        self._snapshot: AnalysisSnapshot | None = None
+        self.search = SymbolSearchIndex()
+        self.scan_stats = ScanStats()
+
+    def refresh(self) -> bool:
+        """Synchronise the index with the file system.
+
+        Returns:
+            ``True`` when at least one file was added, changed or removed.
+        """
+
+        order: list[str] = []
+        pending: list[PendingFile] = []
+        persist: list[FileAnalysis] = []
+        changed: dict[str, FileAnalysis | None] = {}
+        stats = ScanStats()
+        for file_path, stat in scan_code_files(stats):
+            key = str(file_path)
+            order.append(key)
+            item = self._check_file(file_path, stat, persist)
+            if isinstance(item, FileAnalysis):
+                changed[key] = item
+            elif item is not None:
+                pending.append(item)
+
+        for analysis in self._parse(pending):
+            changed[analysis.path] = analysis
+            persist.append(analysis)
+
+        self.scan_stats = stats
+        seen = set(order)
+        for key in self._files:
+            if key not in seen:
+                changed[key] = None
+
+        if self._disk_cache is not None:
+            self._disk_cache.put_many(persist)
+            self._disk_cache.delete_many(key for key, analysis in changed.items() if analysis is None)
+
+        if not changed and order == self._order:
+            return False
+
+        self._order = order
+        self._rank = {key: rank for rank, key in enumerate(self._order)}
+        self._apply(changed)
+        self.version += 1
+        self._snapshot = None
+        return True
+
+    def _check_file(
+        self, file_path: Path, stat: os.stat_result, persist: list[FileAnalysis]
+    ) -> FileAnalysis | PendingFile | None:
+        """Classify *file_path* against the in-memory and on-disk entries.
+
+        Returns ``None`` when the in-memory entry is still current, a restored
+        :class:`FileAnalysis` when the disk cache holds a valid entry, and a
+        pending parse job otherwise. Entries whose fingerprint was refreshed
+        without re-parsing are appended to *persist*.
+        """
+
+        key = str(file_path)
+        previous = self._files.get(key)
+        if previous is None and self._disk_cache is not None:
+            previous = self._disk_cache.get(key)
+            if previous is not None and _stat_matches(previous.fingerprint, stat):
+                return previous
+        elif previous is not None and _stat_matches(previous.fingerprint, stat):
+            return None
+
+        data = file_path.read_bytes()
+        fingerprint = FileFingerprint(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            digest=fingerprint_digest(data),
+        )
+        if previous is not None and previous.fingerprint.digest == fingerprint.digest:
+            previous.fingerprint = fingerprint
+            persist.append(previous)
+            return None if self._files.get(key) is previous else previous
+
+        return file_path, fingerprint, data.decode("utf-8", errors="replace")
+
+    def _parse(self, pending: list[PendingFile]) -> list[FileAnalysis]:
+        """Parse *pending* files, in parallel when a worker pool is configured.
+
+        Chunks are submitted in order and ``Executor.map`` yields them in
+        submission order, so the merged result is identical to a serial run.
+        """
+
+        chunk_size = max(self.chunk_size, 1)
+        if self.workers <= 1 or len(pending) <= chunk_size:
+            return [analyze_file(*item) for item in pending]
+
+        chunks = [pending[start : start + chunk_size] for start in range(0, len(pending), chunk_size)]
+        results: list[FileAnalysis] = []
+        for chunk_result in self._get_executor().map(_analyze_chunk, chunks):
+            results.extend(chunk_result)
+        return results
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # spawn avoids forking a process that already runs event loop threads.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(self.close)
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the worker pool and the disk cache connection."""
+
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+
+    def _apply(self, changed: dict[str, FileAnalysis | None]) -> None:
+        affected_names: set[str] = set()
+        changed_modules: set[str] = set()
+        added: dict[str, list[SymbolDraft]] = {}
+        removed: list[SymbolDraft] = []
+
+        for key, analysis in changed.items():
+            previous = self._files.pop(key, None)
+            if previous is not None:
+                removed.extend(previous.symbols)
+                changed_modules.add(previous.module)
+                affected_names.update(_terminal_name(target) for target in previous.imports.values())
+                self._drop_module(previous)
+                for draft in previous.symbols:
+                    affected_names.add(draft.name)
+                    self._drafts.pop(draft.id, None)
+                    self._edges.pop(draft.id, None)
+                    for reference in draft.references:
+                        referrers = self._referrers.get(_terminal_name(reference))
+                        if referrers is not None:
+                            referrers.discard(draft.id)
+            if analysis is None:
                 continue
-            edges.append((draft.id, target.id))
-            if len(edges) >= MAX_EDGES_EMITTED:
+            self._files[key] = analysis
+            changed_modules.add(analysis.module)
+            affected_names.update(_terminal_name(target) for target in analysis.imports.values())
+            self._add_module(analysis)
+            for draft in analysis.symbols:
+                affected_names.add(draft.name)
+                added.setdefault(draft.name, []).append(draft)
+                self._drafts[draft.id] = draft
+                for reference in draft.references:
+                    self._referrers.setdefault(_terminal_name(reference), set()).add(draft.id)
+
+        self.search.update(removed, (draft for drafts in added.values() for draft in drafts))
+
+        dirty_sources = {draft.id for drafts in added.values() for draft in drafts}
+        for name in affected_names:
+            candidates = [
+                draft
+                for draft in self._lookup.get(name, ())
+                if self._drafts.get(draft.id) is draft
+            ]
+            candidates.extend(added.get(name, ()))
+            if candidates:
+                candidates.sort(key=self._draft_sort_key)
+                self._lookup[name] = candidates
+            else:
+                self._lookup.pop(name, None)
+            dirty_sources.update(self._referrers.get(name, ()))
+
+        # aliased imports and module-suffix ambiguity are not visible in the
+        # terminal names above, so re-resolve every importer of a changed module
+        for module in self._dependent_modules(changed_modules):
+            table = self._modules.get(module)
+            analysis = self._files.get(table.path) if table is not None else None
+            if analysis is not None:
+                dirty_sources.update(draft.id for draft in analysis.symbols)
+
+        for draft_id in dirty_sources:
+            draft = self._drafts.get(draft_id)
+            if draft is not None:
+                self._edges[draft_id] = self._resolve_edges(draft)
+
+    def _add_module(self, analysis: FileAnalysis) -> None:
+        symbols: dict[str, SymbolDraft] = {}
+        for draft in analysis.symbols:
+            symbols.setdefault(draft.qualname or draft.name, draft)
+        self._modules[analysis.module] = ModuleTable(
+            path=analysis.path, symbols=symbols, imports=analysis.imports
+        )
+        parts = analysis.module.split(".")
+        for start in range(len(parts)):
+            self._module_suffixes.setdefault(".".join(parts[start:]), set()).add(analysis.module)
+        for name in _import_lookup_names(analysis.imports):
+            self._importers.setdefault(name, set()).add(analysis.module)
+
+    def _drop_module(self, analysis: FileAnalysis) -> None:
+        table = self._modules.get(analysis.module)
+        if table is None or table.path != analysis.path:
+            return
+        del self._modules[analysis.module]
+        parts = analysis.module.split(".")
+        for start in range(len(parts)):
+            suffix = ".".join(parts[start:])
+            modules = self._module_suffixes.get(suffix)
+            if modules is not None:
+                modules.discard(analysis.module)
+                if not modules:
+                    del self._module_suffixes[suffix]
+        for name in _import_lookup_names(analysis.imports):
+            importers = self._importers.get(name)
+            if importers is not None:
+                importers.discard(analysis.module)
+                if not importers:
+                    del self._importers[name]
+
+    def _dependent_modules(self, changed: set[str]) -> set[str]:
+        """Modules whose import lookups may resolve differently after *changed* changed.
+
+        :meth:`_find_module` matches a name against whole module names and
+        their suffixes, so every suffix of a changed module is checked against
+        the names importers look up. Re-exports are followed transitively, as
+        far as :meth:`_lookup_qualified` follows them.
+        """
+
+        dependents: set[str] = set()
+        frontier = changed
+        for _ in range(MAX_REEXPORT_DEPTH + 1):
+            found: set[str] = set()
+            for module in frontier:
+                parts = module.split(".")
+                for start in range(len(parts)):
+                    found.update(self._importers.get(".".join(parts[start:]), ()))
+            frontier = found - dependents
+            if not frontier:
                 break
-        if len(edges) >= MAX_EDGES_EMITTED:
-            break
-
-    limited_drafts = drafts[:MAX_SYMBOLS_EMITTED]
-    allowed_ids = {draft.id for draft in limited_drafts}
-    limited_edges = [
-        (source, target)
-        for source, target in edges
-        if source in allowed_ids and target in allowed_ids
-    ][:MAX_EDGES_EMITTED]
-
-    result = AnalysisResponseModel(
-        symbols=[
-            SymbolModel(
-                id=draft.id,
-                name=draft.name,
-                filePath=draft.file_path,
-                kind=draft.kind,
-                line=draft.line,
-                column=draft.column,
-                source=draft.source,
-                sourceStartLine=draft.source_start_line,
-            )
-            for draft in limited_drafts
-        ],
-        edges=[
-            DependencyEdgeModel(source=source, target=target)
-            for source, target in limited_edges
-        ],
+            dependents |= frontier
+        return dependents
+
+    def _draft_sort_key(self, draft: SymbolDraft) -> tuple[int, int, int]:
+        rank = self._rank.get(self._path_of(draft), len(self._rank))
+        return rank, draft.line, draft.column
+
+    def _path_of(self, draft: SymbolDraft) -> str:
+        return str(PROJECT_ROOT / draft.file_path)
+
+    def _find_module(self, name: str) -> ModuleTable | None:
+        """Resolve a dotted module name, accepting unambiguous suffixes.
+
+        Imports are written relative to a package root (``src.models``) while
+        module names are relative to the project root
+        (``apps.api.src.models``), so suffixes are indexed as well.
+        """
+
+        table = self._modules.get(name)
+        if table is not None:
+            return table
+        matches = self._module_suffixes.get(name)
+        if matches is not None and len(matches) == 1:
+            return self._modules.get(next(iter(matches)))
+        return None
+
+    def _lookup_qualified(self, dotted: str, depth: int = 0) -> SymbolDraft | None:
+        parts = dotted.split(".")
+        for cut in range(len(parts) - 1, 0, -1):
+            table = self._find_module(".".join(parts[:cut]))
+            if table is None:
+                continue
+            attribute = ".".join(parts[cut:])
+            found = table.symbols.get(attribute)
+            if found is not None:
+                return found
+            if depth >= MAX_REEXPORT_DEPTH:
+                return None
+            head, _, rest = attribute.partition(".")
+            target = table.imports.get(head)
+            if target is not None:
+                # follow re-exports such as ``from .analysis import SymbolModel``
+                return self._lookup_qualified(f"{target}.{rest}" if rest else target, depth + 1)
+            return self._lookup_star(table, attribute, depth + 1)
+        return None
+
+    def _lookup_star(self, table: ModuleTable, attribute: str, depth: int) -> SymbolDraft | None:
+        """Look *attribute* up in the modules *table* star-imports or re-exports."""
+
+        for alias, target in table.imports.items():
+            if alias.startswith("*"):
+                found = self._lookup_qualified(f"{target}.{attribute}", depth)
+                if found is not None:
+                    return found
+        return None
+
+    def _resolve(self, draft: SymbolDraft, reference: str) -> SymbolDraft | None:
+        """Resolve one call reference of *draft* using scopes, imports and names."""
+
+        table = self._modules.get(draft.module)
+        head, _, rest = reference.partition(".")
+        if head in SELF_NAMES and rest:
+            if table is None or draft.owner is None:
+                return None
+            return table.symbols.get(f"{draft.owner}.{rest}")
+
+        if table is not None:
+            if not rest:
+                scope = draft.qualname
+                while scope:
+                    enclosing = table.symbols.get(scope)
+                    if enclosing is None or enclosing.kind is not SymbolKind.CLASS:
+                        found = table.symbols.get(f"{scope}.{reference}")
+                        if found is not None:
+                            return found
+                    scope = scope.rpartition(".")[0]
+            found = table.symbols.get(reference)
+            if found is not None:
+                return found
+            target = table.imports.get(head)
+            if target is not None:
+                return self._lookup_qualified(f"{target}.{rest}" if rest else target)
+            if not rest:
+                found = self._lookup_star(table, reference, 0)
+                if found is not None:
+                    return found
+
+        if rest:
+            return None
+        # Unresolved bare name: only trust it when exactly one top-level
+        # definition with that name exists in the whole repository.
+        candidates = self._lookup.get(reference)
+        if candidates and len(candidates) == 1 and candidates[0].qualname in ("", candidates[0].name):
+            return candidates[0]
+        return None
+
+    def _resolve_edges(self, draft: SymbolDraft) -> list[str]:
+        targets: list[str] = []
+        for reference in sorted(draft.references):
+            target = self._resolve(draft, reference)
+            if target is None or target.id == draft.id or target.id in targets:
+                continue
+            targets.append(target.id)
+        return targets
+
+    def iter_drafts(self) -> Iterable[SymbolDraft]:
+        for key in self._order:
+            analysis = self._files.get(key)
+            if analysis is not None:
+                yield from analysis.symbols
+
+    @property
+    def cached_snapshot(self) -> AnalysisSnapshot | None:
+        return self._snapshot
+
+    def snapshot(self) -> AnalysisSnapshot:
+        """Return the immutable view of the current index version."""
+
+        if self._snapshot is None:
+            symbols = list(self.iter_drafts())
+            edges = [
+                (draft.id, target)
+                for draft in symbols
+                for target in self._edges.get(draft.id, ())
+            ]
+            self._snapshot = AnalysisSnapshot(version=self.version, symbols=symbols, edges=edges)
+        return self._snapshot
+
+    def result(self) -> AnalysisResponseModel:
+        return self.snapshot().response()
+
+
+def symbol_model(draft: SymbolDraft, *, include_source: bool = False) -> SymbolModel:
+    source: str | None = None
+    start_line = draft.source_start_line
+    if include_source:
+        source, start_line = read_symbol_source(draft)
+    return SymbolModel(
+        id=draft.id,
+        name=draft.name,
+        filePath=draft.file_path,
+        kind=draft.kind,
+        line=draft.line,
+        column=draft.column,
+        source=source,
+        sourceStartLine=start_line,
     )
-    _ANALYSIS_CACHE = result
-    _LAST_CACHE_HIT = False
-    return result
+
+
+class AnalysisSnapshot:
+    """Uncapped symbols and edges of one index version.
+
+    Snapshots are never mutated once built, so paginated and streamed readers
+    can keep iterating one while the index moves on to a newer version.
+    """
+
+    def __init__(
+        self,
+        *,
+        version: int,
+        symbols: list[SymbolDraft],
+        edges: list[tuple[str, str]],
+    ) -> None:
+        self.version = version
+        self.symbols = symbols
+        self.edges = edges
+        self._by_id: dict[str, SymbolDraft] | None = None
+        self._adjacency: AdjacencyIndex | None = None
+        self._responses: dict[bool, AnalysisResponseModel] = {}
+        self._payloads: dict[bool, EncodedPayload] = {}
+
+    def adjacency(self) -> AdjacencyIndex:
+        """Return the CSR adjacency of this snapshot, built on first use."""
+
+        if self._adjacency is None:
+            self._adjacency = AdjacencyIndex([draft.id for draft in self.symbols], self.edges)
+        return self._adjacency
+
+    def get_symbol(self, symbol_id: str) -> SymbolDraft | None:
+        if self._by_id is None:
+            self._by_id = {draft.id: draft for draft in self.symbols}
+        return self._by_id.get(symbol_id)
+
+    def response(self, *, include_source: bool = False) -> AnalysisResponseModel:
+        """Return the capped single-body response used by ``/graph/analyze``."""
+
+        response = self._responses.get(include_source)
+        if response is None:
+            limited_drafts = self.symbols[:MAX_SYMBOLS_EMITTED]
+            allowed_ids = {draft.id for draft in limited_drafts}
+            limited_edges = [
+                (source, target)
+                for source, target in self.edges[:MAX_EDGES_EMITTED]
+                if source in allowed_ids and target in allowed_ids
+            ]
+            response = AnalysisResponseModel(
+                symbols=[
+                    symbol_model(draft, include_source=include_source)
+                    for draft in limited_drafts
+                ],
+                edges=[
+                    DependencyEdgeModel(source=source, target=target)
+                    for source, target in limited_edges
+                ],
+            )
+            self._responses[include_source] = response
+        return response
+
+    def encoded_response(self, *, include_source: bool = False) -> EncodedPayload:
+        """Return :meth:`response` serialized once per version, with its ETag."""
+
+        payload = self._payloads.get(include_source)
+        if payload is None:
+            body = self.response(include_source=include_source).model_dump_json().encode("utf-8")
+            payload = EncodedPayload(body)
+            self._payloads[include_source] = payload
+        return payload
+
+
+def open_disk_cache() -> AnalysisDiskCache | None:
+    """Open the on-disk index configured by ``ANALYSIS_CACHE_DIR``, if any."""
+
+    if not ANALYSIS_CACHE_DIR:
+        return None
+    from .analysis_cache import AnalysisDiskCache
+
+    return AnalysisDiskCache(Path(ANALYSIS_CACHE_DIR))
+
+
+# Created on first use: process pool workers (spawn) re-import this module
+# and must not open the disk cache or build an index of their own.
+_INDEX: AnalysisIndex | None = None
+_INDEX_LOCK = threading.Lock()
+_SINGLETON_LOCK = threading.Lock()
+_INFLIGHT: asyncio.Future[AnalysisSnapshot] | None = None
+_FEED: GraphChangeFeed | None = None
+_PUBLISHED: AnalysisSnapshot | None = None
+# Set while a background watcher keeps the index fresh; requests then serve
+# the current snapshot instead of walking the repository themselves.
+_WATCHED = False
+
+
+def get_index() -> AnalysisIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _SINGLETON_LOCK:
+            if _INDEX is None:
+                _INDEX = AnalysisIndex(disk_cache=open_disk_cache())
+    return _INDEX
+
+
+def get_feed() -> GraphChangeFeed:
+    global _FEED
+    if _FEED is None:
+        with _SINGLETON_LOCK:
+            if _FEED is None:
+                _FEED = GraphChangeFeed()
+    return _FEED
+
+
+def latest_snapshot() -> AnalysisSnapshot | None:
+    """Return the last published snapshot without refreshing the index."""
+
+    return _PUBLISHED
+
+
+def set_watched(active: bool) -> None:
+    global _WATCHED
+    _WATCHED = active
+
+
+def is_watched() -> bool:
+    return _WATCHED
+
+
+def refresh_snapshot() -> tuple[AnalysisSnapshot, bool]:
+    """Refresh the shared index and return its current snapshot.
+
+    Returns the snapshot and whether it was served from the cached snapshot
+    (nothing changed since the last refresh). Every version change is
+    published to the change feed so long-poll and SSE subscribers receive
+    the diff.
+    """
+
+    global _PUBLISHED
+    index = get_index()
+    with _INDEX_LOCK:
+        changed = index.refresh()
+        cached = index.cached_snapshot is not None
+        snapshot = index.snapshot()
+        previous = _PUBLISHED
+        if previous is None or previous.version != snapshot.version:
+            # swap first: woken subscribers must already see the new snapshot
+            _PUBLISHED = snapshot
+            get_feed().publish(previous, snapshot)
+    return snapshot, cached and not changed
+
+
+def search_snapshot(query: str, *, limit: int) -> tuple[AnalysisSnapshot, list[SearchHit]]:
+    """Search the index and return the hits with the snapshot of the same version.
+
+    Holds the index lock, so a refresh running in a worker thread cannot move
+    the live search index past the snapshot in between. Blocks while such a
+    refresh is running; call it off the event loop.
+    """
+
+    index = get_index()
+    with _INDEX_LOCK:
+        return index.snapshot(), index.search.search(query, limit=limit)
+
+
+def analyse_repository() -> AnalysisResponseModel:
+    snapshot, _ = refresh_snapshot()
+    return snapshot.response()
+
+
+async def refresh_snapshot_async() -> tuple[AnalysisSnapshot, bool]:
+    """Run :func:`refresh_snapshot` in a worker thread with single-flight.
+
+    Concurrent callers share one in-flight computation instead of each queueing
+    their own scan, and the event loop stays free to serve other requests while
+    the repository is walked and parsed. While the background watcher is
+    running the last published snapshot is returned without touching disk.
+    The cache-hit flag travels with the snapshot, so concurrent requests each
+    report the refresh they actually waited for.
+    """
+
+    global _INFLIGHT
+    if _WATCHED and _PUBLISHED is not None:
+        return _PUBLISHED, True
+    loop = asyncio.get_running_loop()
+    inflight = _INFLIGHT
+    if inflight is None or inflight.get_loop() is not loop:
+        inflight = asyncio.ensure_future(asyncio.to_thread(refresh_snapshot))
+        _INFLIGHT = inflight
+
+        def _clear(future: asyncio.Future[tuple[AnalysisSnapshot, bool]]) -> None:
+            global _INFLIGHT
+            if _INFLIGHT is future:
+                _INFLIGHT = None
+
+        inflight.add_done_callback(_clear)
+    # shield so a cancelled (disconnected) caller does not cancel the shared scan
+    return await asyncio.shield(inflight)
+
+
+async def analyse_repository_async(*, include_source: bool = False) -> AnalysisResponseModel:
+    snapshot, _ = await refresh_snapshot_async()
+    if include_source:
+        # snippets read files from disk, keep that off the event loop as well
+        return await asyncio.to_thread(snapshot.response, include_source=True)
+    return snapshot.response()
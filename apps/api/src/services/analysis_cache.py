@@ -0,0 +1,136 @@
+"""SQLite backed persistent store for per-file analysis results."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Iterable
+
+from ..models import SymbolKind
+from .analysis import FileAnalysis, FileFingerprint, SymbolDraft
+
+# Bump whenever the SymbolDraft layout or the parser output changes so stale
+# entries written by an older build are never served.
+CACHE_SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    payload BLOB NOT NULL
+)
+"""
+
+
+def _encode_analysis(analysis: FileAnalysis) -> bytes:
+    rows = [
+        [
+            draft.id,
+            draft.name,
+            draft.file_path,
+            draft.kind.value,
+            draft.line,
+            draft.column,
+            sorted(draft.references),
+            draft.qualname,
+            draft.owner,
+        ]
+        for draft in analysis.symbols
+    ]
+    document = {"module": analysis.module, "imports": analysis.imports, "symbols": rows}
+    return zlib.compress(json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 1)
+
+
+def _decode_analysis(path: str, fingerprint: FileFingerprint, payload: bytes) -> FileAnalysis:
+    document = json.loads(zlib.decompress(payload).decode("utf-8"))
+    module = document["module"]
+    symbols = [
+        SymbolDraft(
+            id=identifier,
+            name=name,
+            file_path=file_path,
+            kind=SymbolKind(kind),
+            line=line,
+            column=column,
+            references=set(references),
+            module=module,
+            qualname=qualname,
+            owner=owner,
+        )
+        for identifier, name, file_path, kind, line, column, references, qualname, owner in document["symbols"]
+    ]
+    return FileAnalysis(
+        path=path,
+        fingerprint=fingerprint,
+        symbols=symbols,
+        module=module,
+        imports=document["imports"],
+    )
+
+
+class AnalysisDiskCache:
+    """Versioned per-file analysis cache shared by worker processes.
+
+    Each row stores the fingerprint a file had when it was parsed together with
+    the compressed symbol drafts. Rows are only trusted after the caller has
+    validated the fingerprint against the current file stat or content hash.
+    The database runs in WAL mode so several uvicorn workers can read while one
+    of them writes.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"analysis-v{CACHE_SCHEMA_VERSION}.sqlite3"
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={CACHE_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def get(self, path: str) -> FileAnalysis | None:
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, digest, payload FROM files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None
+        mtime_ns, size, digest, payload = row
+        fingerprint = FileFingerprint(mtime_ns=mtime_ns, size=size, digest=digest)
+        try:
+            return _decode_analysis(path, fingerprint, payload)
+        except (KeyError, ValueError, TypeError, zlib.error):
+            return None
+
+    def put_many(self, analyses: Iterable[FileAnalysis]) -> None:
+        rows = [
+            (
+                analysis.path,
+                analysis.fingerprint.mtime_ns,
+                analysis.fingerprint.size,
+                analysis.fingerprint.digest,
+                _encode_analysis(analysis),
+            )
+            for analysis in analyses
+        ]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, payload) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_many(self, paths: Iterable[str]) -> None:
+        rows = [(path,) for path in paths]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", rows)
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,143 @@
+"""LRU/TTL cache of finished chat completions keyed by normalized conversation."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable
+
+from ..providers import CompletionRequest
+from ..settings import env_int, env_str
+
+CHAT_CACHE_ENABLED = env_str("CHAT_CACHE_ENABLED", "true").lower() not in {"0", "false", "no", "off"}
+CHAT_CACHE_MAX_BYTES = env_int("CHAT_CACHE_MAX_BYTES", 8 * 1024 * 1024)
+CHAT_CACHE_MAX_ENTRIES = env_int("CHAT_CACHE_MAX_ENTRIES", 1024)
+CHAT_CACHE_TTL_S = env_int("CHAT_CACHE_TTL_S", 600)
+
+# Rough per-token bookkeeping cost (str object + tuple slot) added to the
+# UTF-8 size so the byte budget tracks actual memory use.
+TOKEN_OVERHEAD_BYTES = 56
+
+
+def completion_key(provider: str, completion: CompletionRequest) -> str:
+    """Hash the normalized conversation and sampling parameters.
+
+    Whitespace runs are collapsed and roles lower-cased, so prompts that only
+    differ in formatting share an entry.
+    """
+
+    document = [
+        provider,
+        completion.model,
+        round(completion.temperature, 4),
+        completion.max_tokens,
+        [[message.role.lower(), " ".join(message.content.split())] for message in completion.messages],
+    ]
+    encoded = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=20).hexdigest()
+
+
+def _entry_size(tokens: tuple[str, ...]) -> int:
+    return sum(len(token.encode("utf-8")) + TOKEN_OVERHEAD_BYTES for token in tokens)
+
+
+@dataclass
+class CompletionCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    rejected: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class CompletionCache:
+    """Token sequences of completed generations, bounded by entries and bytes.
+
+    Only streams that ran to completion are stored (see :meth:`record`), so an
+    aborted or failed generation can never be replayed. Entries expire
+    ``ttl_seconds`` after they were stored.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = CHAT_CACHE_MAX_BYTES,
+        max_entries: int = CHAT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = CHAT_CACHE_TTL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max(max_entries, 1)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[tuple[str, ...], int, float]] = OrderedDict()
+        self.stats = CompletionCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> tuple[str, ...] | None:
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl_seconds > 0 and self._clock() - entry[2] >= self.ttl_seconds:
+            self._drop(key)
+            self.stats.expirations += 1
+            entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[0]
+
+    def put(self, key: str, tokens: tuple[str, ...]) -> bool:
+        size = _entry_size(tokens)
+        if size > self.max_bytes:
+            self.stats.rejected += 1
+            return False
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (tokens, size, self._clock())
+        self.stats.bytes += size
+        self.stats.stores += 1
+        while self.stats.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.stats.evictions += 1
+        self.stats.entries = len(self._entries)
+        return True
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.stats.bytes -= size
+        self.stats.entries = len(self._entries)
+
+    async def record(self, key: str, tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pass *tokens* through and store them once the stream is exhausted."""
+
+        collected: list[str] = []
+        async for token in tokens:
+            collected.append(token)
+            yield token
+        self.put(key, tuple(collected))
+
+
+async def replay(tokens: tuple[str, ...]) -> AsyncIterator[str]:
+    """Yield cached tokens back to back, without provider pacing."""
+
+    for token in tokens:
+        yield token
+
+
+_CACHE = CompletionCache()
+
+
+def get_completion_cache() -> CompletionCache | None:
+    return _CACHE if CHAT_CACHE_ENABLED else None
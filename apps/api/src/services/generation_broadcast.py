@@ -0,0 +1,144 @@
+"""Single-flight fan-out of identical in-flight chat generations."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable
+
+from ..providers import ProviderError
+from .stream_replay import SSE_REPLAY_BUFFER
+
+
+class GenerationBroadcast:
+    """Token buffer of one upstream generation shared by identical requests.
+
+    A background task drains the upstream iterator into ``tokens``; every
+    subscriber walks the buffer from the start (catching up on the prefix it
+    missed) and then waits for new tokens. The task pulls from upstream only
+    while the slowest subscriber is less than ``window`` tokens behind, so
+    readers pace the provider. The upstream stream is cancelled once the last
+    subscriber has gone away.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[str],
+        on_finish: Callable[[GenerationBroadcast], None],
+        *,
+        window: int = SSE_REPLAY_BUFFER,
+    ) -> None:
+        self.tokens: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.window = max(window, 1)
+        self.loop = asyncio.get_running_loop()
+        self._positions: dict[object, int] = {}
+        self._changed = asyncio.Event()
+        self._advanced = asyncio.Event()
+        self._on_finish = on_finish
+        self._task = asyncio.create_task(self._drive(source))
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _wake_driver(self) -> None:
+        advanced, self._advanced = self._advanced, asyncio.Event()
+        advanced.set()
+
+    def _lag(self) -> int:
+        # before the first subscriber starts reading it counts as being at 0
+        slowest = min(self._positions.values(), default=0)
+        return len(self.tokens) - slowest
+
+    async def _drive(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for token in source:
+                self.tokens.append(token)
+                self._wake()
+                while self._lag() >= self.window:
+                    await self._advanced.wait()
+        except asyncio.CancelledError:
+            self.error = ProviderError("generation was cancelled")
+            raise
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.done = True
+            self._wake()
+            self._on_finish(self)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        self.subscribers += 1
+        token = object()
+        index = self._positions[token] = 0
+        try:
+            while True:
+                while index < len(self.tokens):
+                    yield self.tokens[index]
+                    index = self._positions[token] = index + 1
+                    self._wake_driver()
+                if self.done:
+                    break
+                await self._changed.wait()
+        finally:
+            del self._positions[token]
+            self._wake_driver()
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self._task.cancel()
+        error = self.error
+        if isinstance(error, ProviderError):
+            raise ProviderError(str(error), retryable=error.retryable) from error
+        if error is not None:
+            raise ProviderError(f"generation failed: {error!r}") from error
+
+
+@dataclass
+class CoalescerStats:
+    started: int = 0
+    coalesced: int = 0
+    inflight: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class GenerationCoalescer:
+    """Map of request key to the broadcast of its in-flight generation."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, GenerationBroadcast] = {}
+        self.stats = CoalescerStats()
+
+    def attach(self, key: str, start: Callable[[], AsyncIterator[str]]) -> tuple[AsyncIterator[str], bool]:
+        """Subscribe to the generation for *key*, starting it if necessary.
+
+        Returns:
+            The token iterator and whether an existing generation was joined.
+        """
+
+        broadcast = self._inflight.get(key)
+        if broadcast is not None and not broadcast.done and broadcast.loop is asyncio.get_running_loop():
+            self.stats.coalesced += 1
+            return broadcast.subscribe(), True
+
+        def finished(done: GenerationBroadcast) -> None:
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            self.stats.inflight = len(self._inflight)
+
+        broadcast = GenerationBroadcast(start(), finished)
+        self._inflight[key] = broadcast
+        self.stats.started += 1
+        self.stats.inflight = len(self._inflight)
+        return broadcast.subscribe(), False
+
+
+_COALESCER = GenerationCoalescer()
+
+
+def get_coalescer() -> GenerationCoalescer:
+    return _COALESCER
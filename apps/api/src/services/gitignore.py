@@ -0,0 +1,138 @@
+"""Minimal ``.gitignore`` matcher used by the repository walker."""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    pattern: re.Pattern[str]
+    negated: bool
+    directory_only: bool
+    # anchored rules match the path relative to the .gitignore directory,
+    # the others only the final path component
+    anchored: bool
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression body."""
+
+    parts: list[str] = []
+    index = 0
+    length = len(pattern)
+    while index < length:
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("/**", index) and index + 3 == length:
+            parts.append("/.*")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif char == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif char == "?":
+            parts.append("[^/]")
+            index += 1
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+                index += 1
+                continue
+            body = pattern[index + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append("[" + body.replace("\\", "\\\\") + "]")
+            index = end + 1
+        elif char == "\\" and index + 1 < length:
+            parts.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(char))
+            index += 1
+    return "".join(parts)
+
+
+def parse_rule(line: str) -> IgnoreRule | None:
+    """Compile one ``.gitignore`` line, or return ``None`` for blanks/comments."""
+
+    text = line.rstrip("\n")
+    if not text.endswith("\\ "):
+        text = text.rstrip()
+    if not text or text.startswith("#"):
+        return None
+    negated = text.startswith("!")
+    if negated:
+        text = text[1:]
+    elif text.startswith("\\"):
+        # "\#file" and "\!file" escape the leading character
+        text = text[1:]
+    directory_only = text.endswith("/")
+    text = text.rstrip("/")
+    if not text:
+        return None
+    anchored = "/" in text
+    text = text.lstrip("/")
+    return IgnoreRule(
+        pattern=re.compile(f"{_translate(text)}\\Z", re.DOTALL),
+        negated=negated,
+        directory_only=directory_only,
+        anchored=anchored,
+    )
+
+
+class GitIgnore:
+    """Rules of one ``.gitignore`` file, relative to the directory holding it."""
+
+    def __init__(self, base: Path, rules: list[IgnoreRule]) -> None:
+        self.base = base
+        self.rules = rules
+        self._prefix = os.path.join(str(base), "")
+
+    @classmethod
+    def load(cls, directory: Path) -> GitIgnore | None:
+        try:
+            text = (directory / ".gitignore").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        rules = [rule for rule in map(parse_rule, text.splitlines()) if rule is not None]
+        return cls(directory, rules) if rules else None
+
+    def match(self, path: str, name: str, is_dir: bool) -> bool | None:
+        """Return ``True``/``False`` when a rule decides *path*, else ``None``.
+
+        *path* is an absolute file system path and *name* its final component.
+        As in git, the last matching rule wins.
+        """
+
+        if not path.startswith(self._prefix):
+            return None
+        relative = path[len(self._prefix) :]
+        if os.sep != "/":
+            relative = relative.replace(os.sep, "/")
+        decision: bool | None = None
+        for rule in self.rules:
+            if rule.directory_only and not is_dir:
+                continue
+            if rule.pattern.match(relative if rule.anchored else name):
+                decision = not rule.negated
+        return decision
+
+
+def is_ignored(stack: list[GitIgnore], path: str, name: str, is_dir: bool) -> bool:
+    """Evaluate *path* against nested ``.gitignore`` files, deepest last."""
+
+    ignored = False
+    for gitignore in stack:
+        decision = gitignore.match(path, name, is_dir)
+        if decision is not None:
+            ignored = decision
+    return ignored
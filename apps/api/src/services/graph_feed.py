@@ -0,0 +1,117 @@
+"""Version feed of dependency graph diffs for long-poll and SSE clients."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .analysis import AnalysisSnapshot, SymbolDraft
+
+FEED_HISTORY = 32
+
+
+@dataclass(frozen=True)
+class GraphDiff:
+    """Changes between two consecutive graph versions.
+
+    ``added_symbols`` holds both new symbols and symbols whose file was
+    re-parsed, so clients can upsert them by id.
+    """
+
+    version: int
+    previous_version: int
+    added_symbols: list[SymbolDraft] = field(default_factory=list)
+    removed_symbols: list[str] = field(default_factory=list)
+    added_edges: list[tuple[str, str]] = field(default_factory=list)
+    removed_edges: list[tuple[str, str]] = field(default_factory=list)
+
+
+def diff_snapshots(previous: AnalysisSnapshot | None, current: AnalysisSnapshot) -> GraphDiff:
+    """Return the symbol and edge changes from *previous* to *current*."""
+
+    if previous is None:
+        return GraphDiff(
+            version=current.version,
+            previous_version=0,
+            added_symbols=list(current.symbols),
+            added_edges=list(current.edges),
+        )
+    previous_drafts = {draft.id: draft for draft in previous.symbols}
+    current_ids = {draft.id for draft in current.symbols}
+    previous_edges = set(previous.edges)
+    current_edges = set(current.edges)
+    return GraphDiff(
+        version=current.version,
+        previous_version=previous.version,
+        # unchanged files keep their draft objects, so identity is enough here
+        added_symbols=[draft for draft in current.symbols if previous_drafts.get(draft.id) is not draft],
+        removed_symbols=[symbol_id for symbol_id in previous_drafts if symbol_id not in current_ids],
+        added_edges=[edge for edge in current.edges if edge not in previous_edges],
+        removed_edges=[edge for edge in previous.edges if edge not in current_edges],
+    )
+
+
+class GraphChangeFeed:
+    """Bounded history of graph diffs with async wake-ups.
+
+    Diffs are published from whichever thread refreshed the index; waiting
+    coroutines are woken on their own event loop via ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, history: int = FEED_HISTORY) -> None:
+        self._lock = threading.Lock()
+        self._diffs: deque[GraphDiff] = deque(maxlen=history)
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self.version = 0
+
+    def publish(self, previous: AnalysisSnapshot | None, current: AnalysisSnapshot) -> GraphDiff:
+        diff = diff_snapshots(previous, current)
+        with self._lock:
+            self._diffs.append(diff)
+            self.version = diff.version
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # the waiter's loop has already been closed
+                pass
+        return diff
+
+    def since(self, version: int) -> list[GraphDiff] | None:
+        """Return the diffs newer than *version*.
+
+        Returns:
+            ``None`` when the history no longer reaches back to *version*, in
+            which case the client has to fetch the full graph again.
+        """
+
+        with self._lock:
+            if version >= self.version:
+                return []
+            diffs = [diff for diff in self._diffs if diff.version > version]
+        if not diffs or diffs[0].previous_version != version:
+            return None
+        return diffs
+
+    async def wait(self, since: int, timeout: float | None = None) -> int:
+        """Wait until the feed moves past *since* or *timeout* elapses."""
+
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self.version > since:
+                return self.version
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+        return self.version
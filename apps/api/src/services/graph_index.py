@@ -0,0 +1,166 @@
+"""Compressed adjacency structure for dependency graph traversals."""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from typing import Iterable, Literal
+
+Direction = Literal["callers", "callees", "both"]
+
+
+def _build_csr(node_count: int, pairs: list[tuple[int, int]]) -> tuple[array, array]:
+    """Return ``(indptr, indices)`` arrays for the adjacency lists of *pairs*."""
+
+    indptr = array("I", [0]) * (node_count + 1)
+    for source, _ in pairs:
+        indptr[source + 1] += 1
+    for node in range(node_count):
+        indptr[node + 1] += indptr[node]
+    indices = array("I", [0]) * len(pairs)
+    cursor = array("I", indptr[:-1])
+    for source, target in pairs:
+        indices[cursor[source]] = target
+        cursor[source] += 1
+    return indptr, indices
+
+
+class AdjacencyIndex:
+    """CSR (compressed sparse row) view of a dependency graph.
+
+    Symbols are mapped to dense integer ids in snapshot order. Outgoing
+    (callee) and incoming (caller) adjacency are each stored as an ``indptr``
+    array of row offsets plus an ``indices`` array of neighbour ids, so a
+    traversal touches two flat integer arrays instead of Python lists of
+    tuples.
+    """
+
+    def __init__(self, symbol_ids: list[str], edges: Iterable[tuple[str, str]]) -> None:
+        self.symbol_ids = symbol_ids
+        self.positions = {symbol_id: index for index, symbol_id in enumerate(symbol_ids)}
+        pairs: list[tuple[int, int]] = []
+        for source, target in edges:
+            source_index = self.positions.get(source)
+            target_index = self.positions.get(target)
+            if source_index is not None and target_index is not None:
+                pairs.append((source_index, target_index))
+        node_count = len(symbol_ids)
+        self._out_ptr, self._out = _build_csr(node_count, pairs)
+        self._in_ptr, self._in = _build_csr(node_count, [(target, source) for source, target in pairs])
+
+    def callees(self, node: int) -> array:
+        return self._out[self._out_ptr[node] : self._out_ptr[node + 1]]
+
+    def callers(self, node: int) -> array:
+        return self._in[self._in_ptr[node] : self._in_ptr[node + 1]]
+
+    def _adjacent(self, node: int, direction: Direction) -> Iterable[int]:
+        if direction == "callees":
+            return self.callees(node)
+        if direction == "callers":
+            return self.callers(node)
+        return (*self.callees(node), *self.callers(node))
+
+    def neighborhood(
+        self, node: int, *, direction: Direction, depth: int, limit: int
+    ) -> dict[int, int]:
+        """Breadth-first k-hop neighbourhood, mapping node id to hop distance."""
+
+        distances = {node: 0}
+        frontier = deque([node])
+        while frontier and len(distances) < limit:
+            current = frontier.popleft()
+            distance = distances[current]
+            if distance >= depth:
+                continue
+            for neighbour in self._adjacent(current, direction):
+                if neighbour in distances:
+                    continue
+                distances[neighbour] = distance + 1
+                frontier.append(neighbour)
+                if len(distances) >= limit:
+                    break
+        return distances
+
+    def induced_edges(self, nodes: Iterable[int]) -> list[tuple[int, int]]:
+        """Return the edges whose endpoints both lie in *nodes*."""
+
+        members = set(nodes)
+        return [
+            (source, target)
+            for source in sorted(members)
+            for target in self.callees(source)
+            if target in members
+        ]
+
+    def shortest_path(self, source: int, target: int) -> list[int] | None:
+        """Shortest call path from *source* to *target* following callee edges."""
+
+        if source == target:
+            return [source]
+        parents = {source: source}
+        frontier = deque([source])
+        while frontier:
+            current = frontier.popleft()
+            for neighbour in self.callees(current):
+                if neighbour in parents:
+                    continue
+                parents[neighbour] = current
+                if neighbour == target:
+                    path = [target]
+                    while path[-1] != source:
+                        path.append(parents[path[-1]])
+                    path.reverse()
+                    return path
+                frontier.append(neighbour)
+        return None
+
+    def strongly_connected_components(self, min_size: int = 2) -> list[list[int]]:
+        """Iterative Tarjan SCC; returns components with at least *min_size* nodes."""
+
+        node_count = len(self.symbol_ids)
+        index_of = array("i", [-1]) * node_count
+        lowlink = array("i", [0]) * node_count
+        on_stack = bytearray(node_count)
+        stack: list[int] = []
+        components: list[list[int]] = []
+        counter = 0
+
+        for root in range(node_count):
+            if index_of[root] != -1:
+                continue
+            work = [(root, self._out_ptr[root])]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                node, edge = work[-1]
+                if edge < self._out_ptr[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    neighbour = self._out[edge]
+                    if index_of[neighbour] == -1:
+                        index_of[neighbour] = lowlink[neighbour] = counter
+                        counter += 1
+                        stack.append(neighbour)
+                        on_stack[neighbour] = 1
+                        work.append((neighbour, self._out_ptr[neighbour]))
+                    elif on_stack[neighbour]:
+                        lowlink[node] = min(lowlink[node], index_of[neighbour])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component: list[int] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) >= min_size:
+                        components.append(sorted(component))
+        components.sort(key=lambda component: (-len(component), component[0]))
+        return components
@@ -0,0 +1,181 @@
+"""Background task that keeps the analysis index in sync with the file system."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import AsyncIterator, Literal
+
+from ..settings import env_int, env_str
+from . import analysis
+
+logger = logging.getLogger(__name__)
+
+WatchBackend = Literal["watchfiles", "poll"]
+
+ANALYSIS_WATCH = env_str("ANALYSIS_WATCH", "").lower() in {"1", "true", "yes", "on"}
+ANALYSIS_WATCH_BACKEND = env_str("ANALYSIS_WATCH_BACKEND", "auto")
+ANALYSIS_WATCH_DEBOUNCE_MS = env_int("ANALYSIS_WATCH_DEBOUNCE_MS", 300)
+ANALYSIS_WATCH_INTERVAL_MS = env_int("ANALYSIS_WATCH_INTERVAL_MS", 2000)
+
+
+def _is_code_path(path: str) -> bool:
+    candidate = Path(path)
+    if candidate.suffix not in analysis.CODE_SUFFIXES:
+        return False
+    return not any(name in analysis.IGNORED_DIR_NAMES for name in candidate.parts)
+
+
+def _stat_signature() -> dict[str, tuple[int, int]]:
+    """Return ``path -> (mtime_ns, size)`` for every file the index would scan."""
+
+    return {
+        str(file_path): (stat.st_mtime_ns, stat.st_size)
+        for file_path, stat in analysis.scan_code_files()
+    }
+
+
+class GraphWatcher:
+    """Re-index the repository whenever code files change.
+
+    Change notifications come from ``watchfiles`` (inotify/FSEvents) when it is
+    installed and otherwise from a periodic stat scan of ``CODE_DIRECTORIES``.
+    Bursts of events are debounced into one incremental refresh, and every new
+    graph version is published to the analysis change feed. While the watcher
+    runs, request handlers serve the last published snapshot directly.
+    """
+
+    def __init__(
+        self,
+        *,
+        backend: str = ANALYSIS_WATCH_BACKEND,
+        debounce_ms: int = ANALYSIS_WATCH_DEBOUNCE_MS,
+        interval_ms: int = ANALYSIS_WATCH_INTERVAL_MS,
+    ) -> None:
+        self.backend: WatchBackend = self._select_backend(backend)
+        self.debounce = max(debounce_ms, 0) / 1000
+        self.interval = max(interval_ms, 50) / 1000
+        self.refreshes = 0
+        self.last_refresh_at: float | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stop = asyncio.Event()
+
+    @staticmethod
+    def _select_backend(backend: str) -> WatchBackend:
+        if backend == "poll":
+            return "poll"
+        try:
+            import watchfiles  # noqa: F401
+        except ImportError:
+            if backend == "watchfiles":
+                logger.warning("watchfiles is not installed; falling back to stat polling")
+            return "poll"
+        return "watchfiles"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="graph-watcher")
+
+    async def stop(self) -> None:
+        task = self._task
+        self._task = None
+        analysis.set_watched(False)
+        if task is None:
+            return
+        self._stop.set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _refresh(self) -> None:
+        # call the blocking refresh directly: the async variant short-circuits
+        # to the published snapshot while the watcher is active
+        await asyncio.to_thread(analysis.refresh_snapshot)
+        self.refreshes += 1
+        self.last_refresh_at = time.time()
+
+    async def _run(self) -> None:
+        # requests keep scanning on their own until the first snapshot is out
+        analysis.set_watched(True)
+        try:
+            # take the poll baseline first so edits made during the initial
+            # refresh are picked up by the next scan
+            baseline = await asyncio.to_thread(_stat_signature) if self.backend == "poll" else {}
+            await self._refresh()
+            changes = self._watchfiles_changes() if self.backend == "watchfiles" else self._poll_changes(baseline)
+            async for _ in changes:
+                try:
+                    await self._refresh()
+                except Exception:  # pragma: no cover - keep watching after a bad refresh
+                    logger.exception("background re-index failed")
+        finally:
+            analysis.set_watched(False)
+
+    async def _watchfiles_changes(self) -> AsyncIterator[None]:
+        from watchfiles import awatch
+
+        directories = [base for base in analysis.CODE_DIRECTORIES if base.exists()]
+        try:
+            async for _ in awatch(
+                *directories,
+                watch_filter=lambda _change, path: _is_code_path(path),
+                debounce=int(self.debounce * 1000),
+                stop_event=self._stop,
+            ):
+                yield None
+        except (OSError, RuntimeError) as exc:
+            # e.g. inotify watch limits; keep the graph fresh by polling instead
+            logger.warning("file watching failed (%s); falling back to stat polling", exc)
+            self.backend = "poll"
+            async for _ in self._poll_changes(await asyncio.to_thread(_stat_signature)):
+                yield None
+
+    async def _poll_changes(self, previous: dict[str, tuple[int, int]]) -> AsyncIterator[None]:
+        while not self._stop.is_set():
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(_stat_signature)
+            if current == previous:
+                continue
+            # debounce: wait until the tree stops changing before re-indexing
+            while self.debounce:
+                await asyncio.sleep(self.debounce)
+                settled = await asyncio.to_thread(_stat_signature)
+                if settled == current:
+                    break
+                current = settled
+            previous = current
+            yield None
+
+
+_WATCHER: GraphWatcher | None = None
+
+
+def get_watcher() -> GraphWatcher | None:
+    return _WATCHER
+
+
+def start_watcher() -> GraphWatcher:
+    """Start the shared watcher on the running loop (idempotent)."""
+
+    global _WATCHER
+    if _WATCHER is None:
+        _WATCHER = GraphWatcher()
+    _WATCHER.start()
+    return _WATCHER
+
+
+async def stop_watcher() -> None:
+    global _WATCHER
+    watcher, _WATCHER = _WATCHER, None
+    if watcher is not None:
+        await watcher.stop()
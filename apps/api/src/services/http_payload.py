@@ -0,0 +1,109 @@
+"""Pre-encoded response bodies with strong ETags and cached compression."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+
+try:  # optional dependency, gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Compressing tiny bodies costs more than it saves.
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _accepted_encodings(accept_encoding: str | None) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+class EncodedPayload:
+    """A serialized body plus its compressed variants, built at most once each.
+
+    The ETag is derived from the body bytes, so it stays stable across
+    processes and restarts as long as the content is identical. Each content
+    coding gets its own strong tag (``"<hash>"``, ``"<hash>-gzip"``,
+    ``"<hash>-br"``), and ``If-None-Match`` accepts any of them.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json") -> None:
+        self.body = body
+        self.media_type = media_type
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._compressed: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def etag(self, encoding: str | None = None) -> str:
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Weak comparison of an ``If-None-Match`` header against this body."""
+
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag.strip('"').partition("-")[0] == self.digest:
+                return True
+        return False
+
+    def negotiate(self, accept_encoding: str | None) -> str | None:
+        """Pick ``br`` or ``gzip`` according to ``Accept-Encoding``."""
+
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            return None
+        accepted = _accepted_encodings(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+        best: str | None = None
+        best_quality = 0.0
+        for encoding in candidates:
+            quality = accepted.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def is_encoded(self, encoding: str | None) -> bool:
+        return encoding is None or encoding in self._compressed
+
+    def encoded(self, encoding: str | None) -> bytes:
+        """Return the body in *encoding*, compressing it on first use."""
+
+        if encoding is None:
+            return self.body
+        cached = self._compressed.get(encoding)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._compressed.get(encoding)
+            if cached is None:
+                if encoding == "gzip":
+                    cached = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                elif encoding == "br" and brotli is not None:
+                    cached = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    raise ValueError(f"unsupported content encoding: {encoding}")
+                self._compressed[encoding] = cached
+        return cached
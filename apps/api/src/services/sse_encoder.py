@@ -0,0 +1,127 @@
+"""Incremental SSE encoding of chat events and latency/size bounded frame coalescing."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from uuid import uuid4
+
+from ..settings import env_int
+
+try:  # optional dependency, the stdlib encoder is always available
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+SSE_FLUSH_MAX_LATENCY_MS = env_int("SSE_FLUSH_MAX_LATENCY_MS", 15)
+SSE_FLUSH_MAX_BYTES = env_int("SSE_FLUSH_MAX_BYTES", 8192)
+
+COST_PER_TOKEN = 0.000002
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps(value: object) -> bytes:
+    """Compact UTF-8 JSON, via orjson when it is installed."""
+
+    if orjson is not None:
+        return orjson.dumps(value)
+    return _ENCODER.encode(value).encode("utf-8")
+
+
+class ChatEventEncoder:
+    """Encodes chat stream events straight to ``data:`` lines.
+
+    Only the token text goes through the JSON encoder; the fixed parts of
+    each event are byte templates, usage is tracked as a counter, event ids
+    are ``<stream prefix>-<index>`` instead of a fresh UUID per token, and
+    the ISO timestamp is re-rendered at most once per millisecond.
+    """
+
+    def __init__(self, *, session_id: str | None = None) -> None:
+        self.session_id = session_id
+        self.total_tokens = 0
+        self._id_prefix = uuid4().hex.encode("ascii")
+        self._stamp = b""
+        self._stamp_ms = -1
+
+    def _timestamp(self) -> bytes:
+        now_ms = int(time.time() * 1000)
+        if now_ms != self._stamp_ms:
+            self._stamp_ms = now_ms
+            moment = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+            self._stamp = moment.isoformat().encode("ascii")
+        return self._stamp
+
+    def _usage(self) -> bytes:
+        cost = dumps(round(self.total_tokens * COST_PER_TOKEN, 6))
+        return b'"usage":{"totalTokens":%d,"totalCostUsd":%s}' % (self.total_tokens, cost)
+
+    def token(self, token: str) -> bytes:
+        index = self.total_tokens
+        self.total_tokens += 1
+        return b'data: {"type":"token","payload":{"id":"%s-%d","token":%s,"index":%d,"timestamp":"%s"},%s}\n\n' % (
+            self._id_prefix,
+            index,
+            dumps(token),
+            index,
+            self._timestamp(),
+            self._usage(),
+        )
+
+    def completed(self) -> bytes:
+        session = b"" if self.session_id is None else b',"sessionId":%s' % dumps(self.session_id)
+        return b'data: {"type":"completed",%s%s}\n\n' % (self._usage(), session)
+
+    def error(self, message: str) -> bytes:
+        return b'data: {"type":"error","message":%s}\n\n' % dumps(message)
+
+
+class FrameBuffer:
+    """Coalesces encoded SSE events into frames handed to *publish*.
+
+    The first event is flushed immediately so time-to-first-token is not
+    delayed. After that, pending events are flushed when they reach
+    ``max_bytes`` or when the oldest has waited ``max_latency_ms``, so a
+    fast producer results in a few large writes instead of one per token.
+    A latency of 0 disables coalescing.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[bytes], object],
+        *,
+        max_latency_ms: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self._publish = publish
+        latency = SSE_FLUSH_MAX_LATENCY_MS if max_latency_ms is None else max_latency_ms
+        self.max_latency_s = max(latency, 0) / 1000
+        self.max_bytes = SSE_FLUSH_MAX_BYTES if max_bytes is None else max_bytes
+        self.frames = 0
+        self._parts: list[bytes] = []
+        self._size = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def append(self, event: bytes) -> None:
+        self._parts.append(event)
+        self._size += len(event)
+        if self.frames == 0 or self.max_latency_s <= 0 or self._size >= self.max_bytes:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_latency_s, self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._parts:
+            return
+        frame = b"".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self.frames += 1
+        self._publish(frame)
@@ -0,0 +1,242 @@
+"""Resumable SSE streams: producers decoupled from connections plus replay rings."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Generic, TypeVar
+from uuid import uuid4
+
+from ..metrics.store import record_cancellation
+from ..settings import env_int
+
+SSE_REPLAY_BUFFER = env_int("SSE_REPLAY_BUFFER", 1024)
+SSE_REPLAY_GRACE_S = env_int("SSE_REPLAY_GRACE_S", 30)
+
+T = TypeVar("T")
+
+
+class ResumeError(LookupError):
+    """The requested position is no longer (or not yet) in the replay buffer."""
+
+
+def format_event_id(stream_id: str, seq: int) -> str:
+    return f"{stream_id}:{seq}"
+
+
+def parse_event_id(value: str | None) -> tuple[str, int] | None:
+    """Split a ``Last-Event-ID`` of the form ``<stream id>:<seq>``."""
+
+    if not value:
+        return None
+    stream_id, _, seq = value.strip().rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+class ReplayStream(Generic[T]):
+    """Events of one logical SSE stream, numbered 1, 2, 3, ...
+
+    A producer task publishes events independently of any connection. The
+    last ``capacity`` events are kept in a ring indexed by sequence number,
+    so a reconnecting client can resume after the last id it saw. Producers
+    await :meth:`writable` before publishing, which holds them back while the
+    slowest live subscriber is ``capacity`` events behind; with nobody
+    attached they run freely. When the
+    last subscriber leaves, the stream is kept for ``grace_seconds``; if
+    nobody reconnects by then, an unfinished producer is cancelled and the
+    stream is dropped. Both events are counted in the metrics store under
+    ``label`` as ``disconnected`` and ``abandoned``.
+    """
+
+    def __init__(
+        self,
+        stream_id: str,
+        *,
+        label: str = "",
+        capacity: int = SSE_REPLAY_BUFFER,
+        grace_seconds: float = SSE_REPLAY_GRACE_S,
+        on_expire: Callable[[ReplayStream[T]], None] | None = None,
+    ) -> None:
+        self.stream_id = stream_id
+        self.label = label
+        self.capacity = max(capacity, 1)
+        # one spare slot: a FrameBuffer latency flush may publish a frame
+        # while the producer is parked in writable()
+        self._slots = self.capacity + 1
+        self.grace_seconds = grace_seconds
+        self.next_seq = 1
+        self.done = False
+        self.subscribers = 0
+        self._positions: dict[object, int] = {}
+        # producer-maintained details (usage, cache hit...) every connection reports
+        self.meta: dict[str, object] = {}
+        self._ring: list[T | None] = [None] * self._slots
+        self._changed = asyncio.Event()
+        self._advanced = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task: asyncio.Task[None] | None = None
+        self._expiry: asyncio.TimerHandle | None = None
+        self._on_expire = on_expire
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(1, self.next_seq - self.capacity)
+
+    def start(self, producer: Callable[[ReplayStream[T]], Awaitable[None]]) -> None:
+        self._task = asyncio.create_task(self._run(producer))
+
+    async def _run(self, producer: Callable[[ReplayStream[T]], Awaitable[None]]) -> None:
+        try:
+            await producer(self)
+        finally:
+            self.done = True
+            self._wake()
+            if self.subscribers == 0:
+                self._schedule_expiry()
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _wake_producer(self) -> None:
+        advanced, self._advanced = self._advanced, asyncio.Event()
+        advanced.set()
+
+    def _lag(self) -> int:
+        if not self._positions:
+            return 0
+        return self.next_seq - min(self._positions.values())
+
+    async def writable(self) -> None:
+        """Wait until the slowest live subscriber is less than ``capacity`` events behind."""
+
+        while self._lag() >= self.capacity:
+            await self._advanced.wait()
+
+    def publish(self, item: T) -> int:
+        seq = self.next_seq
+        self._ring[seq % self._slots] = item
+        self.next_seq = seq + 1
+        self._wake()
+        return seq
+
+    def check_resume(self, after: int) -> None:
+        """Raise :class:`ResumeError` unless events after *after* can be replayed."""
+
+        if after >= self.next_seq or after + 1 < self.oldest_seq:
+            raise ResumeError(f"cannot resume stream {self.stream_id} after event {after}")
+
+    async def subscribe(self, after: int = 0) -> AsyncIterator[tuple[int, T]]:
+        """Yield ``(seq, item)`` for every event after *after*, live until done."""
+
+        self.check_resume(after)
+        self.subscribers += 1
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        token = object()
+        position = self._positions[token] = after + 1
+        try:
+            while True:
+                while position < self.next_seq:
+                    if position < self.next_seq - self._slots:
+                        # only reachable when a producer publishes without awaiting writable()
+                        raise ResumeError(f"subscriber fell behind the replay buffer of {self.stream_id}")
+                    item = self._ring[position % self._slots]
+                    yield position, item  # type: ignore[misc]
+                    position = self._positions[token] = position + 1
+                    self._wake_producer()
+                if self.done:
+                    return
+                await self._changed.wait()
+        finally:
+            del self._positions[token]
+            self._wake_producer()
+            self.subscribers -= 1
+            if not self.done:
+                record_cancellation(self.label, "disconnected")
+            if self.subscribers == 0:
+                self._schedule_expiry()
+
+    def _schedule_expiry(self) -> None:
+        if self._expiry is not None:
+            self._expiry.cancel()
+        if self._loop.is_closed():
+            return
+        self._expiry = self._loop.call_later(self.grace_seconds, self._expire)
+
+    def _expire(self) -> None:
+        self._expiry = None
+        if self.subscribers:
+            return
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            record_cancellation(self.label, "abandoned")
+        if self._on_expire is not None:
+            self._on_expire(self)
+
+
+class StreamRegistry:
+    """Live :class:`ReplayStream` instances by stream id."""
+
+    def __init__(self, *, capacity: int = SSE_REPLAY_BUFFER, grace_seconds: float = SSE_REPLAY_GRACE_S) -> None:
+        self.capacity = capacity
+        self.grace_seconds = grace_seconds
+        self._streams: dict[str, ReplayStream[object]] = {}
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def create(
+        self,
+        producer: Callable[[ReplayStream[T]], Awaitable[None]],
+        *,
+        label: str = "",
+        grace_seconds: float | None = None,
+    ) -> ReplayStream[T]:
+        stream: ReplayStream[T] = ReplayStream(
+            uuid4().hex,
+            label=label,
+            capacity=self.capacity,
+            grace_seconds=self.grace_seconds if grace_seconds is None else grace_seconds,
+            on_expire=self._forget,
+        )
+        self._streams[stream.stream_id] = stream  # type: ignore[assignment]
+        stream.start(producer)
+        return stream
+
+    def _forget(self, stream: ReplayStream[T]) -> None:
+        if self._streams.get(stream.stream_id) is stream:
+            del self._streams[stream.stream_id]
+
+    def resume(
+        self, last_event_id: str | None, *, label: str | None = None
+    ) -> tuple[ReplayStream[object], int] | None:
+        """Return the stream and position named by a ``Last-Event-ID`` header.
+
+        Returns ``None`` when the header is absent, malformed or names a stream
+        that is unknown (expired, served by another process or, when *label* is
+        given, created by another route); callers then start a fresh stream.
+        Raises :class:`ResumeError` when the stream is known but the position
+        has already left its buffer.
+        """
+
+        parsed = parse_event_id(last_event_id)
+        if parsed is None:
+            return None
+        stream_id, after = parsed
+        stream = self._streams.get(stream_id)
+        if stream is None or stream._loop is not asyncio.get_running_loop():
+            return None
+        if label is not None and stream.label != label:
+            return None
+        stream.check_resume(after)
+        return stream, after
+
+
+_REGISTRY = StreamRegistry()
+
+
+def get_stream_registry() -> StreamRegistry:
+    return _REGISTRY
@@ -0,0 +1,131 @@
+"""In-memory prefix and trigram search over analysed symbol names."""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .analysis import SymbolDraft
+
+MIN_FUZZY_QUERY_LENGTH = 3
+MIN_FUZZY_SIMILARITY = 0.3
+# Prefix matches are enumerated from the sorted name array; this bounds the
+# scan for very short queries such as a single letter.
+PREFIX_SCAN_FACTOR = 8
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the padded trigrams of *text* (``pg_trgm`` style)."""
+
+    padded = f"  {text} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    draft: SymbolDraft
+    score: float
+    match: str
+
+
+class SymbolSearchIndex:
+    """Sorted name array for prefix lookups plus a trigram index for fuzzy ones.
+
+    The index is updated with the drafts that the analysis index adds and
+    removes, so it never has to be rebuilt from the full symbol list. All
+    access is serialised by a lock that is only held for the in-memory update,
+    never while files are being parsed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sorted: list[tuple[str, str]] = []
+        self._drafts: dict[str, SymbolDraft] = {}
+        self._trigrams: dict[str, set[str]] = {}
+        self._trigram_counts: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._drafts)
+
+    def update(self, removed: Iterable[SymbolDraft], added: Iterable[SymbolDraft]) -> None:
+        with self._lock:
+            for draft in removed:
+                self._remove(draft)
+            for draft in added:
+                self._add(draft)
+
+    def _add(self, draft: SymbolDraft) -> None:
+        if draft.id in self._drafts:
+            self._remove(self._drafts[draft.id])
+        key = draft.name.lower()
+        self._drafts[draft.id] = draft
+        insort(self._sorted, (key, draft.id))
+        grams = trigrams(key)
+        self._trigram_counts[draft.id] = len(grams)
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(draft.id)
+
+    def _remove(self, draft: SymbolDraft) -> None:
+        current = self._drafts.get(draft.id)
+        if current is not draft:
+            return
+        key = draft.name.lower()
+        del self._drafts[draft.id]
+        position = bisect_left(self._sorted, (key, draft.id))
+        if position < len(self._sorted) and self._sorted[position] == (key, draft.id):
+            del self._sorted[position]
+        self._trigram_counts.pop(draft.id, None)
+        for gram in trigrams(key):
+            postings = self._trigrams.get(gram)
+            if postings is None:
+                continue
+            postings.discard(draft.id)
+            if not postings:
+                del self._trigrams[gram]
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Return up to *limit* hits ranked exact > prefix > fuzzy."""
+
+        needle = query.strip().lower()
+        if not needle or limit <= 0:
+            return []
+
+        scores: dict[str, tuple[float, str]] = {}
+        with self._lock:
+            position = bisect_left(self._sorted, (needle, ""))
+            scan_limit = max(limit * PREFIX_SCAN_FACTOR, 64)
+            for key, draft_id in self._sorted[position : position + scan_limit]:
+                if not key.startswith(needle):
+                    break
+                if key == needle:
+                    scores[draft_id] = (1.0, "exact")
+                else:
+                    scores[draft_id] = (0.5 + 0.4 * len(needle) / len(key), "prefix")
+
+            if len(needle) >= MIN_FUZZY_QUERY_LENGTH:
+                query_grams = trigrams(needle)
+                shared: Counter[str] = Counter()
+                for gram in query_grams:
+                    shared.update(self._trigrams.get(gram, ()))
+                for draft_id, common in shared.items():
+                    if draft_id in scores:
+                        continue
+                    union = len(query_grams) + self._trigram_counts[draft_id] - common
+                    similarity = common / union
+                    if similarity >= MIN_FUZZY_SIMILARITY:
+                        scores[draft_id] = (0.5 * similarity, "fuzzy")
+
+            ranked = heapq.nsmallest(
+                limit,
+                scores.items(),
+                key=lambda item: (-item[1][0], self._drafts[item[0]].name, item[0]),
+            )
+            return [
+                SearchHit(draft=self._drafts[draft_id], score=round(score, 4), match=match)
+                for draft_id, (score, match) in ranked
+            ]
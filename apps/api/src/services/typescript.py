@@ -0,0 +1,473 @@
+"""Single-pass tokenizer based symbol extraction for TypeScript/TSX sources."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<string>'(?:\\.|[^'\\\n])*'?|"(?:\\.|[^"\\\n])*"?)
+    | (?P<template>`)
+    | (?P<ident>[A-Za-z_$][\w$]*)
+    | (?P<number>\d[\w.]*|\.\d\w*)
+    | (?P<punct>=>|\.\.\.|\?\.|[{}()\[\];,.<>=:?!+\-*/%&|^~@\#])
+    """,
+    re.S | re.X,
+)
+_TEMPLATE_CHUNK = re.compile(r"(?:\\.|\$(?!\{)|[^`\\$])*(`|\$\{|\Z)", re.S)
+_REGEX_LITERAL = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*")
+_JSX_OPENING = re.compile(r"<\s*(?:[A-Za-z_$]|>)")
+# ``<T,>``, ``<T extends U>``, ``<T = V>`` and ``<T>(`` are type parameters, not elements
+_TYPE_PARAMETERS = re.compile(r"<\s*[A-Za-z_$][\w$]*\s*(?:,|extends\b|=\s*[^\s\"'{]|>\s*\()")
+_JSX_TEXT = re.compile(r"[^<{]*")
+_JSX_CLOSING = re.compile(r"<\s*/\s*[\w$.:-]*\s*>")
+
+# After these tokens a ``/`` starts a regular expression rather than a division.
+_REGEX_PREFIX_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+_CALL_KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "function", "return", "typeof", "super",
+    "import", "delete", "void", "with", "do", "else", "in", "of", "instanceof", "await",
+}
+_MEMBER_MODIFIERS = {
+    "public", "private", "protected", "static", "readonly", "async", "get", "set",
+    "override", "abstract", "declare", "accessor",
+}
+_STATEMENT_KEYWORDS = {"const", "let", "var", "function", "class", "export", "import"}
+_ARROW_LOOKAHEAD = 64
+
+Token = tuple[str, str, int]
+
+
+def tokenize(source: str, *, jsx: bool = True) -> list[Token]:
+    """Split *source* into ``(kind, value, offset)`` tokens.
+
+    Whitespace and comments are dropped. Strings, template literals and regular
+    expression literals become single opaque tokens so their contents never
+    look like code; ``${...}`` template expressions are tokenized as code.
+    With *jsx*, the text children of elements are dropped as well, so an
+    apostrophe in ``<p>Don't</p>`` does not open a string.
+    """
+
+    tokens: list[Token] = []
+    braces: list[bool] = []  # True for a ``${`` template expression
+    # open JSX elements: [brace depth outside the element, still in the opening tag]
+    elements: list[list] = []
+    position = 0
+    length = len(source)
+    match = _TOKEN_PATTERN.match
+    while position < length:
+        char = source[position]
+        if elements and len(braces) == elements[-1][0]:
+            if not elements[-1][1]:
+                position = _JSX_TEXT.match(source, position).end()
+                if position >= length:
+                    break
+                closing = _JSX_CLOSING.match(source, position)
+                if closing is not None:
+                    elements.pop()
+                    position = closing.end()
+                    continue
+                char = source[position]
+                if char == "<":
+                    elements.append([len(braces), True])
+                    tokens.append(("punct", "<", position))
+                    position += 1
+                    continue
+            elif char == ">" or source.startswith("/>", position):
+                # end of the opening tag: children follow unless it closed itself
+                if char == ">":
+                    elements[-1][1] = False
+                    tokens.append(("punct", ">", position))
+                    position += 1
+                else:
+                    elements.pop()
+                    tokens.append(("punct", "/", position))
+                    tokens.append(("punct", ">", position + 1))
+                    position += 2
+                continue
+        if (
+            jsx
+            and char == "<"
+            and _regex_allowed(tokens)
+            and _JSX_OPENING.match(source, position)
+            and not _TYPE_PARAMETERS.match(source, position)
+        ):
+            elements.append([len(braces), source[position + 1 :].lstrip()[:1] != ">"])
+            tokens.append(("punct", "<", position))
+            position += 1
+            continue
+        if char == "/" and _regex_allowed(tokens) and not source.startswith(("//", "/*"), position):
+            literal = _REGEX_LITERAL.match(source, position)
+            if literal is not None:
+                tokens.append(("regex", literal.group(), position))
+                position = literal.end()
+                continue
+        if char == "}" and braces and braces[-1]:
+            braces.pop()
+            position = _scan_template(source, position + 1, tokens, braces, position)
+            continue
+        found = match(source, position)
+        if found is None:
+            position += 1
+            continue
+        kind = found.lastgroup
+        value = found.group()
+        if kind == "template":
+            position = _scan_template(source, found.end(), tokens, braces, position)
+            continue
+        if kind not in ("space", "comment"):
+            tokens.append((kind, value, position))  # type: ignore[arg-type]
+            if value == "{":
+                braces.append(False)
+            elif value == "}" and braces:
+                braces.pop()
+        position = found.end()
+    return tokens
+
+
+def _scan_template(
+    source: str, position: int, tokens: list[Token], braces: list[bool], start: int
+) -> int:
+    chunk = _TEMPLATE_CHUNK.match(source, position)
+    assert chunk is not None  # the pattern can always match the empty string
+    if chunk.group(1) == "${":
+        braces.append(True)
+    if not tokens or tokens[-1][0] != "template" or tokens[-1][2] != start:
+        tokens.append(("template", "`", start))
+    return chunk.end()
+
+
+def _regex_allowed(tokens: list[Token]) -> bool:
+    if not tokens:
+        return True
+    kind, value, _ = tokens[-1]
+    if kind == "punct":
+        # ``</`` closes a JSX element
+        return value not in (")", "]", "}", "<")
+    return kind == "ident" and value in _REGEX_PREFIX_WORDS
+
+
+@dataclass
+class TsDefinition:
+    name: str
+    kind: str
+    offset: int
+    qualname: str
+    owner: str | None = None
+    references: set[str] = field(default_factory=set)
+
+
+@dataclass
+class TsModule:
+    definitions: list[TsDefinition]
+    # local alias -> (module specifier, imported name or None for namespaces);
+    # ``export * from`` re-exports are keyed as ``*<specifier>``
+    imports: dict[str, tuple[str, str | None]]
+
+
+@dataclass
+class _Scope:
+    definition: TsDefinition
+    brace_depth: int
+    paren_depth: int
+    expression: bool = False
+    is_class: bool = False
+
+
+def _matching(tokens: list[Token], index: int, opening: str, closing: str) -> int:
+    """Index of the token closing the bracket at *index*, or -1."""
+
+    depth = 0
+    for position in range(index, len(tokens)):
+        value = tokens[position][1]
+        if tokens[position][0] != "punct":
+            continue
+        if value == opening:
+            depth += 1
+        elif value == closing:
+            depth -= 1
+            if depth == 0:
+                return position
+    return -1
+
+
+def _starts_jsx_component(tokens: list[Token], index: int) -> bool:
+    """Whether the ``<`` at *index* opens a JSX element of a capitalised component.
+
+    A ``<`` directly after an identifier or closing bracket is a comparison or
+    a type argument list instead.
+    """
+
+    if index + 1 >= len(tokens):
+        return False
+    kind, name, _ = tokens[index + 1]
+    if kind != "ident" or not name[:1].isupper():
+        return False
+    if index == 0:
+        return True
+    previous_kind, previous, _ = tokens[index - 1]
+    if previous_kind == "ident":
+        return previous in _REGEX_PREFIX_WORDS
+    return previous not in (")", "]")
+
+
+def _function_value(tokens: list[Token], index: int) -> int:
+    """Classify the initializer starting at *index*.
+
+    Returns the index of the ``=>`` (or ``function`` keyword) when the value is
+    a function, and -1 otherwise.
+    """
+
+    if index < len(tokens) and tokens[index][1] == "async":
+        index += 1
+    if index >= len(tokens):
+        return -1
+    kind, value, _ = tokens[index]
+    if kind == "ident" and value == "function":
+        return index
+    if kind == "ident":
+        return index + 1 if index + 1 < len(tokens) and tokens[index + 1][1] == "=>" else -1
+    if value == "<":
+        index = _matching(tokens, index, "<", ">") + 1
+        if index <= 0 or index >= len(tokens):
+            return -1
+        value = tokens[index][1]
+    if value != "(":
+        return -1
+    closing = _matching(tokens, index, "(", ")")
+    if closing == -1:
+        return -1
+    for position in range(closing + 1, min(len(tokens), closing + _ARROW_LOOKAHEAD)):
+        value = tokens[position][1]
+        if value == "=>":
+            return position
+        if position == closing + 1 and value != ":":
+            return -1
+        if value in (";", "{", "}"):
+            return -1
+    return -1
+
+
+def extract_typescript(source: str, *, jsx: bool = True) -> TsModule:
+    """Extract definitions, call references and imports in one token pass."""
+
+    tokens = tokenize(source, jsx=jsx)
+    definitions: list[TsDefinition] = []
+    imports: dict[str, tuple[str, str | None]] = {}
+    scopes: list[_Scope] = []
+    pending: tuple[TsDefinition, int, bool] | None = None
+    brace_depth = 0
+    paren_depth = 0
+    skip_until = -1
+
+    def enclosing() -> TsDefinition | None:
+        return scopes[-1].definition if scopes else None
+
+    def define(name: str, kind: str, offset: int) -> TsDefinition:
+        parent = enclosing()
+        owner = None
+        if scopes and scopes[-1].is_class:
+            owner = parent.qualname if parent is not None else None
+        qualname = f"{parent.qualname}.{name}" if parent is not None else name
+        definition = TsDefinition(name=name, kind=kind, offset=offset, qualname=qualname, owner=owner)
+        definitions.append(definition)
+        return definition
+
+    def close_expression_scopes(at_statement: bool = False) -> None:
+        while scopes and scopes[-1].expression and (
+            brace_depth < scopes[-1].brace_depth
+            or paren_depth < scopes[-1].paren_depth
+            or (
+                at_statement
+                and brace_depth == scopes[-1].brace_depth
+                and paren_depth == scopes[-1].paren_depth
+            )
+        ):
+            scopes.pop()
+
+    def start_function(definition: TsDefinition, marker: int) -> None:
+        nonlocal pending
+        if tokens[marker][1] == "=>" and marker + 1 < len(tokens) and tokens[marker + 1][1] != "{":
+            scopes.append(_Scope(definition, brace_depth, paren_depth, expression=True))
+        else:
+            pending = (definition, paren_depth, False)
+
+    count = len(tokens)
+    for index in range(count):
+        if index < skip_until:
+            continue
+        kind, value, offset = tokens[index]
+        previous = tokens[index - 1][1] if index else ""
+        following = tokens[index + 1][1] if index + 1 < count else ""
+
+        if kind == "punct":
+            if value == "{":
+                brace_depth += 1
+                if pending is not None and paren_depth == pending[1]:
+                    definition, _, is_class = pending
+                    scopes.append(_Scope(definition, brace_depth, paren_depth, is_class=is_class))
+                    pending = None
+            elif value == "}":
+                brace_depth -= 1
+                while scopes and not scopes[-1].expression and brace_depth < scopes[-1].brace_depth:
+                    scopes.pop()
+                close_expression_scopes()
+            elif value in ("(", "["):
+                paren_depth += 1
+            elif value in (")", "]"):
+                paren_depth -= 1
+                close_expression_scopes()
+            elif value in (";", ","):
+                if pending is not None and paren_depth == pending[1] and value == ";":
+                    pending = None
+                close_expression_scopes(at_statement=True)
+            elif value == "<" and _starts_jsx_component(tokens, index):
+                # ``<Component`` renders (calls) the component.
+                current = enclosing()
+                if current is not None:
+                    current.references.add(following)
+            continue
+
+        if kind != "ident":
+            continue
+
+        if value in _STATEMENT_KEYWORDS and previous not in (".", "?."):
+            close_expression_scopes(at_statement=True)
+
+        in_class_body = (
+            bool(scopes)
+            and scopes[-1].is_class
+            and brace_depth == scopes[-1].brace_depth
+            and paren_depth == scopes[-1].paren_depth
+        )
+
+        if value == "import" and following not in ("(", "."):
+            skip_until = _parse_import(tokens, index, imports)
+            continue
+
+        if value == "export" and following in ("{", "*"):
+            # ``export ... from "./module"`` re-exports behave like imports
+            skip_until = _parse_import(tokens, index, imports)
+            continue
+
+        if value == "function" and index + 1 < count and tokens[index + 1][0] == "ident":
+            if previous == "=" or following == "(":
+                continue
+            name_token = tokens[index + 1]
+            definition = define(name_token[1], "function", name_token[2])
+            pending = (definition, paren_depth, False)
+            skip_until = index + 2
+            continue
+
+        if value == "class" and index + 1 < count and tokens[index + 1][0] == "ident":
+            name_token = tokens[index + 1]
+            definition = define(name_token[1], "class", name_token[2])
+            pending = (definition, paren_depth, True)
+            skip_until = index + 2
+            continue
+
+        if value in ("const", "let", "var") and index + 1 < count and tokens[index + 1][0] == "ident":
+            name_token = tokens[index + 1]
+            position = index + 2
+            if position < count and tokens[position][1] == ":":
+                while position < count and tokens[position][1] not in ("=", ";"):
+                    position += 1
+            if position >= count or tokens[position][1] != "=":
+                continue
+            marker = _function_value(tokens, position + 1)
+            if marker != -1:
+                definition = define(name_token[1], "function", name_token[2])
+                start_function(definition, marker)
+                skip_until = marker + 1
+            elif previous == "export":
+                define(name_token[1], "variable", name_token[2])
+            continue
+
+        if in_class_body and (previous in ("{", "}", ";") or previous in _MEMBER_MODIFIERS):
+            if value in _MEMBER_MODIFIERS and index + 1 < count and tokens[index + 1][0] == "ident":
+                continue
+            if following in ("(", "<"):
+                definition = define(value, "function", offset)
+                pending = (definition, paren_depth, False)
+                continue
+            if following == "=":
+                marker = _function_value(tokens, index + 2)
+                if marker != -1:
+                    definition = define(value, "function", offset)
+                    start_function(definition, marker)
+                    skip_until = marker + 1
+            continue
+
+        if following == "(" and value not in _CALL_KEYWORDS:
+            current = enclosing()
+            if current is None:
+                continue
+            parts = [value]
+            position = index - 1
+            while position >= 1 and tokens[position][1] in (".", "?.") and tokens[position - 1][0] == "ident":
+                parts.append(tokens[position - 1][1])
+                position -= 2
+            if position >= 0 and tokens[position][1] in (".", "?."):
+                # call on an expression such as ``foo().bar()``: keep the attribute only
+                continue
+            current.references.add(".".join(reversed(parts)))
+
+    return TsModule(definitions=definitions, imports=imports)
+
+
+def _parse_import(tokens: list[Token], index: int, imports: dict[str, tuple[str, str | None]]) -> int:
+    """Record ``import`` bindings starting at *index*; returns the index to resume at."""
+
+    position = index + 1
+    count = len(tokens)
+    bindings: list[tuple[str, str | None]] = []
+    star = False
+    while position < count:
+        kind, value, _ = tokens[position]
+        if kind == "string":
+            specifier = value[1:-1] if len(value) >= 2 else ""
+            for local, imported in bindings:
+                imports[local] = (specifier, imported)
+            if star:
+                imports[f"*{specifier}"] = (specifier, None)
+            return position + 1
+        if value == ";":
+            return position + 1
+        if value == "*":
+            if position + 2 < count and tokens[position + 1][1] == "as":
+                bindings.append((tokens[position + 2][1], None))
+                position += 3
+            else:
+                star = True
+                position += 1
+            continue
+        if value == "{":
+            closing = _matching(tokens, position, "{", "}")
+            if closing == -1:
+                return count
+            if tokens[index][1] == "export" and (closing + 1 >= count or tokens[closing + 1][1] != "from"):
+                # ``export { foo }`` only exports local names
+                return closing + 1
+            inner = position + 1
+            while inner < closing:
+                name = tokens[inner][1]
+                if name == "type":
+                    inner += 1
+                    continue
+                if tokens[inner][0] == "ident":
+                    if inner + 2 < closing and tokens[inner + 1][1] == "as":
+                        bindings.append((tokens[inner + 2][1], name))
+                        inner += 3
+                        continue
+                    bindings.append((name, name))
+                inner += 1
+            position = closing + 1
+            continue
+        if kind == "ident" and value not in ("type", "from"):
+            # default import binds the module's default export, usually same-named
+            bindings.append((value, value))
+        position += 1
+    return count
@@ -0,0 +1,38 @@
+"""Environment driven settings shared by the API modules."""
+
+from __future__ import annotations
+
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer from the environment, falling back to *default*."""
+
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def env_str(name: str, default: str) -> str:
+    """Read a string from the environment, stripping surrounding whitespace."""
+
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip()
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back to *default*."""
+
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
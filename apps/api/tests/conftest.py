@@ -3,6 +3,17 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
 	sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def _reset_sse_exit_event():
+	"""sse-starlette binds its shutdown event to the first loop; give each test a fresh one."""
+	from sse_starlette.sse import AppStatus
+
+	AppStatus.should_exit_event = None
+	yield
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from pathlib import Path
+from urllib.parse import quote
+
 from fastapi.testclient import TestClient
 
 from src.main import app
@@ -14,3 +17,658 @@ def test_analysis_endpoint_returns_symbols() -> None:
     assert "symbols" in payload
     assert len(payload["symbols"]) > 0
     assert "edges" in payload
+
+
+def test_analysis_index_reparses_only_changed_files(tmp_path, monkeypatch) -> None:
+    from src.services import analysis
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    (tmp_path / "caller.py").write_text("def foo():\n    return bar()\n", encoding="utf-8")
+    callee = tmp_path / "callee.py"
+    callee.write_text("def bar():\n    return 1\n", encoding="utf-8")
+
+    parsed: list[str] = []
+    original_analyze_file = analysis.analyze_file
+
+    def counting_analyze_file(file_path, fingerprint, source):
+        parsed.append(file_path.name)
+        return original_analyze_file(file_path, fingerprint, source)
+
+    monkeypatch.setattr(analysis, "analyze_file", counting_analyze_file)
+
+    index = analysis.AnalysisIndex()
+    assert index.refresh() is True
+    assert sorted(parsed) == ["callee.py", "caller.py"]
+    edges = [(edge.source, edge.target) for edge in index.result().edges]
+    assert len(edges) == 1
+    assert ":foo:" in edges[0][0] and ":bar:" in edges[0][1]
+
+    parsed.clear()
+    assert index.refresh() is False
+    assert parsed == []
+
+    callee.write_text("def baz():\n    return 1\n\n", encoding="utf-8")
+    assert index.refresh() is True
+    assert parsed == ["callee.py"]
+    assert index.result().edges == []
+    assert {symbol.name for symbol in index.result().symbols} == {"foo", "baz"}
+
+
+def test_analysis_index_parallel_parsing_matches_serial() -> None:
+    from src.services.analysis import AnalysisIndex
+
+    serial = AnalysisIndex(workers=0)
+    parallel = AnalysisIndex(workers=2, chunk_size=4)
+    try:
+        serial.refresh()
+        parallel.refresh()
+        assert parallel.result() == serial.result()
+    finally:
+        parallel.close()
+
+
+def test_concurrent_analysis_requests_share_one_scan(monkeypatch) -> None:
+    import asyncio
+    import threading
+
+    from src.services import analysis
+
+    calls: list[int] = []
+    release = threading.Event()
+    expected = analysis.AnalysisSnapshot(version=1, symbols=[], edges=[])
+
+    def slow_refresh() -> tuple[analysis.AnalysisSnapshot, bool]:
+        calls.append(1)
+        release.wait(timeout=5)
+        return expected, False
+
+    monkeypatch.setattr(analysis, "refresh_snapshot", slow_refresh)
+
+    async def scenario() -> list[tuple[analysis.AnalysisSnapshot, bool]]:
+        tasks = [asyncio.create_task(analysis.refresh_snapshot_async()) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+    assert calls == [1]
+    assert all(snapshot is expected and not cache_hit for snapshot, cache_hit in results)
+
+
+def test_refresh_reports_its_own_cache_hit(tmp_path, monkeypatch) -> None:
+    import asyncio
+
+    from src.services import analysis
+    from src.services.graph_feed import GraphChangeFeed
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    monkeypatch.setattr(analysis, "_INDEX", analysis.AnalysisIndex())
+    monkeypatch.setattr(analysis, "_FEED", GraphChangeFeed())
+    monkeypatch.setattr(analysis, "_PUBLISHED", None)
+    module = tmp_path / "mod.py"
+    module.write_text("def first():\n    return 1\n", encoding="utf-8")
+
+    async def scenario() -> list[bool]:
+        hits = []
+        for content in (None, None, "def second():\n    return 2\n"):
+            if content is not None:
+                module.write_text(content, encoding="utf-8")
+            _, cache_hit = await analysis.refresh_snapshot_async()
+            hits.append(cache_hit)
+        return hits
+
+    assert asyncio.run(scenario()) == [False, True, False]
+
+
+def test_disk_cache_restores_index_without_reparsing(tmp_path, monkeypatch) -> None:
+    from src.services import analysis
+    from src.services.analysis_cache import AnalysisDiskCache
+
+    project = tmp_path / "project"
+    project.mkdir()
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", project)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [project])
+    module = project / "module.py"
+    module.write_text("def foo():\n    return bar()\n\n\ndef bar():\n    return 1\n", encoding="utf-8")
+
+    parsed: list[str] = []
+    original_analyze_file = analysis.analyze_file
+
+    def counting_analyze_file(file_path, fingerprint, source):
+        parsed.append(file_path.name)
+        return original_analyze_file(file_path, fingerprint, source)
+
+    monkeypatch.setattr(analysis, "analyze_file", counting_analyze_file)
+
+    warm = analysis.AnalysisIndex(disk_cache=AnalysisDiskCache(tmp_path / "cache"))
+    warm.refresh()
+    expected = warm.result()
+    warm.close()
+    assert parsed == ["module.py"]
+
+    parsed.clear()
+    restarted = analysis.AnalysisIndex(disk_cache=AnalysisDiskCache(tmp_path / "cache"))
+    assert restarted.refresh() is True
+    assert parsed == []
+    assert restarted.result() == expected
+
+    module.write_text("def foo():\n    return 2\n", encoding="utf-8")
+    restarted.refresh()
+    assert parsed == ["module.py"]
+    assert restarted.result().edges == []
+    restarted.close()
+
+
+def test_symbol_pages_cover_the_whole_graph() -> None:
+    first = client.get("/graph/symbols", params={"limit": 5})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["items"]) == 5
+    assert page["nextCursor"] is not None
+
+    seen = [item["id"] for item in page["items"]]
+    cursor = page["nextCursor"]
+    while cursor:
+        page = client.get("/graph/symbols", params={"limit": 50, "cursor": cursor}).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["nextCursor"]
+    assert len(seen) == page["total"] == len(set(seen))
+
+    stale = client.get("/graph/edges", params={"cursor": f"{page['version'] + 1}.0"})
+    assert stale.status_code == 409
+
+
+def test_graph_stream_emits_ndjson_records() -> None:
+    import json
+
+    response = client.get("/graph/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[-1]["type"] == "completed"
+    assert sum(1 for record in records if record["type"] == "symbol") == records[-1]["symbols"]
+
+
+def test_graph_stream_reads_sources_off_the_event_loop(monkeypatch) -> None:
+    import asyncio
+    import json
+
+    from src.routes import analysis as routes
+
+    on_loop: list[bool] = []
+    original = routes.symbol_model
+
+    def tracking_symbol_model(draft, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return original(draft, **kwargs)
+
+    monkeypatch.setattr(routes, "symbol_model", tracking_symbol_model)
+    response = client.get("/graph/stream", params={"include_source": "true"})
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[0]["symbol"]["source"]
+    assert on_loop and not any(on_loop)
+
+
+def test_symbols_omit_source_unless_requested() -> None:
+    payload = client.get("/graph/analyze").json()
+    symbol = payload["symbols"][0]
+    assert symbol["source"] is None
+
+    with_source = client.get("/graph/analyze", params={"include_source": "true"}).json()
+    assert with_source["symbols"][0]["source"]
+
+    response = client.get(f"/graph/symbols/{symbol['id']}/source")
+    assert response.status_code == 200
+    body = response.json()
+    assert symbol["name"] in body["source"]
+    assert body["sourceStartLine"] == symbol["sourceStartLine"]
+
+    # the web client escapes ids with encodeURIComponent
+    escaped = client.get(f"/graph/symbols/{quote(symbol['id'], safe='')}/source")
+    assert escaped.status_code == 200 and escaped.json()["id"] == symbol["id"]
+
+    assert client.get("/graph/symbols/missing:symbol/source").status_code == 404
+
+
+def test_extract_snippet_matches_splitlines_window() -> None:
+    from src.services.analysis import SNIPPET_CONTEXT_LINES, extract_snippet
+
+    source = "\r\n".join(f"line {number}" for number in range(1, 41)) + "\n"
+    lines = source.splitlines()
+    for center in (1, 5, 20, 40):
+        start = max(0, center - 1 - SNIPPET_CONTEXT_LINES)
+        end = min(len(lines), center + SNIPPET_CONTEXT_LINES)
+        assert extract_snippet(source, center) == ("\n".join(lines[start:end]), start + 1)
+    assert extract_snippet("", 3) == ("", 1)
+
+
+def test_search_ranks_exact_prefix_and_fuzzy_matches() -> None:
+    response = client.get("/graph/search", params={"q": "analyse_repository"})
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items[0]["symbol"]["name"] == "analyse_repository"
+    assert items[0]["match"] == "exact"
+    assert any(item["match"] == "prefix" for item in items)
+
+    fuzzy = client.get("/graph/search", params={"q": "analyse_repsitory"}).json()["items"]
+    assert fuzzy and fuzzy[0]["match"] == "fuzzy"
+    assert fuzzy[0]["symbol"]["name"].startswith("analyse_repository")
+
+
+def test_search_hits_belong_to_the_reported_version() -> None:
+    from src.services import analysis
+
+    analysis.refresh_snapshot()
+    snapshot, hits = analysis.search_snapshot("analyse_repository", limit=5)
+    assert snapshot.version == analysis.get_index().version
+    assert hits and all(snapshot.get_symbol(hit.draft.id) is hit.draft for hit in hits)
+
+    response = client.get("/graph/search", params={"q": "analyse_repository"}).json()
+    assert response["version"] == analysis.get_index().version
+
+
+def test_search_index_tracks_incremental_updates() -> None:
+    from src.models import SymbolKind
+    from src.services.analysis import SymbolDraft
+    from src.services.symbol_search import SymbolSearchIndex
+
+    def draft(identifier: str, name: str) -> SymbolDraft:
+        return SymbolDraft(
+            id=identifier, name=name, file_path="a.py", kind=SymbolKind.FUNCTION, line=1, column=0
+        )
+
+    index = SymbolSearchIndex()
+    old = draft("a:1", "create_app")
+    index.update([], [old, draft("b:1", "create_record")])
+    assert [hit.draft.id for hit in index.search("create_")] == ["a:1", "b:1"]
+
+    index.update([old], [draft("a:2", "build_app")])
+    assert [hit.draft.id for hit in index.search("create_")] == ["b:1"]
+    assert index.search("build_app")[0].match == "exact"
+    assert len(index) == 2
+
+
+def test_adjacency_index_traversals() -> None:
+    from src.services.graph_index import AdjacencyIndex
+
+    ids = ["a", "b", "c", "d", "e"]
+    edges = [("a", "b"), ("b", "c"), ("c", "a"), ("c", "d"), ("e", "d")]
+    graph = AdjacencyIndex(ids, edges)
+
+    assert list(graph.callees(2)) == [0, 3]
+    assert sorted(graph.callers(3)) == [2, 4]
+    assert graph.neighborhood(0, direction="callees", depth=2, limit=10) == {0: 0, 1: 1, 2: 2}
+    assert graph.neighborhood(3, direction="callers", depth=1, limit=10) == {3: 0, 2: 1, 4: 1}
+    assert graph.shortest_path(0, 3) == [0, 1, 2, 3]
+    assert graph.shortest_path(3, 0) is None
+    assert graph.strongly_connected_components() == [[0, 1, 2]]
+
+
+def test_neighbors_endpoint_returns_callees() -> None:
+    hits = client.get("/graph/search", params={"q": "analyse_repository"}).json()["items"]
+    symbol_id = hits[0]["symbol"]["id"]
+
+    response = client.get(
+        "/graph/neighbors", params={"symbol": symbol_id, "direction": "callees", "depth": 1}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["nodes"][0]["symbol"]["id"] == symbol_id
+    assert body["nodes"][0]["distance"] == 0
+    assert all(edge["source"] == symbol_id for edge in body["edges"])
+
+    assert client.get("/graph/neighbors", params={"symbol": "missing"}).status_code == 404
+
+
+def test_resolver_follows_imports_scopes_and_self_calls(tmp_path, monkeypatch) -> None:
+    from src.services import analysis
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    package = tmp_path / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("from .b import create_app\n", encoding="utf-8")
+    (package / "a.py").write_text("def create_app():\n    return 'a'\n", encoding="utf-8")
+    (package / "b.py").write_text("def create_app():\n    return 'b'\n", encoding="utf-8")
+    (package / "c.py").write_text(
+        "from . import a\n"
+        "from pkg import create_app as make\n"
+        "\n"
+        "\n"
+        "class Service:\n"
+        "    def run(self):\n"
+        "        return self.helper()\n"
+        "\n"
+        "    def helper(self):\n"
+        "        return a.create_app()\n"
+        "\n"
+        "\n"
+        "def main():\n"
+        "    return make()\n",
+        encoding="utf-8",
+    )
+
+    index = analysis.AnalysisIndex()
+    index.refresh()
+    snapshot = index.snapshot()
+    names = {draft.id: f"{draft.module}:{draft.qualname}" for draft in snapshot.symbols}
+    edges = {(names[source], names[target]) for source, target in snapshot.edges}
+
+    assert edges == {
+        ("pkg.c:Service.run", "pkg.c:Service.helper"),
+        ("pkg.c:Service.helper", "pkg.a:create_app"),
+        ("pkg.c:main", "pkg.b:create_app"),
+    }
+
+
+def test_incremental_refresh_matches_full_rebuild_for_aliased_imports(tmp_path, monkeypatch) -> None:
+    from src.services import analysis
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    package = tmp_path / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("from .b import foo as baz\n", encoding="utf-8")
+    (package / "c.py").write_text(
+        "from pkg.b import foo as bar\n"
+        "from pkg import baz\n"
+        "\n"
+        "\n"
+        "def main():\n"
+        "    return bar()\n"
+        "\n"
+        "\n"
+        "def other():\n"
+        "    return baz()\n",
+        encoding="utf-8",
+    )
+
+    def edges(index: analysis.AnalysisIndex) -> set[tuple[str, str]]:
+        snapshot = index.snapshot()
+        names = {draft.id: f"{draft.module}:{draft.qualname}" for draft in snapshot.symbols}
+        return {(names[source], names[target]) for source, target in snapshot.edges}
+
+    incremental = analysis.AnalysisIndex()
+    incremental.refresh()
+    assert edges(incremental) == set()
+
+    (package / "b.py").write_text("def foo():\n    return 1\n", encoding="utf-8")
+    incremental.refresh()
+    fresh = analysis.AnalysisIndex()
+    fresh.refresh()
+    assert edges(incremental) == edges(fresh) == {
+        ("pkg.c:main", "pkg.b:foo"),
+        ("pkg.c:other", "pkg.b:foo"),
+    }
+
+    # a second pkg.b makes the suffix ambiguous for imports written as ``b``
+    (package / "d.py").write_text("from b import foo\n\n\ndef run():\n    return foo()\n", encoding="utf-8")
+    incremental.refresh()
+    assert ("pkg.d:run", "pkg.b:foo") in edges(incremental)
+    vendor = tmp_path / "vendor"
+    vendor.mkdir()
+    (vendor / "b.py").write_text("def foo():\n    return 2\n", encoding="utf-8")
+    incremental.refresh()
+    fresh = analysis.AnalysisIndex()
+    fresh.refresh()
+    assert edges(incremental) == edges(fresh)
+    assert ("pkg.d:run", "pkg.b:foo") not in edges(incremental)
+
+
+def test_typescript_extraction_handles_arrows_methods_and_reexports(tmp_path, monkeypatch) -> None:
+    from src.services import analysis
+    from src.services.typescript import extract_typescript
+
+    module = extract_typescript(
+        "import { format } from './util';\n"
+        "const url = `/api/${encodeURIComponent('x')}`; // helper() in a comment\n"
+        "export const useThing = () => format(url);\n"
+        "export class Store {\n"
+        "  load() { return this.reset(); }\n"
+        "  reset = () => new Map();\n"
+        "}\n"
+        "export function Page() { return <Panel value={useThing()} />; }\n"
+        "export function Note() {\n"
+        "  return <p>Don't do it, {name()}<Hint /></p>;\n"
+        "}\n"
+        "function after() { return useThing(); }\n"
+        "const identity = <T,>(value: T) => value;\n"
+    )
+    definitions = {item.qualname: item for item in module.definitions}
+    assert set(definitions) == {
+        "useThing", "Store", "Store.load", "Store.reset", "Page", "Note", "after", "identity",
+    }
+    assert definitions["useThing"].references == {"format"}
+    assert definitions["Store.load"].references == {"this.reset"}
+    assert definitions["Page"].references == {"Panel", "useThing"}
+    assert definitions["Note"].references == {"name", "Hint"}
+    assert definitions["after"].references == {"useThing"}
+    assert module.imports["format"] == ("./util", "format")
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    (tmp_path / "panel").mkdir()
+    (tmp_path / "panel" / "index.ts").write_text("export * from './panel';\n", encoding="utf-8")
+    (tmp_path / "panel" / "panel.tsx").write_text("export function Panel() { return null; }\n", encoding="utf-8")
+    (tmp_path / "page.tsx").write_text(
+        "import { Panel } from './panel';\n\nexport function Page() {\n  return <Panel />;\n}\n",
+        encoding="utf-8",
+    )
+
+    index = analysis.AnalysisIndex()
+    index.refresh()
+    snapshot = index.snapshot()
+    page = next(draft for draft in snapshot.symbols if draft.name == "Page")
+    assert (page.line, page.column) == (3, 16)
+    names = {draft.id: draft.qualname for draft in snapshot.symbols}
+    assert {(names[source], names[target]) for source, target in snapshot.edges} == {("Page", "Panel")}
+
+
+def test_typescript_local_export_list_is_not_an_import() -> None:
+    from src.services.typescript import extract_typescript
+
+    module = extract_typescript(
+        "const foo = () => 1\n"
+        "export { foo }\n"
+        "export function bar() { baz() }\n"
+        "import x from 'y'\n"
+    )
+    definitions = {item.qualname: item for item in module.definitions}
+    assert set(definitions) == {"foo", "bar"}
+    assert definitions["bar"].references == {"baz"}
+    assert module.imports == {"x": ("y", "x")}
+
+
+def test_change_feed_publishes_diffs_between_versions(tmp_path, monkeypatch) -> None:
+    import asyncio
+
+    from src.services import analysis
+    from src.services.graph_feed import GraphChangeFeed
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    module = tmp_path / "mod.py"
+    module.write_text("def a():\n    return b()\n\n\ndef b():\n    return 1\n", encoding="utf-8")
+
+    index = analysis.AnalysisIndex()
+    feed = GraphChangeFeed(history=2)
+    index.refresh()
+    first = index.snapshot()
+    feed.publish(None, first)
+
+    module.write_text("def a():\n    return c()\n\n\ndef c():\n    return 1\n", encoding="utf-8")
+    index.refresh()
+    second = index.snapshot()
+    diff = feed.publish(first, second)
+
+    names = {draft.id: draft.name for draft in (*first.symbols, *second.symbols)}
+    assert sorted(draft.name for draft in diff.added_symbols) == ["a", "c"]
+    assert [names[symbol_id] for symbol_id in diff.removed_symbols] == ["b"]
+    assert [(names[s], names[t]) for s, t in diff.added_edges] == [("a", "c")]
+    assert [(names[s], names[t]) for s, t in diff.removed_edges] == [("a", "b")]
+    assert feed.since(first.version) == [diff]
+    assert feed.since(second.version) == []
+
+    async def wait_for_next() -> int:
+        waiter = asyncio.ensure_future(feed.wait(second.version, timeout=5))
+        await asyncio.sleep(0)
+        module.write_text("def a():\n    return 2\n", encoding="utf-8")
+        index.refresh()
+        await asyncio.to_thread(feed.publish, second, index.snapshot())
+        return await waiter
+
+    assert asyncio.run(wait_for_next()) == second.version + 1
+    # history of two diffs no longer reaches back to the first version
+    assert feed.since(0) is None
+
+
+def test_watcher_reindexes_changed_files(tmp_path, monkeypatch) -> None:
+    import asyncio
+
+    from src.services import analysis
+    from src.services.graph_feed import GraphChangeFeed
+    from src.services.graph_watcher import GraphWatcher
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path])
+    monkeypatch.setattr(analysis, "_INDEX", analysis.AnalysisIndex())
+    monkeypatch.setattr(analysis, "_FEED", GraphChangeFeed())
+    monkeypatch.setattr(analysis, "_PUBLISHED", None)
+    (tmp_path / "mod.py").write_text("def first():\n    return 1\n", encoding="utf-8")
+
+    async def scenario() -> tuple[list[str], list[str]]:
+        watcher = GraphWatcher(backend="poll", debounce_ms=0, interval_ms=50)
+        watcher.start()
+        try:
+            feed = analysis.get_feed()
+            await feed.wait(0, timeout=5)
+            assert analysis.is_watched()
+            before = [draft.name for draft in (await analysis.refresh_snapshot_async())[0].symbols]
+            (tmp_path / "other.py").write_text("def second():\n    return 2\n", encoding="utf-8")
+            await feed.wait(1, timeout=5)
+            after = [draft.name for draft in (await analysis.refresh_snapshot_async())[0].symbols]
+        finally:
+            await watcher.stop()
+        assert not analysis.is_watched()
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before == ["first"]
+    assert sorted(after) == ["first", "second"]
+
+
+def test_changes_endpoint_reports_current_version() -> None:
+    response = client.get("/graph/changes", params={"since": 0})
+    assert response.status_code == 200
+    version = response.json()["version"]
+    assert version >= 1
+
+    status = client.get("/graph/status").json()
+    assert status["version"] == version
+    assert status["watching"] is False
+
+    response = client.get("/graph/changes", params={"since": version, "timeout": 0.05})
+    assert response.json() == {"version": version, "resync": False, "diffs": []}
+
+
+def test_gitignore_rules_follow_git_semantics() -> None:
+    from src.services.gitignore import GitIgnore, is_ignored, parse_rule
+
+    rules = [
+        rule
+        for rule in map(
+            parse_rule,
+            ["# comment", "*.log", "!keep.log", "/generated/", "docs/**/*.py", "cache/", ""],
+        )
+        if rule is not None
+    ]
+    root = GitIgnore(Path("/repo"), rules)
+
+    def ignored(path: str, is_dir: bool = False) -> bool:
+        return is_ignored([root], path, path.rsplit("/", 1)[-1], is_dir)
+
+    assert ignored("/repo/a/debug.log")
+    assert not ignored("/repo/a/keep.log")
+    assert ignored("/repo/generated", is_dir=True)
+    assert not ignored("/repo/src/generated", is_dir=True)
+    assert ignored("/repo/docs/x/y/conf.py")
+    assert not ignored("/repo/src/conf.py")
+    assert ignored("/repo/src/cache", is_dir=True)
+    assert not ignored("/repo/src/cache")
+
+
+def test_scan_prunes_ignored_directories_and_yields_files_once(tmp_path, monkeypatch) -> None:
+    from src.services import analysis
+
+    monkeypatch.setattr(analysis, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(analysis, "CODE_DIRECTORIES", [tmp_path / "apps", tmp_path / "apps"])
+    monkeypatch.setattr(analysis, "MAX_CODE_FILE_BYTES", 64)
+    (tmp_path / ".gitignore").write_text("generated/\n", encoding="utf-8")
+    apps = tmp_path / "apps"
+    for relative in (
+        "web/page.tsx",
+        "web/node_modules/dep/index.ts",
+        "api/main.py",
+        "api/generated/schema.py",
+        "api/notes.md",
+        "api/tmp_scratch.py",
+    ):
+        path = apps / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n", encoding="utf-8")
+    (apps / "api" / ".gitignore").write_text("tmp_*.py\n", encoding="utf-8")
+    (apps / "api" / "big.py").write_text("#" * 100, encoding="utf-8")
+
+    stats = analysis.ScanStats()
+    files = [path.relative_to(apps).as_posix() for path, _ in analysis.scan_code_files(stats)]
+
+    assert files == ["api/main.py", "web/page.tsx"]
+    assert (stats.files, stats.pruned, stats.ignored, stats.oversized) == (2, 2, 1, 1)
+    assert stats.skipped == 2  # notes.md and the .gitignore file itself
+    assert not stats.truncated
+
+
+def test_analyze_serves_etag_and_not_modified() -> None:
+    first = client.get("/graph/analyze", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('-gzip"')
+
+    plain = client.get("/graph/analyze", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == first.json()
+    assert plain.headers["etag"] == etag.replace("-gzip", "")
+
+    cached = client.get("/graph/analyze", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"]
+
+    other = client.get("/graph/analyze", headers={"If-None-Match": '"0000"'})
+    assert other.status_code == 200
+
+
+def test_encoded_payload_negotiates_and_caches() -> None:
+    from src.services.http_payload import EncodedPayload
+
+    payload = EncodedPayload(b"{" + b'"k":1,' * 500 + b"}")
+    assert payload.negotiate("gzip;q=0.5, deflate") == "gzip"
+    assert payload.negotiate("gzip;q=0") is None
+    assert payload.negotiate(None) is None
+    assert payload.negotiate("*") in {"gzip", "br"}
+    assert EncodedPayload(b"{}").negotiate("gzip") is None
+
+    assert not payload.is_encoded("gzip")
+    compressed = payload.encoded("gzip")
+    assert payload.encoded("gzip") is compressed
+    assert payload.matches(f'W/{payload.etag("gzip")}, "other"')
+    assert payload.matches("*")
+    assert not payload.matches('"other"')
@@ -35,3 +35,46 @@ def test_chat_stream_emits_dummy_tokens() -> None:
 
     assert any(event.get("type") == "token" for event in events)
     assert events[-1]["type"] == "completed"
+
+
+def test_chat_post_streams_reply_and_completes_session() -> None:
+    from src.graph import ConversationState, get_session_store
+    from src.providers import MockProvider, set_provider
+
+    set_provider(MockProvider(tokens_per_second=0))
+    try:
+        with client.stream(
+            "POST",
+            "/chat/stream",
+            json={"conversation": [{"role": "user", "content": "ping pong"}]},
+        ) as response:
+            assert response.status_code == 200
+            session_id = response.headers["x-session-id"]
+            events = _read_sse_messages(response)
+    finally:
+        set_provider(None)
+
+    tokens = "".join(event["payload"]["token"] for event in events if event["type"] == "token")
+    assert tokens == "Mock reply: ping pong"
+    assert events[-1]["sessionId"] == session_id
+
+    graph = get_session_store().get(session_id)
+    assert graph is not None
+    assert graph.history == [
+        ConversationState.IDLE,
+        ConversationState.PLANNING,
+        ConversationState.RESPONDING,
+        ConversationState.COMPLETED,
+    ]
+
+
+def test_chat_post_rejects_busy_session_and_invalid_payload() -> None:
+    from src.graph import ConversationState, get_session_store
+
+    graph = get_session_store().get_or_create("busy-session")
+    graph.transition(ConversationState.PLANNING)
+    response = client.post("/chat/stream", json={"sessionId": "busy-session", "conversation": []})
+    assert response.status_code == 409
+
+    response = client.post("/chat/stream", json={"conversation": [{"role": "robot", "content": "x"}]})
+    assert response.status_code == 422
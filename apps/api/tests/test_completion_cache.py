@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.providers import ChatMessage, CompletionRequest, MockProvider, set_provider
+from src.services.completion_cache import CompletionCache, completion_key, get_completion_cache
+
+client = TestClient(app)
+
+
+def _request(content: str, **options: object) -> CompletionRequest:
+    return CompletionRequest(messages=(ChatMessage(role="user", content=content),), **options)
+
+
+def test_completion_key_normalizes_whitespace_but_not_parameters() -> None:
+    key = completion_key("mock", _request("hello   world"))
+    assert key == completion_key("mock", _request("  hello\nworld "))
+    assert key != completion_key("mock", _request("hello world", temperature=0.7))
+    assert key != completion_key("http", _request("hello world"))
+    assert key != completion_key("mock", _request("hello there"))
+
+
+def test_completion_cache_bounds_bytes_entries_and_age() -> None:
+    now = [0.0]
+    cache = CompletionCache(max_bytes=400, max_entries=3, ttl_seconds=10, clock=lambda: now[0])
+
+    assert cache.put("a", ("x",) * 3)
+    assert cache.put("b", ("y",) * 3)
+    assert cache.get("a") == ("x",) * 3  # "b" becomes least recently used
+    assert cache.put("c", ("z",) * 3)
+    assert cache.get("b") is None
+    assert cache.stats.evictions == 1
+    assert cache.stats.bytes <= 400
+
+    assert not cache.put("huge", ("w",) * 100)
+    assert cache.stats.rejected == 1
+
+    now[0] = 11.0
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert cache.stats.entries == len(cache) == 1
+
+
+def test_completion_cache_records_only_finished_streams() -> None:
+    cache = CompletionCache()
+
+    async def tokens(fail: bool) -> AsyncIterator[str]:
+        yield "one"
+        if fail:
+            raise RuntimeError("boom")
+        yield "two"
+
+    async def consume(key: str, fail: bool) -> list[str]:
+        received: list[str] = []
+        try:
+            async for token in cache.record(key, tokens(fail)):
+                received.append(token)
+        except RuntimeError:
+            pass
+        return received
+
+    assert asyncio.run(consume("ok", fail=False)) == ["one", "two"]
+    assert asyncio.run(consume("failed", fail=True)) == ["one"]
+    assert cache.get("ok") == ("one", "two")
+    assert cache.get("failed") is None
+
+
+def test_repeated_prompt_is_replayed_from_cache() -> None:
+    stats = get_completion_cache().stats
+    hits_before = stats.hits
+    set_provider(MockProvider(tokens_per_second=20))
+    body = {"conversation": [{"role": "user", "content": "cache me if you can"}]}
+    try:
+        timings = []
+        # one portal (event loop) for both streams
+        with TestClient(app) as session:
+            for _ in range(2):
+                started = time.perf_counter()
+                with session.stream("POST", "/chat/stream", json=body) as response:
+                    lines = [line for line in response.iter_lines() if line.startswith("data:")]
+                timings.append(time.perf_counter() - started)
+    finally:
+        set_provider(None)
+
+    assert len(lines) == 9  # 8 tokens + completed
+    assert stats.hits == hits_before + 1
+    # the replay is not paced at 20 tokens/s
+    assert timings[1] < timings[0] / 2
+    assert client.get("/metrics/cache/completions").json()["hits"] == stats.hits
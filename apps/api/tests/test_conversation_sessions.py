@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+
+from src.graph import ConversationGraph, ConversationState, InvalidTransition, SessionStore
+
+
+def test_conversation_graph_enforces_transitions_and_caps_history() -> None:
+    graph = ConversationGraph(max_history=5)
+    assert graph.current_state is ConversationState.IDLE
+
+    with pytest.raises(InvalidTransition):
+        graph.transition(ConversationState.COMPLETED)
+
+    for _ in range(3):
+        graph.transition(ConversationState.PLANNING)
+        graph.transition(ConversationState.RESPONDING)
+        graph.transition(ConversationState.COMPLETED)
+
+    assert graph.turns == 3
+    assert graph.history == [
+        ConversationState.RESPONDING,
+        ConversationState.COMPLETED,
+        ConversationState.PLANNING,
+        ConversationState.RESPONDING,
+        ConversationState.COMPLETED,
+    ]
+    assert not hasattr(graph, "__dict__")
+
+
+def test_session_store_evicts_lru_and_expired_sessions() -> None:
+    now = [0.0]
+    store = SessionStore(max_sessions=2, ttl_seconds=10, clock=lambda: now[0])
+
+    first = store.get_or_create("a")
+    store.get_or_create("b")
+    assert store.get("a") is first  # "b" is now least recently used
+    store.get_or_create("c")
+    assert "b" not in store
+    assert store.stats.evicted == 1
+
+    now[0] = 5.0
+    store.get("c")
+    now[0] = 12.0
+    # "a" was last touched at 0 and has expired, "c" at 5 has not
+    assert store.get("a") is None
+    assert store.get("c") is not None
+    assert store.stats.expired == 1
+    assert len(store) == 1
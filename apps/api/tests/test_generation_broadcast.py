@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+
+from src.providers import ProviderError
+from src.services.generation_broadcast import GenerationBroadcast, GenerationCoalescer
+
+
+def test_identical_requests_share_one_upstream_generation() -> None:
+    calls: list[int] = []
+
+    async def upstream() -> AsyncIterator[str]:
+        calls.append(1)
+        for token in ("a", "b", "c", "d"):
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def scenario() -> list[list[str]]:
+        coalescer = GenerationCoalescer()
+
+        async def client(delay: float) -> list[str]:
+            await asyncio.sleep(delay)
+            tokens, _ = coalescer.attach("same", upstream)
+            return [token async for token in tokens]
+
+        # late subscribers catch up from the buffered prefix
+        results = await asyncio.gather(*(client(delay) for delay in (0, 0, 0.015, 0.025)))
+        assert coalescer.stats.started == 1
+        assert coalescer.stats.coalesced == 3
+        assert coalescer.stats.inflight == 0
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == [1]
+    assert results == [["a", "b", "c", "d"]] * 4
+
+
+def test_generation_is_cancelled_when_every_subscriber_leaves() -> None:
+    async def scenario() -> bool:
+        stopped = asyncio.Event()
+
+        async def upstream() -> AsyncIterator[str]:
+            try:
+                while True:
+                    await asyncio.sleep(0.005)
+                    yield "x"
+            finally:
+                stopped.set()
+
+        coalescer = GenerationCoalescer()
+        tokens, _ = coalescer.attach("key", upstream)
+        async for _ in tokens:
+            break
+        await tokens.aclose()
+        await asyncio.wait_for(stopped.wait(), 1)
+        return coalescer.stats.inflight == 0
+
+    assert asyncio.run(scenario())
+
+
+def test_upstream_errors_reach_every_subscriber() -> None:
+    async def upstream() -> AsyncIterator[str]:
+        yield "partial"
+        raise ProviderError("upstream failed", retryable=True)
+
+    async def scenario() -> None:
+        coalescer = GenerationCoalescer()
+        first, _ = coalescer.attach("key", upstream)
+        second, joined = coalescer.attach("key", upstream)
+        assert joined
+        for tokens in (first, second):
+            received: list[str] = []
+            with pytest.raises(ProviderError, match="upstream failed"):
+                async for token in tokens:
+                    received.append(token)
+            assert received == ["partial"]
+
+    asyncio.run(scenario())
+
+
+def test_slowest_subscriber_paces_the_upstream() -> None:
+    pulled: list[int] = []
+
+    async def upstream() -> AsyncIterator[str]:
+        for index in range(100):
+            pulled.append(index)
+            yield str(index)
+
+    async def scenario() -> tuple[int, int, list[str]]:
+        broadcast = GenerationBroadcast(upstream(), lambda _: None, window=4)
+        slow = broadcast.subscribe()
+        fast = broadcast.subscribe()
+        assert await anext(slow) == "0"
+        drained = [await anext(fast) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        stalled_at = len(pulled)
+        # the slow reader catching up lets the generation move on
+        for _ in range(3):
+            await anext(slow)
+        await asyncio.sleep(0.01)
+        resumed_at = len(pulled)
+        await slow.aclose()
+        await fast.aclose()
+        return stalled_at, resumed_at, drained
+
+    stalled_at, resumed_at, drained = asyncio.run(scenario())
+    assert drained == ["0", "1", "2", "3"]
+    assert (stalled_at, resumed_at) == (4, 7)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.metrics.ring import OTHER_PATH, MetricRing
+
+client = TestClient(app)
+
+
+def test_latest_is_newest_first_and_drops_overwritten_records() -> None:
+    ring = MetricRing(capacity=4, per_path=4, max_paths=8)
+    for index in range(6):
+        ring.append("GET", "/a" if index % 2 else "/b", float(index), 0.5, index, index == 5)
+
+    rows = ring.latest(10)
+    assert [row[2] for row in rows] == [5.0, 4.0, 3.0, 2.0]
+    assert rows[0][:2] == ("GET", "/a")
+    assert rows[0][5] is True
+    assert rows[0][6].endswith("+00:00")
+    # /b's first record (index 0) was overwritten by the global ring
+    assert [row[2] for row in ring.latest(10, "/b")] == [4.0, 2.0]
+    assert [row[2] for row in ring.latest(1, "/a")] == [5.0]
+    assert ring.latest(5, "/missing") == []
+
+
+def test_per_path_ring_keeps_quiet_paths_reachable() -> None:
+    ring = MetricRing(capacity=1000, per_path=3, max_paths=8)
+    ring.append("POST", "/quiet", 1.0, 1.0, 0, False)
+    for _ in range(500):
+        ring.append("GET", "/busy", 2.0, 2.0, 0, False)
+
+    assert [row[1] for row in ring.latest(5, "/quiet")] == ["/quiet"]
+    assert len(ring.latest(5, "/busy")) == 3
+
+
+def test_records_are_indexed_by_route_and_keep_their_raw_path() -> None:
+    ring = MetricRing(capacity=16, per_path=16, max_paths=8)
+    route = "/graph/symbols/{symbol_id}/source"
+    for symbol in ("a", "b", "c"):
+        ring.append("GET", f"/graph/symbols/{symbol}/source", 1.0, 1.0, 0, False, route)
+    ring.append("GET", "/healthz", 1.0, 1.0, 0, False, "/healthz")
+
+    assert [row[1] for row in ring.latest(10, route)] == [
+        "/graph/symbols/c/source",
+        "/graph/symbols/b/source",
+        "/graph/symbols/a/source",
+    ]
+    assert [row[1] for row in ring.latest(10, "/graph/symbols/b/source")] == ["/graph/symbols/b/source"]
+    assert ring._paths == [route, "/healthz"]
+
+
+def test_routes_beyond_the_interning_limit_stay_queryable_by_path() -> None:
+    ring = MetricRing(capacity=16, per_path=16, max_paths=2)
+    for path in ("/one", "/two", "/three", "/four", "/three"):
+        ring.append("GET", path, 1.0, 1.0, 0, False, path)
+
+    assert [row[1] for row in ring.latest(5)] == ["/three", "/four", "/three", "/two", "/one"]
+    assert len(ring.latest(4, OTHER_PATH)) == 3
+    assert [row[1] for row in ring.latest(4, "/three")] == ["/three", "/three"]
+
+
+def test_latest_endpoint_reads_from_the_ring() -> None:
+    for _ in range(3):
+        client.get("/healthz")
+
+    response = client.get("/metrics/slo/latest", params={"path": "/healthz", "limit": 2})
+    records = response.json()["records"]
+    assert len(records) == 2
+    assert set(records[0]) == {"method", "path", "duration_ms", "ttfb_ms", "tokens", "cache_hit", "timestamp"}
+    assert all(record["path"] == "/healthz" for record in records)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.metrics.prometheus import SSE_ACTIVE, Counter, Histogram
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("job_seconds", "Job time.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "run")
+
+    lines = list(histogram.render())
+    assert lines[:2] == ["# HELP job_seconds Job time.", "# TYPE job_seconds histogram"]
+    assert 'job_seconds_bucket{stage="run",le="0.1"} 1' in lines
+    assert 'job_seconds_bucket{stage="run",le="1"} 3' in lines
+    assert 'job_seconds_bucket{stage="run",le="+Inf"} 4' in lines
+    assert 'job_seconds_sum{stage="run"} 4.25' in lines
+    assert 'job_seconds_count{stage="run"} 4' in lines
+
+
+def test_label_values_are_escaped() -> None:
+    counter = Counter("odd_total", "Odd labels.", ("path",))
+    counter.inc('a"b\\c\n')
+    assert list(counter.render())[-1] == 'odd_total{path="a\\"b\\\\c\\n"} 1'
+
+
+def test_metrics_endpoint_exposes_request_and_stream_metrics() -> None:
+    from src.providers import MockProvider, set_provider
+
+    client.get("/healthz")
+    set_provider(MockProvider(tokens_per_second=0))
+    try:
+        with client.stream(
+            "POST",
+            "/chat/stream",
+            json={"conversation": [{"role": "user", "content": "prometheus scrape"}]},
+        ) as response:
+            response.read()
+    finally:
+        set_provider(None)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/healthz",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/chat/stream",le="+Inf"}' in body
+    assert 'http_request_ttfb_seconds_count{method="POST",route="/chat/stream"}' in body
+    assert 'chat_tokens_total{route="/chat/stream"}' in body
+    assert "# TYPE pytest_job_duration_seconds histogram" in body
+    assert SSE_ACTIVE.value("/chat/stream") == 0
+
+
+def test_active_sse_gauge_tracks_open_event_streams() -> None:
+    import asyncio
+
+    from src.middleware.metrics import RequestMetricsMiddleware
+
+    during: list[float] = []
+
+    async def sse_app(scope, receive, send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream; charset=utf-8")],
+            }
+        )
+        during.append(SSE_ACTIVE.value("<unmatched>"))
+        await send({"type": "http.response.body", "body": b"data: x\n\n", "more_body": False})
+
+    async def scenario() -> None:
+        async def receive() -> dict[str, str]:
+            return {"type": "http.disconnect"}
+
+        async def send(_: dict[str, object]) -> None:
+            return None
+
+        scope = {"type": "http", "method": "GET", "path": "/gauge", "headers": []}
+        await RequestMetricsMiddleware(sse_app)(scope, receive, send)
+
+    before = SSE_ACTIVE.value("<unmatched>")
+    asyncio.run(scenario())
+    assert during == [before + 1]
+    assert SSE_ACTIVE.value("<unmatched>") == before
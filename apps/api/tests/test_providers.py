@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.providers import (
+    ChatMessage,
+    ChatProvider,
+    CompletionRequest,
+    MockProvider,
+    ProviderError,
+    set_provider,
+)
+from src.providers.http_provider import HttpChatProvider
+from src.providers.mock import WELCOME_TOKENS, mock_completion_tokens
+from src.providers.mock_server import create_mock_server
+
+client = TestClient(app)
+
+PROMPT = CompletionRequest(messages=(ChatMessage(role="user", content="hello mock world"),))
+
+
+async def _collect(provider: ChatProvider, request: CompletionRequest) -> list[str]:
+    return [token async for token in provider.stream(request)]
+
+
+def test_mock_provider_is_deterministic_and_paced() -> None:
+    assert mock_completion_tokens(CompletionRequest()) == list(WELCOME_TOKENS)
+    assert mock_completion_tokens(PROMPT) == ["Mock", " reply", ":", " hello", " mock", " world"]
+
+    async def timed() -> tuple[list[str], float, float]:
+        loop = asyncio.get_running_loop()
+        provider = MockProvider(tokens_per_second=100, ttft_ms=50)
+        started = loop.time()
+        first_at = None
+        tokens = []
+        async for token in provider.stream(PROMPT):
+            if first_at is None:
+                first_at = loop.time() - started
+            tokens.append(token)
+        return tokens, first_at or 0.0, loop.time() - started
+
+    tokens, ttft, total = asyncio.run(timed())
+    assert tokens == mock_completion_tokens(PROMPT)
+    assert ttft >= 0.045
+    # five more tokens at 100 tokens/s after the first one
+    assert total >= 0.045 + 0.045
+
+
+def _mock_client(app_: object) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app_))
+
+
+def test_http_provider_streams_from_mock_server() -> None:
+    async def run() -> list[str]:
+        provider = HttpChatProvider(
+            base_url="http://mock/v1",
+            client=_mock_client(create_mock_server(tokens_per_second=0)),
+        )
+        try:
+            return await _collect(provider, PROMPT)
+        finally:
+            await provider.aclose()
+
+    assert asyncio.run(run()) == mock_completion_tokens(PROMPT)
+
+
+def test_http_provider_retries_before_the_first_token() -> None:
+    server = create_mock_server(tokens_per_second=0)
+    calls: list[int] = []
+
+    async def flaky(scope, receive, send) -> None:
+        calls.append(1)
+        if len(calls) == 1:
+            await send({"type": "http.response.start", "status": 503, "headers": []})
+            await send({"type": "http.response.body", "body": b"busy"})
+            return
+        await server(scope, receive, send)
+
+    async def rejected(scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": 400, "headers": []})
+        await send({"type": "http.response.body", "body": b"bad request"})
+
+    async def run(app_: object) -> list[str]:
+        provider = HttpChatProvider(
+            base_url="http://mock/v1", backoff_s=0.001, client=_mock_client(app_)
+        )
+        try:
+            return await _collect(provider, PROMPT)
+        finally:
+            await provider.aclose()
+
+    assert asyncio.run(run(flaky)) == mock_completion_tokens(PROMPT)
+    assert len(calls) == 2
+
+    with pytest.raises(ProviderError, match="HTTP 400"):
+        asyncio.run(run(rejected))
+
+
+class _FailingProvider(ChatProvider):
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[str]:
+        yield "partial"
+        raise ProviderError("upstream went away")
+
+
+def _sse_events(response) -> list[dict[str, object]]:
+    return [
+        json.loads(line.removeprefix("data:").strip())
+        for line in response.iter_lines()
+        if line.startswith("data:")
+    ]
+
+
+def test_chat_stream_uses_configured_provider() -> None:
+    set_provider(MockProvider(tokens_per_second=0))
+    try:
+        with client.stream("GET", "/chat/stream") as response:
+            events = _sse_events(response)
+    finally:
+        set_provider(None)
+    tokens = [event["payload"]["token"] for event in events if event["type"] == "token"]
+    assert tokens == list(WELCOME_TOKENS)
+    assert events[-1] == {
+        "type": "completed",
+        "usage": {"totalTokens": len(WELCOME_TOKENS), "totalCostUsd": round(len(WELCOME_TOKENS) * 0.000002, 6)},
+    }
+
+
+def test_chat_stream_reports_provider_errors() -> None:
+    set_provider(_FailingProvider())
+    try:
+        with client.stream("GET", "/chat/stream") as response:
+            events = _sse_events(response)
+    finally:
+        set_provider(None)
+    assert [event["type"] for event in events] == ["token", "error"]
+    assert events[-1]["message"] == "upstream went away"
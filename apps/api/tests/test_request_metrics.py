@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.metrics.store import latest
+
+client = TestClient(app)
+
+
+def test_slo_headers_are_added_to_plain_responses() -> None:
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert float(response.headers["x-slo-duration-ms"]) >= 0
+    assert response.headers["x-slo-tokens"] == "0"
+    assert response.headers["x-slo-cache-hit"] == "0"
+
+
+def test_streaming_duration_covers_the_whole_stream() -> None:
+    from src.providers import MockProvider, set_provider
+
+    set_provider(MockProvider(tokens_per_second=40))
+    try:
+        prompt = f"measure {uuid4().hex} until the end"
+        with client.stream(
+            "POST",
+            "/chat/stream",
+            json={"conversation": [{"role": "user", "content": prompt}]},
+        ) as response:
+            assert response.status_code == 200
+            body = response.read().decode("utf-8")
+    finally:
+        set_provider(None)
+
+    assert '"type":"completed"' in body
+    record = latest(limit=1, path="/chat/stream")[0]
+    # 8 tokens at 40/s: the first byte is early, the stream takes ~175ms
+    assert record.tokens == 8
+    assert record.cache_hit is False
+    assert record.duration_ms >= 120
+    assert record.ttfb_ms < record.duration_ms - 100
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+
+from src.metrics.histogram import WindowedHistogram
+from src.metrics.prometheus import Counter, Histogram, Registry
+from src.metrics.shared import SharedMetricSegment, open_shared_segment
+
+WINDOW_BYTES = WindowedHistogram.buffer_size(window_seconds=60, slice_seconds=10)
+
+
+def _worker(path: str, worker: int, count: int) -> None:
+    segment = SharedMetricSegment(path, 4096)
+    for index in range(count):
+        segment.append("GET", f"/worker/{worker}", float(index), 1.0, index, index % 2 == 0)
+    segment.close()
+
+
+def test_workers_append_to_one_segment(tmp_path: Path) -> None:
+    path = str(tmp_path / "metrics.seg")
+    SharedMetricSegment(path, 4096).close()
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_worker, args=(path, worker, 200)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    reader = SharedMetricSegment(path, 4096)
+    try:
+        assert reader.total == 800
+        rows = reader.latest(1000)
+        assert len(rows) == 800
+        assert {row[1] for row in rows} == {f"/worker/{worker}" for worker in range(4)}
+        per_worker = reader.latest(1000, "/worker/2")
+        assert [row[2] for row in per_worker] == [float(index) for index in reversed(range(200))]
+        assert per_worker[0][4] == 199 and per_worker[-1][5] is True
+    finally:
+        reader.close()
+
+
+def test_ring_wraps_and_keeps_the_newest_records(tmp_path: Path) -> None:
+    segment = SharedMetricSegment(str(tmp_path / "wrap.seg"), 8)
+    try:
+        for index in range(20):
+            segment.append("POST", "/chat/stream", float(index), 0.5, 1, False)
+        rows = segment.latest(100)
+        assert len(segment) == 8
+        assert [row[2] for row in rows] == [float(index) for index in range(19, 11, -1)]
+        assert rows[0][0] == "POST"
+        assert rows[0][6].endswith("+00:00")
+    finally:
+        segment.close()
+
+
+def test_capacity_change_maps_a_new_file_instead_of_resizing(tmp_path: Path) -> None:
+    path = str(tmp_path / "resize.seg")
+    first = SharedMetricSegment(path, 8)
+    first.append("GET", "/healthz", 1.0, 1.0, 0, False)
+
+    reopened = SharedMetricSegment(path, 8)
+    resized = SharedMetricSegment(path, 16)
+    try:
+        assert reopened.path == first.path and reopened.total == 1
+        assert resized.path != first.path
+        assert resized.capacity == 16 and resized.total == 0
+        # the old workers' file is left alone
+        assert first.total == 1 and os.path.getsize(first.path) > 0
+    finally:
+        for segment in (first, reopened, resized):
+            segment.close()
+
+
+def test_a_file_with_another_layout_is_refused(tmp_path: Path) -> None:
+    path = str(tmp_path / "foreign.seg")
+    segment = SharedMetricSegment(path, 8)
+    segment.close()
+    with open(segment.path, "r+b") as handle:
+        handle.write(b"NOTMETRS")
+
+    with pytest.raises(RuntimeError):
+        SharedMetricSegment(path, 8)
+    assert open_shared_segment(path, 8) is None
+
+
+def _series_worker(path: str, worker: int, count: int) -> None:
+    segment = SharedMetricSegment(path, 64, window_slots=4, window_bytes=WINDOW_BYTES)
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests.", ("route",)))
+    duration = registry.register(Histogram("duration_seconds", "Duration.", ("route",), buckets=(0.1, 1.0)))
+    registry.share(segment.series)
+    window = WindowedHistogram(
+        window_seconds=60, slice_seconds=10, buffer=segment.windows.cells("GET /chat/stream")
+    )
+    for index in range(count):
+        with segment.locked():
+            requests.inc("/chat/stream")
+            duration.observe(0.5, "/chat/stream")
+            window.record(float(index % 100), 1.0, tokens=worker, cache_hit=False)
+    del window
+    segment.close()
+
+
+def test_counters_and_windows_add_up_across_workers(tmp_path: Path) -> None:
+    path = str(tmp_path / "series.seg")
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_series_worker, args=(path, worker, 300)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    segment = SharedMetricSegment(path, 64, window_slots=4, window_bytes=WINDOW_BYTES)
+    try:
+        registry = Registry()
+        requests = registry.register(Counter("requests_total", "Requests.", ("route",)))
+        duration = registry.register(Histogram("duration_seconds", "Duration.", ("route",), buckets=(0.1, 1.0)))
+        registry.share(segment.series)
+        assert requests.value("/chat/stream") == 900
+        assert duration.count("/chat/stream") == 900
+        assert 'requests_total{route="/chat/stream"} 900' in registry.render()
+
+        [(key, buffer)] = list(segment.windows.items())
+        assert key == "GET /chat/stream"
+        summary = WindowedHistogram(window_seconds=60, slice_seconds=10, buffer=buffer).summary()
+        assert summary["count"] == 900
+        assert summary["tokens"] == 300 * (0 + 1 + 2)
+    finally:
+        segment.close()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import random
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.metrics.histogram import WindowedHistogram, bucket_index, bucket_value
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_values_stay_within_relative_error() -> None:
+    for value in (0.3, 1.0, 12.5, 250.0, 4_000.0, 90_000.0):
+        estimate = bucket_value(bucket_index(value))
+        assert abs(estimate - value) / value < 0.05
+
+
+def test_percentiles_throughput_and_cache_ratio() -> None:
+    clock = FakeClock()
+    histogram = WindowedHistogram(window_seconds=60, slice_seconds=10, clock=clock)
+    values = list(range(1, 1001))
+    random.Random(7).shuffle(values)
+    for index, value in enumerate(values):
+        histogram.record(float(value), value / 10, tokens=2, cache_hit=index % 4 == 0)
+
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["tokens"] == 2000
+    assert summary["cacheHitRatio"] == 0.25
+    assert summary["throughputRps"] == round(1000 / 60, 4)
+    for key, expected in (("p50", 500), ("p90", 900), ("p99", 990)):
+        assert abs(summary["durationMs"][key] - expected) / expected < 0.05
+        assert abs(summary["ttfbMs"][key] - expected / 10) / (expected / 10) < 0.05
+
+
+def test_old_slices_leave_the_sliding_window() -> None:
+    clock = FakeClock()
+    histogram = WindowedHistogram(window_seconds=60, slice_seconds=10, clock=clock)
+    histogram.record(1000.0, 10.0, tokens=0, cache_hit=False)
+    clock.now += 30
+    histogram.record(10.0, 1.0, tokens=0, cache_hit=True)
+
+    assert histogram.summary()["count"] == 2
+    assert histogram.summary(window_seconds=10)["count"] == 1
+    clock.now += 40
+    assert histogram.summary()["count"] == 1
+    assert histogram.summary()["durationMs"]["p99"] < 11
+    clock.now += 60
+    assert histogram.summary()["count"] == 0
+
+
+def test_summary_endpoint_groups_by_route_template() -> None:
+    client.get("/healthz")
+    client.get("/graph/symbols/some/file.py:thing/source")
+
+    response = client.get("/metrics/slo/summary", params={"window": 60})
+    assert response.status_code == 200
+    routes = {(row["method"], row["path"]): row for row in response.json()["routes"]}
+    health = routes[("GET", "/healthz")]
+    assert health["count"] >= 1
+    assert set(health["durationMs"]) == {"p50", "p90", "p99"}
+    assert ("GET", "/graph/symbols/{symbol_id:path}/source") in routes
+    assert all(not path.startswith("/graph/symbols/some") for _, path in routes)
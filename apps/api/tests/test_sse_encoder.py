@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from src.services.sse_encoder import ChatEventEncoder, FrameBuffer
+
+
+def _decode(event: bytes) -> dict:
+    assert event.startswith(b"data: ") and event.endswith(b"\n\n")
+    return json.loads(event[len(b"data: ") : -2])
+
+
+def test_encoder_emits_token_and_completed_events() -> None:
+    encoder = ChatEventEncoder(session_id="s-1")
+    first = _decode(encoder.token("Hello"))
+    second = _decode(encoder.token(' "wörld"\n'))
+    completed = _decode(encoder.completed())
+
+    assert first["type"] == "token"
+    assert first["payload"]["token"] == "Hello"
+    assert first["payload"]["index"] == 0
+    assert second["payload"]["token"] == ' "wörld"\n'
+    assert second["payload"]["id"] != first["payload"]["id"]
+    assert second["usage"] == {"totalTokens": 2, "totalCostUsd": 4e-06}
+    assert completed == {"type": "completed", "usage": second["usage"], "sessionId": "s-1"}
+    assert _decode(encoder.error("boom")) == {"type": "error", "message": "boom"}
+
+
+def test_frame_buffer_coalesces_fast_tokens_and_flushes_on_latency() -> None:
+    async def scenario() -> list[bytes]:
+        frames: list[bytes] = []
+        buffer = FrameBuffer(frames.append, max_latency_ms=20, max_bytes=1 << 20)
+        for index in range(10):
+            buffer.append(b"data: %d\n\n" % index)
+        # the first event goes out alone; the rest wait for the latency bound
+        assert len(frames) == 1
+        await asyncio.sleep(0.05)
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert len(frames) == 2
+    assert frames[1].count(b"data:") == 9
+
+
+def test_frame_buffer_flushes_when_max_bytes_is_reached() -> None:
+    async def scenario() -> list[bytes]:
+        frames: list[bytes] = []
+        buffer = FrameBuffer(frames.append, max_latency_ms=1000, max_bytes=32)
+        for _ in range(9):
+            buffer.append(b"data: 0123456789\n\n")
+        buffer.flush()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert [frame.count(b"data:") for frame in frames] == [1, 2, 2, 2, 2]
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.stream_replay import ResumeError, StreamRegistry, parse_event_id
+
+
+def test_parse_event_id() -> None:
+    assert parse_event_id("abc:12") == ("abc", 12)
+    assert parse_event_id("abc") is None
+    assert parse_event_id("abc:x") is None
+    assert parse_event_id(None) is None
+
+
+def test_reconnect_resumes_after_last_seen_event() -> None:
+    async def scenario() -> tuple[list[int], list[int], list[str]]:
+        registry = StreamRegistry(capacity=8, grace_seconds=5)
+
+        async def produce(stream) -> None:
+            for index in range(6):
+                await asyncio.sleep(0.005)
+                stream.publish(f"event-{index}")
+
+        stream = registry.create(produce)
+        first: list[int] = []
+        events = stream.subscribe()
+        async for seq, _ in events:
+            first.append(seq)
+            if seq == 3:
+                break
+        await events.aclose()
+
+        resumed, after = registry.resume(f"{stream.stream_id}:3")
+        rest = [(seq, item) async for seq, item in resumed.subscribe(after)]
+        return first, [seq for seq, _ in rest], [item for _, item in rest]
+
+    first, seqs, items = asyncio.run(scenario())
+    assert first == [1, 2, 3]
+    assert seqs == [4, 5, 6]
+    assert items == ["event-3", "event-4", "event-5"]
+
+
+def test_resume_outside_the_replay_window_is_rejected() -> None:
+    async def scenario() -> None:
+        registry = StreamRegistry(capacity=4, grace_seconds=5)
+
+        async def produce(stream) -> None:
+            for index in range(10):
+                stream.publish(index)
+
+        stream = registry.create(produce)
+        await asyncio.sleep(0)
+        assert registry.resume(f"{stream.stream_id}:6")[1] == 6
+        with pytest.raises(ResumeError):
+            registry.resume(f"{stream.stream_id}:2")
+        assert registry.resume("unknown:3") is None
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_holds_back_a_fast_producer() -> None:
+    async def scenario() -> tuple[list[int], int, bool]:
+        registry = StreamRegistry(capacity=8, grace_seconds=5)
+        lead = 0
+        finished = asyncio.Event()
+
+        async def produce(stream) -> None:
+            nonlocal lead
+            for index in range(50):
+                await stream.writable()
+                stream.publish(index)
+                lead = max(lead, stream.next_seq - 1 - len(received))
+            finished.set()
+
+        received: list[int] = []
+        stream = registry.create(produce)
+        async for _, item in stream.subscribe():
+            received.append(item)
+            await asyncio.sleep(0.002)
+        return received, lead, finished.is_set()
+
+    received, lead, finished = asyncio.run(scenario())
+    assert received == list(range(50))
+    assert lead <= 9
+    assert finished
+
+
+def test_producer_drains_freely_once_the_last_subscriber_leaves() -> None:
+    async def scenario() -> int:
+        registry = StreamRegistry(capacity=4, grace_seconds=5)
+        finished = asyncio.Event()
+
+        async def produce(stream) -> None:
+            for index in range(20):
+                await stream.writable()
+                stream.publish(index)
+            finished.set()
+
+        stream = registry.create(produce)
+        events = stream.subscribe()
+        await events.__anext__()
+        await asyncio.sleep(0.01)
+        assert not finished.is_set()
+        await events.aclose()
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        return stream.next_seq
+
+    assert asyncio.run(scenario()) == 21
+
+
+def test_abandoned_stream_is_cancelled_after_grace_period() -> None:
+    async def scenario() -> tuple[bool, int]:
+        registry = StreamRegistry(capacity=4, grace_seconds=0.02)
+        cancelled = asyncio.Event()
+
+        async def produce(stream) -> None:
+            try:
+                while True:
+                    await asyncio.sleep(0.005)
+                    stream.publish("x")
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        stream = registry.create(produce)
+        events = stream.subscribe()
+        await events.__anext__()
+        await events.aclose()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        return cancelled.is_set(), len(registry)
+
+    assert asyncio.run(scenario()) == (True, 0)
+
+
+def test_chat_stream_resumes_with_last_event_id() -> None:
+    from src.providers import MockProvider, set_provider
+
+    set_provider(MockProvider(tokens_per_second=0))
+    try:
+        with TestClient(app) as session:
+            with session.stream("GET", "/chat/stream") as response:
+                first_id = None
+                for line in response.iter_lines():
+                    if line.startswith("id:"):
+                        first_id = line.removeprefix("id:").strip()
+                        break
+            assert first_id is not None and first_id.endswith(":1")
+
+            with session.stream("GET", "/chat/stream", headers={"Last-Event-ID": first_id}) as response:
+                assert response.status_code == 200
+                lines = list(response.iter_lines())
+    finally:
+        set_provider(None)
+
+    ids = [line.removeprefix("id:").strip() for line in lines if line.startswith("id:")]
+    events = [json.loads(line.removeprefix("data:").strip()) for line in lines if line.startswith("data:")]
+    stream_id = first_id.rsplit(":", 1)[0]
+    assert ids == [f"{stream_id}:{seq}" for seq in range(2, len(ids) + 2)]
+    assert events[0]["payload"]["index"] == 1
+    assert events[-1]["type"] == "completed"
+
+
+def test_event_ids_do_not_resume_streams_of_another_route() -> None:
+    from src.providers import MockProvider, set_provider
+
+    def first_event(response) -> tuple[str, dict]:
+        event_id, data = None, None
+        for line in response.iter_lines():
+            if line.startswith("data:"):
+                data = json.loads(line.removeprefix("data:").strip())
+            elif line.startswith("id:"):
+                event_id = line.removeprefix("id:").strip()
+            elif not line and event_id is not None and data is not None:
+                return event_id, data
+        raise AssertionError("stream ended before its first event")
+
+    set_provider(MockProvider(tokens_per_second=0))
+    try:
+        with TestClient(app) as session:
+            with session.stream("GET", "/chat/stream") as response:
+                chat_id, _ = first_event(response)
+            with session.stream(
+                "POST",
+                "/tools/tests/generate",
+                json={"conversation": [{"role": "user", "content": "divide"}]},
+                headers={"Last-Event-ID": chat_id},
+            ) as response:
+                assert response.status_code == 200
+                tool_id, tool_event = first_event(response)
+            with session.stream("GET", "/chat/stream", headers={"Last-Event-ID": tool_id}) as response:
+                assert response.status_code == 200
+                lines = list(response.iter_lines())
+    finally:
+        set_provider(None)
+
+    assert parse_event_id(tool_id)[0] != parse_event_id(chat_id)[0]
+    assert tool_id.endswith(":1") and tool_event["type"] in ("tool", "token")
+    events = [json.loads(line.removeprefix("data:").strip()) for line in lines if line.startswith("data:")]
+    assert events[0]["payload"]["index"] == 0
+    assert events[-1]["type"] == "completed"
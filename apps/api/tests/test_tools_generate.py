@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import os
 from collections import Counter
 
 from fastapi.testclient import TestClient
@@ -48,3 +50,66 @@ def test_tool_generate_endpoint_streams_fail_fix_pass_cycle() -> None:
     assert any(stage == "pytest_initial_run" and status == "failed" for stage, status in statuses)
     assert any(stage == "pytest_rerun" and status == "succeeded" for stage, status in statuses)
     assert any("divide" in message for message in token_messages)
+
+
+def test_cancelled_pytest_run_kills_the_process(tmp_path) -> None:
+    from src.routes.tools import _run_pytest
+
+    pid_file = tmp_path / "pid"
+    (tmp_path / "test_slow.py").write_text(
+        "import os, time\n"
+        "\n"
+        "def test_slow():\n"
+        f"    open({str(pid_file)!r}, 'w').write(str(os.getpid()))\n"
+        "    time.sleep(60)\n",
+        encoding="utf-8",
+    )
+
+    async def scenario() -> None:
+        async def emit(_: str) -> None:
+            return None
+
+        task = asyncio.create_task(_run_pytest("pytest_initial_run", tmp_path, emit))
+        for _ in range(200):
+            if pid_file.exists() and pid_file.read_text():
+                break
+            await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    pid = int(pid_file.read_text())
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        pass
+    else:  # pragma: no cover - failure path
+        raise AssertionError(f"pytest worker {pid} is still running")
+
+
+def test_stream_disconnects_and_abandonment_are_counted() -> None:
+    from src.metrics.store import cancellations
+    from src.services.stream_replay import StreamRegistry
+
+    async def scenario() -> None:
+        registry = StreamRegistry(grace_seconds=0)
+
+        async def produce(stream) -> None:
+            while True:
+                stream.publish("x")
+                await asyncio.sleep(0.005)
+
+        stream = registry.create(produce, label="/tests/abandon")
+        events = stream.subscribe()
+        await events.__anext__()
+        await events.aclose()
+        await asyncio.sleep(0.02)
+
+    asyncio.run(scenario())
+    counts = {row["reason"]: row["count"] for row in cancellations() if row["path"] == "/tests/abandon"}
+    assert counts == {"abandoned": 1, "disconnected": 1}
+    response = client.get("/metrics/slo/cancellations")
+    assert {"path": "/tests/abandon", "reason": "abandoned", "count": 1} in response.json()["cancellations"]
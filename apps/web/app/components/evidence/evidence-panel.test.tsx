@@ -1,6 +1,6 @@
-import { fireEvent, render, screen } from "@testing-library/react";
+import { fireEvent, render, screen, waitFor } from "@testing-library/react";
 import React from "react";
-import { beforeEach, describe, expect, it, vi } from "vitest";
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
 
 import type { ElementDefinition } from "cytoscape";
 
@@ -138,4 +138,45 @@ describe("EvidencePanel", () => {
 
 		expect(revealLineInCenter).toHaveBeenCalled();
 	});
+
+	describe("without inline source", () => {
+		afterEach(() => {
+			vi.unstubAllGlobals();
+		});
+
+		it("fetches the snippet of the selected symbol only", async () => {
+			const id = "/repo/apps/api/src/example.py:exampleFunction:42";
+			const fetchMock = vi.fn(async (_url: string) => ({
+				ok: true,
+				status: 200,
+				json: async () => ({
+					id,
+					filePath: "apps/api/src/example.py",
+					source: "def exampleFunction():\n    return True\n",
+					sourceStartLine: 41,
+				}),
+			}));
+			vi.stubGlobal("fetch", fetchMock);
+
+			render(
+				<EvidencePanel
+					analysis={{
+						symbols: [{ ...analysis.symbols[0], id, source: null }],
+						edges: [],
+					}}
+				/>,
+			);
+
+			await waitFor(() =>
+				expect(screen.getByTestId("monaco-mock").textContent).toContain(
+					"def exampleFunction",
+				),
+			);
+			expect(fetchMock).toHaveBeenCalledTimes(1);
+			expect(fetchMock.mock.calls[0][0]).toContain(
+				`/graph/symbols/${encodeURIComponent(id)}/source`,
+			);
+			expect(revealLineInCenter).toHaveBeenCalledWith(2);
+		});
+	});
 });
@@ -12,6 +12,7 @@ import type {
 import type { editor as MonacoEditor } from "monaco-editor";
 import CytoscapeComponent from "react-cytoscapejs";
 
+import { useSymbolSource } from "../../hooks/use-symbol-source";
 import styles from "./evidence-panel.module.css";
 
 type CytoscapeRenderer = {
@@ -42,6 +43,12 @@ export function EvidencePanel({ analysis }: EvidencePanelProps) {
 	const [selected, setSelected] = useState<CodeSymbol | null>(
 		analysis.symbols[0] ?? null,
 	);
+	const {
+		source,
+		sourceStartLine,
+		loading: sourceLoading,
+		error: sourceError,
+	} = useSymbolSource(selected);
 	const editorRef = useRef<MonacoEditor.IStandaloneCodeEditor | null>(null);
 	const cyRef = useRef<CytoscapeCore | null>(null);
 	const symbolCount = analysis.symbols.length;
@@ -115,12 +122,12 @@ export function EvidencePanel({ analysis }: EvidencePanelProps) {
 		};
 	}, []);
 
-	// エディタで対象行へスクロール
+	// エディタで対象行へスクロール（スニペット取得後）
 	useEffect(() => {
-		if (!selected || !editorRef.current) return;
-		const relativeLine = selected.line - (selected.sourceStartLine ?? 1) + 1;
+		if (!selected || !editorRef.current || !source) return;
+		const relativeLine = selected.line - sourceStartLine + 1;
 		editorRef.current.revealLineInCenter(Math.max(relativeLine, 1));
-	}, [selected]);
+	}, [selected, source, sourceStartLine]);
 
 	return (
 		<div className={styles.wrapper}>
@@ -138,14 +145,17 @@ export function EvidencePanel({ analysis }: EvidencePanelProps) {
 			<div className={styles.viewerColumn}>
 				<div className={styles.metaPanel}>
 					<h2 className={styles.title}>{selected?.name ?? "No symbol"}</h2>
-					<p className={styles.meta}>{selected?.filePath ?? ""}</p>
+					<p className={styles.meta}>
+						{sourceError ??
+							(sourceLoading ? "ソースを取得中…" : (selected?.filePath ?? ""))}
+					</p>
 				</div>
 				<Editor
 					height="100%"
 					language={
 						selected?.filePath.endsWith(".py") ? "python" : "typescript"
 					}
-					value={selected?.source ?? ""}
+					value={source}
 					onMount={(editor) => {
 						editorRef.current = editor;
 					}}
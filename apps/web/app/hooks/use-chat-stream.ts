@@ -16,6 +16,7 @@ import {
 type StreamStatus = "idle" | "connecting" | "streaming" | "completed" | "error";
 
 const DEFAULT_BASE_URL = "http://localhost:8001";
+const MAX_RECONNECTS = 3;
 
 const resolveStreamUrl = (): string => {
 	const base = process.env.NEXT_PUBLIC_API_BASE_URL ?? DEFAULT_BASE_URL;
@@ -65,12 +66,14 @@ export const useChatStream = (): UseChatStreamResult => {
 					: typeof raw.duration_ms === "number"
 						? raw.duration_ms
 						: Number(raw.duration_ms ?? raw.durationMs ?? 0);
+			const ttfbRaw = Number(raw.ttfb_ms ?? raw.ttfbMs ?? Number.NaN);
 			const tokensRaw = Number(raw.tokens ?? 0);
 			const cacheRaw = Boolean(raw.cache_hit ?? raw.cacheHit);
 			const metric: SloMetric = {
 				method: String(raw.method ?? ""),
 				path: String(raw.path ?? ""),
 				durationMs: Number.isFinite(durationRaw) ? durationRaw : 0,
+				...(Number.isFinite(ttfbRaw) ? { ttfbMs: ttfbRaw } : {}),
 				tokens: Number.isFinite(tokensRaw) ? tokensRaw : 0,
 				cacheHit: cacheRaw,
 				timestamp:
@@ -95,6 +98,7 @@ export const useChatStream = (): UseChatStreamResult => {
 
 		const url = resolveStreamUrl();
 		const eventSource = new EventSource(url);
+		let reconnects = 0;
 		eventSource.onopen = () => {
 			setStatus("streaming");
 		};
@@ -116,6 +120,15 @@ export const useChatStream = (): UseChatStreamResult => {
 			}
 		};
 		eventSource.onerror = () => {
+			if (
+				eventSource.readyState === EventSource.CONNECTING &&
+				reconnects < MAX_RECONNECTS
+			) {
+				// the browser retries with Last-Event-ID and the API resumes the stream
+				reconnects += 1;
+				setStatus("connecting");
+				return;
+			}
 			setStatus("error");
 			setLastError("SSE connection lost");
 			eventSource.close();
@@ -0,0 +1,87 @@
+"use client";
+
+import { useEffect, useRef, useState } from "react";
+
+import {
+	type CodeSymbol,
+	type SymbolSource,
+	graphSymbolSourceEndpoint,
+} from "@ai-chat-assistant/shared";
+
+const DEFAULT_BASE_URL = "http://localhost:8001";
+
+const resolveSymbolSourceUrl = (symbolId: string): string => {
+	const base = process.env.NEXT_PUBLIC_API_BASE_URL ?? DEFAULT_BASE_URL;
+	return `${base}${graphSymbolSourceEndpoint(symbolId)}`;
+};
+
+export type UseSymbolSourceResult = {
+	source: string;
+	sourceStartLine: number;
+	loading: boolean;
+	error: string | null;
+};
+
+// 選択中シンボルのスニペットだけを /graph/symbols/{id}/source から遅延取得する
+export const useSymbolSource = (
+	symbol: CodeSymbol | null,
+): UseSymbolSourceResult => {
+	const cacheRef = useRef(new Map<string, SymbolSource>());
+	const [loaded, setLoaded] = useState<SymbolSource | null>(null);
+	const [error, setError] = useState<string | null>(null);
+
+	useEffect(() => {
+		setError(null);
+		if (!symbol) {
+			setLoaded(null);
+			return;
+		}
+		if (symbol.source != null) {
+			setLoaded({
+				id: symbol.id,
+				filePath: symbol.filePath,
+				source: symbol.source,
+				sourceStartLine: symbol.sourceStartLine,
+			});
+			return;
+		}
+		const cached = cacheRef.current.get(symbol.id);
+		if (cached) {
+			setLoaded(cached);
+			return;
+		}
+
+		const controller = new AbortController();
+		async function loadSource(target: CodeSymbol) {
+			try {
+				const response = await fetch(resolveSymbolSourceUrl(target.id), {
+					signal: controller.signal,
+				});
+				if (!response.ok) {
+					throw new Error(`API error: ${response.status}`);
+				}
+				const payload = (await response.json()) as SymbolSource;
+				cacheRef.current.set(target.id, payload);
+				setLoaded(payload);
+			} catch (err) {
+				if (err instanceof DOMException && err.name === "AbortError") {
+					return;
+				}
+				setError(
+					err instanceof Error ? err.message : "ソースの取得に失敗しました",
+				);
+			}
+		}
+
+		loadSource(symbol);
+		return () => controller.abort();
+	}, [symbol]);
+
+	const current = symbol && loaded?.id === symbol.id ? loaded : null;
+	return {
+		source: current?.source ?? "",
+		sourceStartLine: current?.sourceStartLine ?? symbol?.sourceStartLine ?? 1,
+		loading: symbol !== null && current === null && error === null,
+		error,
+	};
+};
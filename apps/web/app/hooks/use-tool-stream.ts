@@ -9,7 +9,7 @@ import {
 	type ToolStreamEvent,
 } from "@ai-chat-assistant/shared";
 
-import { parseSseChunk } from "../lib/sse";
+import { LAST_EVENT_ID_HEADER, parseSseChunk } from "../lib/sse";
 
 export type ConversationTurn = {
 	role: "user" | "assistant" | "system";
@@ -17,6 +17,7 @@ export type ConversationTurn = {
 };
 
 const DEFAULT_BASE_URL = "http://localhost:8001";
+const MAX_RECONNECTS = 3;
 
 const resolveToolStreamUrl = (): string => {
 	const base = process.env.NEXT_PUBLIC_API_BASE_URL ?? DEFAULT_BASE_URL;
@@ -62,49 +63,20 @@ export const useToolStream = (): UseToolStreamResult => {
 		setLastError(null);
 
 		const url = resolveToolStreamUrl();
-		let response: Response;
-		try {
-			response = await fetch(url, {
-				method: "POST",
-				headers: {
-					"Content-Type": "application/json",
-					Accept: "text/event-stream",
-				},
-				body: JSON.stringify({ conversation }),
-				signal: controller.signal,
-			});
-		} catch (error) {
-			if (!controller.signal.aborted) {
-				setStatus("error");
-				setLastError(
-					error instanceof Error ? error.message : "リクエストに失敗しました",
-				);
-				controllerRef.current = null;
-			}
-			return;
-		}
-
-		if (!response.ok || !response.body) {
-			setStatus("error");
-			setLastError(`API error: ${response.status}`);
-			controllerRef.current = null;
-			return;
-		}
-
-		setStatus("streaming");
-
-		const reader = response.body.getReader();
-		const decoder = new TextDecoder("utf-8");
-		let buffer = "";
 		let sawCompletion = false;
 		let completionStatus: ToolStatus | null = null;
+		let lastEventId = null as string | null;
+		let reconnects = 0;
 
-		const processBuffer = () => {
+		const processBuffer = (buffer: string): string => {
 			let boundary = buffer.indexOf("\n\n");
 			while (boundary !== -1) {
 				const chunk = buffer.slice(0, boundary);
 				buffer = buffer.slice(boundary + 2);
 				const parsed = parseSseChunk(chunk);
+				if (parsed?.id) {
+					lastEventId = parsed.id;
+				}
 				if (parsed?.data) {
 					try {
 						const event = JSON.parse(parsed.data) as ToolStreamEvent;
@@ -136,37 +108,89 @@ export const useToolStream = (): UseToolStreamResult => {
 								: "SSEの解析に失敗しました",
 						);
 						controller.abort();
-						return;
+						return buffer;
 					}
 				}
 				boundary = buffer.indexOf("\n\n");
 			}
+			return buffer;
 		};
 
-		try {
-			while (true) {
-				const { value, done } = await reader.read();
-				if (done) {
-					break;
+		// 接続が切れた場合は Last-Event-ID を付けて再接続し、続きから受信する
+		while (true) {
+			let response: Response;
+			try {
+				response = await fetch(url, {
+					method: "POST",
+					headers: {
+						"Content-Type": "application/json",
+						Accept: "text/event-stream",
+						...(lastEventId ? { [LAST_EVENT_ID_HEADER]: lastEventId } : {}),
+					},
+					body: JSON.stringify({ conversation }),
+					signal: controller.signal,
+				});
+			} catch (error) {
+				if (!controller.signal.aborted) {
+					setStatus("error");
+					setLastError(
+						error instanceof Error ? error.message : "リクエストに失敗しました",
+					);
+					controllerRef.current = null;
+				}
+				return;
+			}
+
+			if (!response.ok || !response.body) {
+				setStatus("error");
+				setLastError(`API error: ${response.status}`);
+				controllerRef.current = null;
+				return;
+			}
+
+			setStatus("streaming");
+
+			const reader = response.body.getReader();
+			const decoder = new TextDecoder("utf-8");
+			let buffer = "";
+			let interrupted: unknown = null;
+
+			try {
+				while (true) {
+					const { value, done } = await reader.read();
+					if (done) {
+						break;
+					}
+					buffer = processBuffer(buffer + decoder.decode(value, { stream: true }));
 				}
-				buffer += decoder.decode(value, { stream: true });
-				processBuffer();
+				processBuffer(buffer + decoder.decode());
+			} catch (error) {
+				interrupted = error;
 			}
-			buffer += decoder.decode();
-			processBuffer();
-		} catch (error) {
-			if (!controller.signal.aborted) {
+
+			if (
+				!sawCompletion &&
+				!controller.signal.aborted &&
+				lastEventId &&
+				reconnects < MAX_RECONNECTS
+			) {
+				reconnects += 1;
+				setStatus("connecting");
+				continue;
+			}
+			if (interrupted && !controller.signal.aborted) {
 				setStatus("error");
 				setLastError(
-					error instanceof Error
-						? error.message
+					interrupted instanceof Error
+						? interrupted.message
 						: "SSEストリームが中断されました",
 				);
 			}
-		} finally {
-			if (controllerRef.current === controller) {
-				controllerRef.current = null;
-			}
+			break;
+		}
+
+		if (controllerRef.current === controller) {
+			controllerRef.current = null;
 		}
 
 		if (!sawCompletion && !controller.signal.aborted) {
@@ -27,4 +27,14 @@ describe("parseSseChunk", () => {
 			event: "token",
 		});
 	});
+
+	it("parses the event id used for Last-Event-ID resumption", () => {
+		const chunk = 'id: 4f2a:7\nevent: token\ndata: {"n": 7}\n\n';
+		const result = parseSseChunk(chunk);
+		expect(result).toEqual({
+			id: "4f2a:7",
+			event: "token",
+			data: '{"n": 7}',
+		});
+	});
 });
@@ -1,8 +1,11 @@
 export type ParsedSseChunk = {
+	id?: string;
 	event?: string;
 	data?: string;
 };
 
+export const LAST_EVENT_ID_HEADER = "Last-Event-ID";
+
 export const parseSseChunk = (chunk: string): ParsedSseChunk | null => {
 	const trimmed = chunk.trim();
 	if (!trimmed) {
@@ -20,7 +23,12 @@ export const parseSseChunk = (chunk: string): ParsedSseChunk | null => {
 		}
 		const field = line.slice(0, separator);
 		const value = line.slice(separator + 1).trimStart();
-		if (field === "event") {
+		if (field === "id") {
+			// ids containing NUL must be ignored per the SSE spec
+			if (!value.includes("\0")) {
+				message.id = value;
+			}
+		} else if (field === "event") {
 			message.event = value;
 		} else if (field === "data") {
 			message.data = message.data ? `${message.data}\n${value}` : value;
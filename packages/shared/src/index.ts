@@ -32,6 +32,21 @@ export type ChatStreamTokenEvent = {
 export type ChatStreamCompletedEvent = {
 	type: typeof CHAT_STREAM_EVENT.completed;
 	usage: ChatStreamUsage;
+	sessionId?: string;
+};
+
+export type ConversationTurn = {
+	role: "user" | "assistant" | "system";
+	content: string;
+};
+
+/** Body of `POST /chat/stream`; omit `sessionId` to start a new session. */
+export type ChatStreamRequest = {
+	sessionId?: string;
+	conversation: ConversationTurn[];
+	model?: string;
+	temperature?: number;
+	maxTokens?: number;
 };
 
 export type ChatStreamErrorEvent = {
@@ -44,7 +59,7 @@ export type ChatStreamEvent =
 	| ChatStreamCompletedEvent
 	| ChatStreamErrorEvent;
 
-export type SymbolKind = "function" | "class" | "module" | "unknown";
+export type SymbolKind = "function" | "class" | "module" | "variable" | "unknown";
 
 export type CodeSymbol = {
 	id: string;
@@ -53,6 +68,17 @@ export type CodeSymbol = {
 	kind: SymbolKind;
 	line: number;
 	column: number;
+	source?: string | null;
+	sourceStartLine: number;
+};
+
+// ids contain file paths and ":", so they must be escaped in the URL
+export const graphSymbolSourceEndpoint = (symbolId: string): string =>
+	`/graph/symbols/${encodeURIComponent(symbolId)}/source`;
+
+export type SymbolSource = {
+	id: string;
+	filePath: string;
 	source: string;
 	sourceStartLine: number;
 };
@@ -68,6 +94,89 @@ export type AnalysisSummary = {
 	edges: DependencyEdge[];
 };
 
+export const GRAPH_SYMBOLS_ENDPOINT = "/graph/symbols";
+export const GRAPH_EDGES_ENDPOINT = "/graph/edges";
+export const GRAPH_STREAM_ENDPOINT = "/graph/stream";
+
+export type GraphPage<T> = {
+	items: T[];
+	nextCursor: string | null;
+	version: number;
+	total: number;
+};
+
+export const GRAPH_SEARCH_ENDPOINT = "/graph/search";
+
+export type SymbolSearchHit = {
+	symbol: CodeSymbol;
+	score: number;
+	match: "exact" | "prefix" | "fuzzy";
+};
+
+export type SymbolSearchResponse = {
+	query: string;
+	items: SymbolSearchHit[];
+	version: number;
+};
+
+export const GRAPH_NEIGHBORS_ENDPOINT = "/graph/neighbors";
+export const GRAPH_PATH_ENDPOINT = "/graph/path";
+export const GRAPH_COMPONENTS_ENDPOINT = "/graph/components";
+
+export type GraphNeighborhood = {
+	center: string;
+	direction: "callers" | "callees" | "both";
+	depth: number;
+	nodes: Array<{ symbol: CodeSymbol; distance: number }>;
+	edges: DependencyEdge[];
+	version: number;
+};
+
+export type GraphStreamRecord =
+	| { type: "symbol"; symbol: CodeSymbol }
+	| { type: "edge"; edge: DependencyEdge }
+	| { type: "completed"; version: number; symbols: number; edges: number };
+
+export const GRAPH_STATUS_ENDPOINT = "/graph/status";
+export const GRAPH_CHANGES_ENDPOINT = "/graph/changes";
+export const GRAPH_EVENTS_ENDPOINT = "/graph/events";
+
+export type GraphDiff = {
+	version: number;
+	previousVersion: number;
+	addedSymbols: CodeSymbol[];
+	removedSymbols: string[];
+	addedEdges: DependencyEdge[];
+	removedEdges: DependencyEdge[];
+};
+
+export type GraphChanges = {
+	version: number;
+	resync: boolean;
+	diffs: GraphDiff[];
+};
+
+export type GraphStatus = {
+	version: number;
+	watching: boolean;
+	backend: "watchfiles" | "poll" | null;
+	refreshes: number;
+	lastRefreshAt: number | null;
+	symbols: number;
+	edges: number;
+	scan: ScanStats;
+};
+
+export type ScanStats = {
+	files: number;
+	directories: number;
+	pruned: number;
+	ignored: number;
+	skipped: number;
+	oversized: number;
+	truncated: boolean;
+};
+
 export const TOOL_STREAM_ENDPOINT = "/tools/tests/generate";
 
 export const TOOL_STREAM_EVENT = {
@@ -122,6 +231,7 @@ export type SloMetric = {
 	method: string;
 	path: string;
 	durationMs: number;
+	ttfbMs?: number;
 	tokens: number;
 	cacheHit: boolean;
 	timestamp: string;
@@ -130,3 +240,28 @@ export type SloMetric = {
 export type SloMetricsResponse = {
 	records: Array<Record<string, unknown>>;
 };
+
+export const SLO_SUMMARY_ENDPOINT = "/metrics/slo/summary";
+
+export type SloPercentiles = {
+	p50: number;
+	p90: number;
+	p99: number;
+};
+
+export type SloRouteSummary = {
+	method: string;
+	path: string;
+	windowSeconds: number;
+	count: number;
+	throughputRps: number;
+	cacheHitRatio: number;
+	tokens: number;
+	durationMs: SloPercentiles;
+	ttfbMs: SloPercentiles;
+};
+
+export type SloSummaryResponse = {
+	windowSeconds: number;
+	routes: SloRouteSummary[];
+};